@@ -6,12 +6,42 @@ Tutte le costanti e configurazioni dell'applicazione
 # ===== CONFIGURAZIONE BASE =====
 DESTINATION_BASE = r"C:\Users\Dave\Desktop\natale"
 SD_DRIVE_LETTER = "I"
-PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.raw', '.cr2', '.nef', '.arw',
-                    '.mp4', '.mov', '.avi', '.heic', '.dng'}
+SD_MOUNT_PATH = None        # Punto di mount della SD su Linux (es. "/media/utente/SD"), ha precedenza sulla lettera
+SD_POLL_INTERVAL = 1.0      # Secondi tra due controlli di inserimento/rimozione SD
+AUTO_IMPORT_ON_INSERT = False   # Importa (senza conferma) ogni SD appena inserita
+
+# Destinazioni di backup (stessa struttura <data>/<n>): ogni file letto una volta sola
+BACKUP_DESTINATION_BASES = []   # es. [r"E:\\Backup\\natale"]
+
+# Classi di estensione (usate dallo scanner SD e dal caricamento cartelle)
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.heic'}
+RAW_EXTENSIONS = {'.raw', '.cr2', '.nef', '.arw', '.dng'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi'}
+PHOTO_EXTENSIONS = IMAGE_EXTENSIONS | RAW_EXTENSIONS | VIDEO_EXTENSIONS
 
 # File log stampe (nella stessa cartella del programma)
 PRINT_LOG_FILE = "print_log.json"
 
+# Registro file già importati dalle SD (nella stessa cartella del log stampe)
+IMPORT_LEDGER_FILE = "import_ledger.db"
+
+# Motore di copia: buffer di lettura, hash calcolato durante la copia e manifest
+IMPORT_BUFFER_SIZE = 4 * 1024 * 1024   # 4 MB per lettura
+IMPORT_HASH_ALGORITHM = "blake2b"
+IMPORT_MANIFEST_FILE = "import_manifest.json"  # Scritto nella cartella destinazione
+IMPORT_KERNEL_COPY = True     # Linux: copy_file_range/sendfile (fallback: copia a buffer)
+IMPORT_JOURNAL_FILE = "import_journal.jsonl"   # Journal della sessione (ripresa importazione)
+
+# Concorrenza importazione auto-regolata (thread misurati in MB/s per dispositivo)
+IMPORT_TUNING_FILE = "import_tuning.json"
+IMPORT_DEFAULT_WORKERS = 4     # Valore di partenza per dispositivi mai visti
+IMPORT_MIN_WORKERS = 1
+IMPORT_MAX_WORKERS = 8
+IMPORT_TUNING_WINDOW = 1.0     # Secondi per ogni misura
+IMPORT_TUNING_SECONDS = 8.0    # Durata della fase di regolazione
+IMPORT_PROGRESS_HZ = 15        # Aggiornamenti al secondo della barra di importazione
+IMPORT_FREE_SPACE_MARGIN = 256 * 1024 * 1024  # Spazio da lasciare libero su ogni destinazione
+
 # Configurazione griglia foto
 THUMBNAIL_WIDTH = 300   # Larghezza foto (aspect ratio 3:2 - ORIZZONTALE)
 THUMBNAIL_HEIGHT = 200  # Altezza foto
@@ -19,6 +49,17 @@ GRID_ROWS = 3           # Righe per pagina
 GRID_COLUMNS = 3        # Colonne per pagina
 PHOTOS_PER_PAGE = GRID_ROWS * GRID_COLUMNS  # 9 foto per pagina
 
+# Cache miniature su disco (condivisa tra finestre e tra avvii)
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"
+THUMBNAIL_CACHE_BYTES = 512 * 1024 * 1024   # Budget su disco, oltre si elimina (LRU)
+THUMBNAIL_CACHE_QUALITY = 85                # Qualità JPEG delle miniature
+THUMBNAIL_DECODE_THREADS = 4                # Thread di decodifica miniature (fuori dal thread GUI)
+THUMBNAIL_PREFETCH_PAGES = 2                # Pagine preparate in anticipo per lato (0 = disattivato)
+THUMBNAIL_PREFETCH_BYTES = THUMBNAIL_CACHE_BYTES // 4   # Scritture in cache del prefetch per sessione
+THUMBNAIL_PREFETCH_MIN_FREE_MEMORY = 512 * 1024 * 1024  # Sotto questa RAM libera il prefetch si ferma
+PIXMAP_CACHE_BYTES = 256 * 1024 * 1024      # Budget in RAM delle miniature delle due finestre (LRU)
+PIXMAP_CACHE_TRIM_FRACTION = 0.25           # Quota tenuta in RAM con finestra ridotta a icona
+
 # ===== DESIGN SYSTEM PROFESSIONALE =====
 DESIGN = {
     # Palette colori moderna e professionale
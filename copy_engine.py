@@ -0,0 +1,452 @@
+"""
+SD Card Photo Importer - Copy Engine
+Copia a buffer grandi con hash calcolato durante la stessa lettura e manifest
+"""
+
+import os
+import sys
+import json
+import errno
+import queue
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from collections import Counter
+
+from config import (IMPORT_BUFFER_SIZE, IMPORT_HASH_ALGORITHM, IMPORT_MANIFEST_FILE,
+                    IMPORT_KERNEL_COPY)
+
+
+# Percorsi di copia
+METHOD_COPY_FILE_RANGE = 'copy_file_range'
+METHOD_SENDFILE = 'sendfile'
+METHOD_BUFFERED = 'buffered'
+METHOD_FANOUT = 'fanout'
+
+# Errori che indicano "non supportato qui" (si passa al metodo successivo)
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                       getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+# Metodi già falliti per coppia di dispositivi: non vengono ritentati a ogni file
+_unsupported = set()
+_unsupported_lock = threading.Lock()
+
+
+def _advise_sequential(fd):
+    """Suggerisce al kernel una lettura sequenziale (readahead più aggressivo)"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _preallocate(fd, size):
+    """Prealloca la destinazione (file contiguo, errore di spazio subito)"""
+    if size <= 0:
+        return
+    try:
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, size)
+        elif os.name == 'nt':
+            # NTFS: estendere il file riserva subito i cluster (file non sparse)
+            os.ftruncate(fd, size)
+    except OSError as e:
+        if e.errno == errno.ENOSPC:
+            raise
+        # File system senza fallocate (es. alcuni FUSE/SMB): si prosegue
+
+
+def _kernel_copy(src_fd, dst_fd, size, devices):
+    """
+    Copia lato kernel con copy_file_range, poi sendfile
+
+    Returns:
+        tuple: (metodo usato o None se nessuno è supportato, fallback: bool)
+    """
+    candidates = []
+    if hasattr(os, 'copy_file_range'):
+        candidates.append((METHOD_COPY_FILE_RANGE,
+                           lambda off, n: os.copy_file_range(src_fd, dst_fd, n, off, off)))
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        candidates.append((METHOD_SENDFILE,
+                           lambda off, n: os.sendfile(dst_fd, src_fd, off, n)))
+
+    fell_back = False
+    for method, copy_chunk in candidates:
+        with _unsupported_lock:
+            if (method, devices) in _unsupported:
+                fell_back = True
+                continue
+
+        offset = 0
+        unsupported = False
+        try:
+            while offset < size:
+                copied = copy_chunk(offset, min(size - offset, 1 << 30))
+                if copied == 0:
+                    # 0 byte subito: alcuni filesystem FUSE/pseudo segnalano così
+                    # la chiamata non supportata
+                    unsupported = offset == 0
+                    break
+                offset += copied
+        except OSError as e:
+            if offset > 0 or e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            unsupported = True
+
+        if unsupported:
+            with _unsupported_lock:
+                _unsupported.add((method, devices))
+            fell_back = True
+            continue
+
+        if offset == size:
+            return method, fell_back
+        raise OSError(errno.EIO, f"Copia incompleta ({offset}/{size} byte)")
+
+    return None, fell_back
+
+
+def _write_all(fdst, chunk):
+    """Scrive tutto il blocco (FileIO.write senza buffer può scrivere meno byte)"""
+    view = memoryview(chunk)
+    while view:
+        written = fdst.write(view)
+        if not written:
+            raise OSError(errno.EIO, "Scrittura non riuscita (0 byte scritti)")
+        view = view[written:]
+
+
+def _buffered_copy(fsrc, fdst, buffer_size):
+    """Copia a buffer con hash calcolato sugli stessi byte scritti"""
+    digest = hashlib.new(IMPORT_HASH_ALGORITHM)
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    size = 0
+    while True:
+        n = fsrc.readinto(buf)
+        if not n:
+            break
+        chunk = view[:n]
+        digest.update(chunk)
+        _write_all(fdst, chunk)
+        size += n
+    return size, digest.hexdigest()
+
+
+def copy_with_hash(source_path, dest_path, buffer_size=IMPORT_BUFFER_SIZE,
+                   kernel_copy=IMPORT_KERNEL_COPY, stats=None):
+    """
+    Copia un file e ne calcola l'hash
+
+    Su Linux prova prima la copia lato kernel (copy_file_range/sendfile) e
+    calcola l'hash sulla destinazione appena scritta (già in page cache);
+    altrimenti copia a buffer grandi calcolando l'hash durante la lettura.
+
+    Args:
+        source_path: Percorso file sorgente
+        dest_path: Percorso file destinazione
+        buffer_size: Dimensione del buffer di lettura
+        kernel_copy: Se False usa sempre la copia a buffer
+        stats: ImportStats opzionale in cui registrare il percorso scelto
+
+    Returns:
+        tuple: (size: int, digest: str)
+    """
+    with open(source_path, 'rb', buffering=0) as fsrc, open(dest_path, 'wb', buffering=0) as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        src_stat = os.fstat(src_fd)
+        size = src_stat.st_size
+        _advise_sequential(src_fd)
+        _preallocate(dst_fd, size)
+
+        method, fell_back = None, False
+        if kernel_copy and size > 0:
+            devices = (src_stat.st_dev, os.fstat(dst_fd).st_dev)
+            method, fell_back = _kernel_copy(src_fd, dst_fd, size, devices)
+
+        if method is None:
+            size, digest = _buffered_copy(fsrc, fdst, buffer_size)
+            method = METHOD_BUFFERED
+            if size != src_stat.st_size:
+                # Sorgente cambiata durante la copia: niente coda preallocata
+                os.ftruncate(dst_fd, size)
+
+    if method != METHOD_BUFFERED:
+        digest = hash_file(dest_path, buffer_size)
+
+    shutil.copystat(source_path, dest_path)
+    if stats is not None:
+        stats.record(os.path.basename(dest_path), method, size, fell_back)
+    return size, digest
+
+
+class _DestinationWriter(threading.Thread):
+    """
+    Scrive una destinazione del fan-out.
+
+    Non calcola un hash proprio: riceverebbe gli stessi blocchi già passati
+    nell'hash della sorgente e il confronto non potrebbe mai fallire. La
+    verifica è sui byte scritti, sulla dimensione finale del file e sugli
+    errori di scrittura, compresi quelli segnalati solo in chiusura.
+    """
+
+    # Buffer in coda per destinazione: la lettura avanza al passo dello scrittore più lento
+    QUEUE_CHUNKS = 4
+
+    def __init__(self, dest_path, size):
+        super().__init__(daemon=True)
+        self.dest_path = dest_path
+        self.size = size
+        self.written = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=self.QUEUE_CHUNKS)
+
+    def put(self, chunk):
+        self._queue.put(chunk)
+
+    def finish(self):
+        self._queue.put(None)
+        self.join()
+
+    def run(self):
+        try:
+            fdst = open(self.dest_path, 'wb', buffering=0)
+        except OSError as e:
+            self.error = e
+            fdst = None
+
+        try:
+            if fdst is not None:
+                try:
+                    _preallocate(fdst.fileno(), self.size)
+                except OSError as e:
+                    self.error = e
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    break
+                if self.error is not None:
+                    continue  # continua a svuotare la coda per non bloccare il lettore
+                try:
+                    _write_all(fdst, chunk)
+                    self.written += len(chunk)
+                except OSError as e:
+                    self.error = e
+            if self.error is None:
+                if self.written != self.size:
+                    os.ftruncate(fdst.fileno(), self.written)
+                if os.fstat(fdst.fileno()).st_size != self.written:
+                    self.error = OSError(errno.EIO, f"Dimensione errata: {self.dest_path}")
+        except OSError as e:
+            self.error = e
+        finally:
+            if fdst is not None:
+                try:
+                    fdst.close()
+                except OSError as e:
+                    # Errori di scrittura differiti (es. SMB, spazio esaurito)
+                    if self.error is None:
+                        self.error = e
+
+
+def copy_with_hash_multi(source_path, dest_paths, buffer_size=IMPORT_BUFFER_SIZE, stats=None):
+    """
+    Copia un file su più destinazioni leggendo la sorgente una sola volta
+
+    Ogni destinazione ha il suo thread di scrittura; la velocità complessiva
+    è quella dello scrittore più lento. L'hash è calcolato una volta sulla
+    sorgente e vale per tutte le destinazioni, che vengono verificate per
+    dimensione ed errori di scrittura (vedi _DestinationWriter).
+
+    Args:
+        source_path: Percorso file sorgente
+        dest_paths: Percorsi destinazione (primaria + backup)
+        buffer_size: Dimensione del buffer di lettura
+        stats: ImportStats opzionale
+
+    Returns:
+        tuple: (size: int, digest: str) della sorgente
+
+    Raises:
+        OSError: Se una destinazione non è stata scritta o verificata
+    """
+    if len(dest_paths) == 1:
+        return copy_with_hash(source_path, dest_paths[0], buffer_size, stats=stats)
+
+    source_digest = hashlib.new(IMPORT_HASH_ALGORITHM)
+    size = 0
+    with open(source_path, 'rb', buffering=0) as fsrc:
+        expected = os.fstat(fsrc.fileno()).st_size
+        _advise_sequential(fsrc.fileno())
+
+        writers = [_DestinationWriter(dest_path, expected) for dest_path in dest_paths]
+        for writer in writers:
+            writer.start()
+        try:
+            while True:
+                # bytes immutabili: lo stesso blocco è condiviso da tutti gli scrittori
+                chunk = fsrc.read(buffer_size)
+                if not chunk:
+                    break
+                source_digest.update(chunk)
+                size += len(chunk)
+                for writer in writers:
+                    writer.put(chunk)
+        finally:
+            for writer in writers:
+                writer.finish()
+
+    digest = source_digest.hexdigest()
+    for writer in writers:
+        if writer.error is not None:
+            raise writer.error
+        if writer.written != size:
+            raise OSError(errno.EIO, f"Verifica fallita per {writer.dest_path}")
+        shutil.copystat(source_path, writer.dest_path)
+
+    if stats is not None:
+        stats.record(os.path.basename(dest_paths[0]), METHOD_FANOUT, size)
+    return size, digest
+
+
+def hash_file(path, buffer_size=IMPORT_BUFFER_SIZE):
+    """
+    Calcola l'hash di un file con lo stesso algoritmo del motore di copia
+
+    Returns:
+        str: Digest esadecimale
+    """
+    digest = hashlib.new(IMPORT_HASH_ALGORITHM)
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class ImportStats:
+    """Statistiche di un'importazione: percorso di copia per file, byte, fallback"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files_by_method = Counter()
+        self.bytes_by_method = Counter()
+        self.fallbacks = 0
+        self.method_per_file = {}   # {nome file destinazione: metodo}
+        self.workers = None         # Thread scelti dallo scheduler
+        self.mb_s = 0.0             # Throughput medio
+
+    def record(self, filename, method, size, fell_back=False):
+        """Registra il percorso usato per un file"""
+        with self._lock:
+            self.files_by_method[method] += 1
+            self.bytes_by_method[method] += size
+            self.method_per_file[filename] = method
+            if fell_back:
+                self.fallbacks += 1
+
+    def summary(self):
+        """Riepilogo testuale (es. per status bar/log)"""
+        with self._lock:
+            parts = [f"{method}: {count} file" for method, count in self.files_by_method.most_common()]
+            if self.fallbacks:
+                parts.append(f"fallback: {self.fallbacks}")
+            if self.workers:
+                parts.append(f"{self.workers} thread, {self.mb_s:.1f} MB/s")
+        return " | ".join(parts)
+
+
+class ImportManifest:
+    """
+    Manifest di una cartella importata: file, dimensione e hash di ogni copia.
+
+    Viene scritto nella cartella destinazione e permette di verificare
+    l'importazione senza rileggere la scheda SD.
+    """
+
+    def __init__(self, dest_folder, entries=None):
+        self.dest_folder = dest_folder
+        self.algorithm = IMPORT_HASH_ALGORITHM
+        self._entries = dict(entries or {})  # {nome file destinazione: entry}
+        self._sources = {entry['source']: entry for entry in self._entries.values()}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def path(self):
+        return os.path.join(self.dest_folder, IMPORT_MANIFEST_FILE)
+
+    def add(self, source_path, dest_path, size, digest):
+        """Registra un file copiato"""
+        entry = {
+            'file': os.path.basename(dest_path),
+            'source': source_path,
+            'size': size,
+            'hash': digest,
+        }
+        with self._lock:
+            self._entries[entry['file']] = entry
+            self._sources[source_path] = entry
+
+    def entries(self):
+        """Lista delle voci del manifest"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def get(self, dest_name):
+        """Voce per nome file destinazione (None se assente)"""
+        with self._lock:
+            return self._entries.get(dest_name)
+
+    def get_by_source(self, source_path):
+        """Voce per percorso sorgente (None se assente)"""
+        with self._lock:
+            return self._sources.get(source_path)
+
+    def save(self):
+        """Scrive il manifest in modo atomico (file temporaneo + rename)"""
+        data = {
+            'algorithm': self.algorithm,
+            'updated': datetime.now().isoformat(),
+            'files': sorted(self.entries(), key=lambda e: e['file']),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, dest_folder):
+        """
+        Carica il manifest di una cartella
+
+        Returns:
+            ImportManifest or None: None se la cartella non ha manifest valido
+        """
+        path = os.path.join(dest_folder, IMPORT_MANIFEST_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('algorithm') != IMPORT_HASH_ALGORITHM:
+            return None
+
+        return cls(dest_folder, {entry['file']: entry for entry in data.get('files', [])})
+
+    @classmethod
+    def load_or_create(cls, dest_folder):
+        """Carica il manifest esistente o ne crea uno vuoto"""
+        manifest = cls.load(dest_folder)
+        return manifest if manifest is not None else cls(dest_folder)
@@ -0,0 +1,241 @@
+"""
+SD Card Photo Importer - Embedded Preview
+Lettura delle anteprime JPEG incorporate (miniatura EXIF, anteprima dei RAW)
+senza decodificare la foto
+"""
+
+import os
+import struct
+
+from config import RAW_EXTENSIONS
+
+
+# Tag TIFF/EXIF usati
+TAG_COMPRESSION = 0x0103
+TAG_STRIP_OFFSETS = 0x0111
+TAG_STRIP_BYTE_COUNTS = 0x0117
+TAG_SUB_IFDS = 0x014A
+TAG_JPEG_OFFSET = 0x0201    # JPEGInterchangeFormat
+TAG_JPEG_LENGTH = 0x0202    # JPEGInterchangeFormatLength
+
+# Compressioni TIFF che indicano dati JPEG
+_JPEG_COMPRESSIONS = (6, 7)
+
+# Marker SOF decodificabili dai decoder comuni (baseline, extended, progressive);
+# SOF3 (lossless) è il formato dei dati RAW di CR2/DNG, non un'anteprima
+_VIEWABLE_SOF = (0xC0, 0xC1, 0xC2)
+
+# Dimensione massima di un segmento APP1 (la miniatura EXIF sta tutta lì)
+_APP1_MAX = 0xFFFF
+
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4}
+
+
+class TiffReader:
+    """
+    Lettore minimale di IFD TIFF (header EXIF in memoria o file RAW aperto).
+
+    Con un file vengono letti solo gli IFD, con seek: pochi KB anche per
+    RAW da decine di MB.
+    """
+
+    def __init__(self, source, base=0):
+        self.source = source              # bytes oppure file binario aperto
+        self.base = base                  # offset dell'header TIFF nella sorgente
+        header = self._read(base, 8)
+        order = header[:2]
+        if order == b'II':
+            self.endian = '<'
+        elif order == b'MM':
+            self.endian = '>'
+        else:
+            raise ValueError("Header TIFF non valido")
+        magic, self.first_ifd = struct.unpack_from(self.endian + 'HI', header, 2)
+        if magic not in (42, 0x4F52, 0x5352):   # TIFF, ORF
+            raise ValueError("Header TIFF non valido")
+
+    def _read(self, pos, size):
+        if isinstance(self.source, (bytes, bytearray)):
+            data = self.source[pos:pos + size]
+        else:
+            self.source.seek(pos)
+            data = self.source.read(size)
+        if len(data) < size:
+            raise struct.error("Dati TIFF troncati")
+        return data
+
+    def read(self, offset, size):
+        """Byte a un offset relativo all'header TIFF"""
+        return self._read(self.base + offset, size)
+
+    def read_ifd(self, offset):
+        """
+        Legge un IFD
+
+        Returns:
+            tuple: ({tag: valore o lista di valori}, offset IFD successivo)
+        """
+        pos = self.base + offset
+        count, = struct.unpack(self.endian + 'H', self._read(pos, 2))
+        entries = self._read(pos + 2, count * 12 + 4)
+        tags = {}
+        for i in range(count):
+            tag, typ, n = struct.unpack_from(self.endian + 'HHI', entries, i * 12)
+            size = _TYPE_SIZES.get(typ, 1) * n
+            if typ not in (3, 4, 13) or n == 0 or n > 4096:
+                continue        # servono solo valori interi (offset, lunghezze, tipi)
+            if size <= 4:
+                raw = entries[i * 12 + 8:i * 12 + 8 + size]
+            else:
+                value_offset, = struct.unpack_from(self.endian + 'I', entries, i * 12 + 8)
+                try:
+                    raw = self.read(value_offset, size)
+                except struct.error:
+                    continue
+            fmt = 'H' if typ == 3 else 'I'
+            values = struct.unpack(f"{self.endian}{n}{fmt}", raw)
+            tags[tag] = values[0] if n == 1 else list(values)
+        next_ifd, = struct.unpack_from(self.endian + 'I', entries, count * 12)
+        return tags, next_ifd
+
+    def ifd_chain(self, offset=None, limit=16):
+        """IFD della catena principale (IFD0, IFD1, ...)"""
+        offset = self.first_ifd if offset is None else offset
+        seen = set()
+        while offset and offset not in seen and len(seen) < limit:
+            seen.add(offset)
+            try:
+                tags, offset = self.read_ifd(offset)
+            except struct.error:
+                return
+            yield tags
+
+
+def _find_exif_segment(data):
+    """Offset dell'header TIFF nel segmento APP1 "Exif" di un JPEG (None se assente)"""
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker in (0xDA, 0xD9):     # inizio dati immagine: niente più metadati
+            return None
+        length, = struct.unpack_from('>H', data, pos + 2)
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return pos + 10
+        pos += 2 + length
+    return None
+
+
+def exif_thumbnail(path):
+    """
+    Miniatura JPEG incorporata nell'EXIF di una foto (tipicamente 160x120)
+
+    Legge solo l'inizio del file (pochi KB): nessuna decodifica della foto.
+
+    Returns:
+        bytes or None: JPEG della miniatura, None se assente
+    """
+    with open(path, 'rb') as f:
+        data = f.read(_APP1_MAX + 4096)
+
+    tiff_base = _find_exif_segment(data)
+    if tiff_base is None:
+        return None
+    try:
+        reader = TiffReader(data, tiff_base)
+        for tags in reader.ifd_chain():
+            offset, length = tags.get(TAG_JPEG_OFFSET), tags.get(TAG_JPEG_LENGTH)
+            if isinstance(offset, int) and isinstance(length, int) and length > 0:
+                start = tiff_base + offset
+                thumb = data[start:start + length]
+                if len(thumb) == length and thumb[:2] == b'\xff\xd8':
+                    return thumb
+    except (ValueError, struct.error):
+        return None
+    return None
+
+
+def _sof_marker(header):
+    """Primo marker SOF di un JPEG (None se non trovato nei byte letti)"""
+    if header[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 4 <= len(header):
+        if header[pos] != 0xFF:
+            return None
+        marker = header[pos + 1]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return marker
+        if marker == 0xDA:
+            return None
+        length, = struct.unpack_from('>H', header, pos + 2)
+        pos += 2 + length
+    return None
+
+
+def _jpeg_candidates(tags):
+    """Coppie (offset, lunghezza) di dati JPEG indicate da un IFD"""
+    offset, length = tags.get(TAG_JPEG_OFFSET), tags.get(TAG_JPEG_LENGTH)
+    if isinstance(offset, int) and isinstance(length, int) and length > 0:
+        yield offset, length
+    if tags.get(TAG_COMPRESSION) in _JPEG_COMPRESSIONS:
+        offset, length = tags.get(TAG_STRIP_OFFSETS), tags.get(TAG_STRIP_BYTE_COUNTS)
+        if isinstance(offset, int) and isinstance(length, int) and length > 0:
+            yield offset, length
+
+
+def is_raw_file(path):
+    """True se l'estensione è di un file RAW"""
+    return os.path.splitext(path)[1].lower() in RAW_EXTENSIONS
+
+
+def raw_preview(path):
+    """
+    Anteprima JPEG più grande incorporata in un RAW basato su TIFF (CR2, NEF, ARW, DNG)
+
+    Visita la catena di IFD e i SubIFD, scarta i dati RAW in JPEG lossless e
+    restituisce l'anteprima più grande: nessun demosaicing, si leggono solo
+    gli IFD e l'anteprima scelta.
+
+    Returns:
+        bytes or None: JPEG dell'anteprima, None se non trovata
+    """
+    with open(path, 'rb') as f:
+        try:
+            reader = TiffReader(f)
+            candidates = []
+            pending = list(reader.ifd_chain())
+            visited = 0
+            while pending and visited < 32:
+                tags = pending.pop()
+                visited += 1
+                candidates.extend(_jpeg_candidates(tags))
+                sub_ifds = tags.get(TAG_SUB_IFDS)
+                if isinstance(sub_ifds, int):
+                    sub_ifds = [sub_ifds]
+                for offset in sub_ifds or ():
+                    try:
+                        pending.append(reader.read_ifd(offset)[0])
+                    except struct.error:
+                        continue
+        except (ValueError, struct.error):
+            return None
+
+        best = None
+        for offset, length in sorted(set(candidates), key=lambda c: c[1], reverse=True):
+            try:
+                header = reader.read(offset, min(length, 65536))
+            except struct.error:
+                continue
+            if _sof_marker(header) in _VIEWABLE_SOF:
+                best = (offset, length)
+                break
+        if best is None:
+            return None
+        try:
+            return reader.read(*best)
+        except struct.error:
+            return None
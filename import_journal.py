@@ -0,0 +1,325 @@
+"""
+SD Card Photo Importer - Import Journal
+Journal su disco di una sessione di importazione (pianificati, in corso, completati)
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from config import DESTINATION_BASE, IMPORT_JOURNAL_FILE
+
+
+# Eventi del journal (una riga JSON per evento)
+EVENT_SESSION = 'session'
+EVENT_PLANNED = 'planned'
+EVENT_STARTED = 'started'
+EVENT_DONE = 'done'
+EVENT_FAILED = 'failed'
+EVENT_COMPLETE = 'complete'
+
+
+def volume_id(path):
+    """
+    Identificativo del volume di un percorso
+
+    Su Windows st_dev è il numero di serie del volume (stabile tra un
+    inserimento e l'altro); altrove è il numero del dispositivo, uguale per
+    qualsiasi SD nello stesso lettore, quindi non viene usato.
+
+    Returns:
+        int or None: Numero di serie del volume, None se non disponibile
+    """
+    if os.name != 'nt':
+        return None
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+class ImportJournal:
+    """
+    Journal append-only di una sessione di importazione.
+
+    Ogni file passa per planned → started → done. Un file "started" senza
+    "done" è una copia interrotta: alla ripresa la destinazione parziale
+    viene cancellata e il file ricopiato nella stessa cartella. Le cartelle
+    di backup della sessione e i nomi dei file in ciascuna sono registrati
+    con la cartella primaria, così la ripresa completa anche i backup.
+    """
+
+    def __init__(self, dest_folder):
+        self.dest_folder = dest_folder
+        self.source_root = None
+        self.volume = None    # numero di serie della SD (solo Windows)
+        self.backup_folders = []
+        self.created = None
+        self.planned = {}     # {sorgente: dimensione}
+        self.started = {}     # {sorgente: nome destinazione}
+        self.backup_names = {}  # {sorgente: [nome in ogni cartella di backup]}
+        self.done = {}        # {sorgente: {'file', 'size', 'hash', 'backups'}}
+        self.complete = False
+        self._lock = threading.Lock()
+        self._file = None
+
+    @property
+    def path(self):
+        return os.path.join(self.dest_folder, IMPORT_JOURNAL_FILE)
+
+    @classmethod
+    def create(cls, dest_folder, source_root, backup_folders=()):
+        """Nuova sessione nella cartella destinazione (con le sue cartelle di backup)"""
+        journal = cls(dest_folder)
+        journal.source_root = source_root
+        journal.created = datetime.now().isoformat()
+        journal._write({'event': EVENT_SESSION, 'source_root': source_root,
+                        'volume': volume_id(source_root) if source_root else None,
+                        'backups': list(backup_folders), 'created': journal.created})
+        return journal
+
+    @classmethod
+    def load(cls, dest_folder):
+        """
+        Rilegge il journal di una cartella
+
+        Returns:
+            ImportJournal or None: None se la cartella non ha journal
+        """
+        journal = cls(dest_folder)
+        try:
+            f = open(journal.path, 'r', encoding='utf-8')
+        except OSError:
+            return None
+
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Ultima riga troncata da una chiusura improvvisa
+                    continue
+                journal._apply(record)
+        return journal
+
+    def _apply(self, record):
+        event = record.get('event')
+        source = record.get('source')
+        if event == EVENT_SESSION:
+            self.source_root = record.get('source_root')
+            self.volume = record.get('volume')
+            self.backup_folders = record.get('backups') or []
+            self.created = record.get('created')
+        elif event == EVENT_PLANNED:
+            self.planned[source] = record.get('size')
+            self.complete = False
+        elif event == EVENT_STARTED:
+            self.started[source] = record.get('file')
+            self.backup_names[source] = record.get('backups') or []
+            self.done.pop(source, None)
+        elif event == EVENT_DONE:
+            self.done[source] = {'file': record['file'], 'size': record['size'],
+                                 'hash': record.get('hash'), 'backups': record.get('backups') or []}
+        elif event == EVENT_FAILED:
+            # I nomi restano noti: alla ripresa un eventuale residuo viene cancellato
+            if record.get('file'):
+                self.started[source] = record['file']
+                self.backup_names[source] = record.get('backups') or []
+            else:
+                self.started.pop(source, None)
+                self.backup_names.pop(source, None)
+        elif event == EVENT_COMPLETE:
+            self.complete = True
+
+    def _write(self, *records):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+            for record in records:
+                self._apply(record)
+
+    def close(self):
+        """Chiude il file del journal"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ===== Eventi =====
+
+    def plan(self, files):
+        """Registra i file pianificati (quelli già pianificati vengono ignorati)"""
+        records = []
+        for item in files:
+            source = getattr(item, 'path', item)
+            if source not in self.planned:
+                size = getattr(item, 'size', None)
+                if size is None:
+                    # Dimensione necessaria per riconoscere la SD alla ripresa
+                    try:
+                        size = os.path.getsize(source)
+                    except OSError:
+                        pass
+                records.append({'event': EVENT_PLANNED, 'source': source, 'size': size})
+        if records:
+            self._write(*records)
+
+    def mark_started(self, source, dest_path, backup_paths=()):
+        self._write({'event': EVENT_STARTED, 'source': source,
+                     'file': os.path.basename(dest_path),
+                     'backups': [os.path.basename(path) for path in backup_paths]})
+
+    def mark_done(self, source, dest_path, size, digest, backup_paths=()):
+        self._write({'event': EVENT_DONE, 'source': source,
+                     'file': os.path.basename(dest_path), 'size': size, 'hash': digest,
+                     'backups': [os.path.basename(path) for path in backup_paths]})
+
+    def mark_failed(self, source, error, dest_path=None, backup_paths=()):
+        self._write({'event': EVENT_FAILED, 'source': source, 'error': error,
+                     'file': os.path.basename(dest_path) if dest_path else None,
+                     'backups': [os.path.basename(path) for path in backup_paths]})
+
+    def mark_complete(self):
+        self._write({'event': EVENT_COMPLETE, 'finished': datetime.now().isoformat()})
+
+    # ===== Ripresa =====
+
+    def check_source(self):
+        """
+        Verifica che la SD inserita sia quella della sessione
+
+        Con una lettera di unità fissa qualsiasi SD ha la stessa radice e gli
+        stessi nomi (DCIM/100XXXXX/IMG_0001.JPG): oltre al volume (se
+        registrato) si confrontano le dimensioni dei file pianificati con
+        quelle presenti ora sulla SD.
+
+        Returns:
+            tuple: (ok: bool, message: str)
+        """
+        if not self.source_root or not os.path.isdir(self.source_root):
+            return False, f"SD della sessione non trovata ({self.source_root})"
+        if self.volume is not None and volume_id(self.source_root) != self.volume:
+            return False, "La SD inserita non è quella dell'importazione interrotta"
+
+        found = 0
+        for source, size in self.planned.items():
+            try:
+                current = os.path.getsize(source)
+            except OSError:
+                if source in self.done:
+                    continue      # già copiato (e magari spostato in modalità taglia)
+                return False, f"File della sessione non presente sulla SD: {source}"
+            if size is not None and current != size:
+                return False, f"La SD inserita non è quella dell'importazione interrotta ({source})"
+            found += 1
+        if not found:
+            return False, "Nessun file della sessione presente sulla SD"
+        return True, "SD della sessione"
+
+    def _copies(self, name, backup_names):
+        """Percorsi delle copie di un file: cartella primaria, poi i backup"""
+        if not name:
+            return []
+        copies = [os.path.join(self.dest_folder, name)]
+        copies += [os.path.join(folder, backup_name)
+                   for folder, backup_name in zip(self.backup_folders, backup_names)
+                   if backup_name]
+        return copies
+
+    def prepare_resume(self):
+        """
+        Prepara la ripresa: cancella le copie parziali e ricontrolla i completati
+
+        Un completato con una copia mancante o di dimensione diversa (nella
+        primaria o in un backup) viene rifatto su tutte le destinazioni: le
+        sue altre copie vengono tolte, così non restano doppioni.
+
+        Returns:
+            list: Percorsi sorgente ancora da copiare
+        """
+        # Copie interrotte o fallite: destinazioni parziali da rifare
+        done_copies = set()
+        for entry in self.done.values():
+            done_copies.update(self._copies(entry['file'], entry['backups']))
+        for source, name in list(self.started.items()):
+            if source in self.done:
+                continue
+            for partial in self._copies(name, self.backup_names.get(source, ())):
+                if partial in done_copies:
+                    continue
+                try:
+                    os.remove(partial)
+                except FileNotFoundError:
+                    pass
+
+        # Completati con una destinazione mancante o di dimensione diversa
+        for source, entry in list(self.done.items()):
+            copies = self._copies(entry['file'], entry['backups'])
+            ok = True
+            for path in copies:
+                try:
+                    ok = ok and os.path.getsize(path) == entry['size']
+                except OSError:
+                    ok = False
+            if ok:
+                continue
+            del self.done[source]
+            if os.path.exists(source):
+                for path in copies:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+        return [source for source in self.planned if source not in self.done]
+
+    def is_finished(self):
+        """True se tutti i file pianificati risultano copiati"""
+        return all(source in self.done for source in self.planned)
+
+
+def _ends_with_complete(path):
+    """Controllo rapido sull'ultima riga, senza rileggere tutto il journal"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 256, 0))
+            last_line = f.read().rstrip().rsplit(b"\n", 1)[-1]
+        return json.loads(last_line).get('event') == EVENT_COMPLETE
+    except (OSError, ValueError):
+        return False
+
+
+def find_incomplete_sessions(base_folder=DESTINATION_BASE):
+    """
+    Cerca sessioni di importazione interrotte (BASE/<data>/<n>)
+
+    Returns:
+        list: ImportJournal non completati, dal più recente
+    """
+    sessions = []
+    try:
+        date_dirs = [e for e in os.scandir(base_folder) if e.is_dir()]
+    except OSError:
+        return sessions
+
+    for date_dir in date_dirs:
+        try:
+            session_dirs = [e for e in os.scandir(date_dir.path) if e.is_dir()]
+        except OSError:
+            continue
+        for session_dir in session_dirs:
+            path = os.path.join(session_dir.path, IMPORT_JOURNAL_FILE)
+            if not os.path.exists(path) or _ends_with_complete(path):
+                continue
+            journal = ImportJournal.load(session_dir.path)
+            # Sessioni senza file pianificati (es. preflight fallito): niente da riprendere
+            if journal is not None and not journal.complete and journal.planned:
+                sessions.append(journal)
+
+    sessions.sort(key=lambda j: j.created or "", reverse=True)
+    return sessions
@@ -0,0 +1,112 @@
+"""
+SD Card Photo Importer - Import Ledger
+Registro persistente (SQLite) dei file già importati dalle schede SD
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import IMPORT_LEDGER_FILE
+
+
+def file_identity(item):
+    """
+    Identità di un file della scheda: (nome, dimensione, mtime in secondi)
+
+    Args:
+        item: ScannedFile dello scanner oppure percorso del file
+
+    Returns:
+        tuple: (name: str, size: int, mtime: int)
+    """
+    if isinstance(item, str):
+        st = os.stat(item)
+        return os.path.basename(item), st.st_size, int(st.st_mtime)
+    return item.name, item.size, int(item.mtime)
+
+
+class ImportLedger:
+    """Registro dei file importati, condiviso tra sessioni"""
+
+    # Limite parametri per query IN (SQLite)
+    _CHUNK = 500
+
+    def __init__(self, db_path=IMPORT_LEDGER_FILE):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS imported (
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    content_hash TEXT,
+                    dest_folder TEXT,
+                    imported_at TEXT,
+                    PRIMARY KEY (name, size, mtime)
+                )
+            """)
+
+    def close(self):
+        """Chiude il database"""
+        with self._lock:
+            self._conn.close()
+
+    def _known_identities(self, identities):
+        """Sottoinsieme di identità già presenti nel registro"""
+        names = sorted({identity[0] for identity in identities})
+        known = set()
+        with self._lock:
+            for i in range(0, len(names), self._CHUNK):
+                chunk = names[i:i + self._CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT name, size, mtime FROM imported WHERE name IN ({placeholders})",
+                    chunk)
+                known.update(rows)
+        return known
+
+    def filter_new(self, files):
+        """
+        Filtra i file mai importati prima
+
+        Args:
+            files: Lista di ScannedFile o percorsi
+
+        Returns:
+            list: File non presenti nel registro (stesso ordine)
+        """
+        identities = []
+        for item in files:
+            try:
+                identities.append(file_identity(item))
+            except OSError:
+                identities.append(None)
+
+        known = self._known_identities([i for i in identities if i is not None])
+        return [item for item, identity in zip(files, identities)
+                if identity is None or identity not in known]
+
+    def count_new(self, files):
+        """Numero di file mai importati prima"""
+        return len(self.filter_new(files))
+
+    def record(self, identity, dest_folder, content_hash=None):
+        """
+        Registra un file importato
+
+        Args:
+            identity: Tupla restituita da file_identity
+            dest_folder: Cartella in cui il file è stato importato
+            content_hash: Hash del contenuto (opzionale)
+        """
+        name, size, mtime = identity
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO imported VALUES (?, ?, ?, ?, ?, ?)",
+                (name, size, mtime, content_hash, dest_folder, datetime.now().isoformat()))
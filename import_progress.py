@@ -0,0 +1,136 @@
+"""
+SD Card Photo Importer - Import Progress
+Avanzamento importazione aggregato: i thread registrano, l'interfaccia legge a frequenza fissa
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """Esito di un singolo file importato"""
+    source: str
+    filename: str
+    success: bool
+    error: str = None
+    size: int = 0
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Stato dell'importazione in un istante"""
+    completed: int
+    errors: int
+    total: int
+    bytes_done: int
+    total_bytes: int
+    current_file: str
+    elapsed: float
+    mb_s: float
+    files_s: float
+    eta: float          # secondi stimati alla fine (None se non stimabile)
+
+    @property
+    def processed(self):
+        return self.completed + self.errors
+
+    @property
+    def percent(self):
+        if self.total_bytes:
+            return 100.0 * self.bytes_done / self.total_bytes
+        return 100.0 * self.processed / self.total if self.total else 0.0
+
+    def format_eta(self):
+        """ETA leggibile (es. "1:05")"""
+        if self.eta is None:
+            return "--:--"
+        minutes, seconds = divmod(int(self.eta + 0.5), 60)
+        return f"{minutes}:{seconds:02d}"
+
+
+class ProgressAggregator:
+    """
+    Raccoglie gli esiti per file dai thread di importazione.
+
+    record() costa un lock e un append: nessun segnale per file. Chi
+    visualizza chiama poll() a frequenza fissa (es. 15 Hz) e riceve uno
+    snapshot solo se qualcosa è cambiato. Tutti gli esiti restano in
+    results per il report finale.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.results = []           # [FileResult] in ordine di completamento
+        self.total = 0
+        self.total_bytes = 0
+        self._completed = 0
+        self._errors = 0
+        self._bytes_done = 0
+        self._current_file = ""
+        self._start = None
+        self._version = 0
+        self._polled_version = -1
+
+    def start(self, total, total_bytes=0):
+        """Inizio (o ripresa) di un batch di total file"""
+        with self._lock:
+            self.total = total
+            self.total_bytes = total_bytes
+            if self._start is None:
+                self._start = time.monotonic()
+            self._version += 1
+
+    def record(self, source, filename, success, error=None, size=0):
+        """Registra l'esito di un file (chiamato dai thread di importazione)"""
+        result = FileResult(source, filename, success, error, size)
+        with self._lock:
+            self.results.append(result)
+            if success:
+                self._completed += 1
+            else:
+                self._errors += 1
+            self._bytes_done += size
+            self._current_file = filename
+            self._version += 1
+
+    def snapshot(self):
+        """
+        Stato corrente con throughput e ETA
+
+        Returns:
+            ProgressSnapshot: Stato dell'importazione
+        """
+        with self._lock:
+            completed, errors = self._completed, self._errors
+            bytes_done, current_file = self._bytes_done, self._current_file
+            total, total_bytes = self.total, self.total_bytes
+            start = self._start
+
+        elapsed = time.monotonic() - start if start is not None else 0.0
+        mb_s = bytes_done / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        files_s = (completed + errors) / elapsed if elapsed > 0 else 0.0
+
+        eta = None
+        if total_bytes and bytes_done:
+            eta = (total_bytes - bytes_done) / (bytes_done / elapsed)
+        elif files_s > 0:
+            eta = (total - completed - errors) / files_s
+
+        return ProgressSnapshot(completed, errors, total, bytes_done, total_bytes,
+                                current_file, elapsed, mb_s, files_s,
+                                max(eta, 0.0) if eta is not None else None)
+
+    def poll(self):
+        """
+        Snapshot solo se è cambiato qualcosa dall'ultimo poll
+
+        Returns:
+            ProgressSnapshot or None: None se non ci sono novità
+        """
+        with self._lock:
+            if self._version == self._polled_version:
+                return None
+            self._polled_version = self._version
+        return self.snapshot()
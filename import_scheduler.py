@@ -0,0 +1,229 @@
+"""
+SD Card Photo Importer - Import Scheduler
+Concorrenza di importazione auto-regolata per dispositivo (MB/s misurati)
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+
+from config import (IMPORT_TUNING_FILE, IMPORT_MIN_WORKERS, IMPORT_MAX_WORKERS,
+                    IMPORT_DEFAULT_WORKERS, IMPORT_TUNING_WINDOW, IMPORT_TUNING_SECONDS)
+
+
+_tuning_lock = threading.Lock()
+
+
+def device_key(source_path, dest_path):
+    """
+    Chiave della coppia di dispositivi sorgente → destinazione
+
+    Su Windows st_dev è il numero di serie del volume, quindi la stessa
+    scheda viene riconosciuta anche se cambia lettera di unità.
+    """
+    try:
+        return f"{os.stat(source_path).st_dev}->{os.stat(dest_path).st_dev}"
+    except OSError:
+        return None
+
+
+def load_tuning():
+    """Impostazioni salvate {chiave dispositivo: {'workers': n, 'mb_s': x}}"""
+    try:
+        with open(IMPORT_TUNING_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_tuning(key, workers, mb_s):
+    """Salva il numero di thread migliore per un dispositivo"""
+    with _tuning_lock:
+        data = load_tuning()
+        data[key] = {'workers': workers, 'mb_s': round(mb_s, 2)}
+        tmp_path = IMPORT_TUNING_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, IMPORT_TUNING_FILE)
+
+
+class AdaptiveScheduler:
+    """
+    Esegue i task di importazione con un numero di thread attivi variabile.
+
+    Nei primi secondi misura i MB/s per finestre di tempo e sale/scende di un
+    thread alla volta (hill climbing), poi si ferma sul valore migliore e lo
+    ricorda per il dispositivo. Con min_workers == max_workers il numero di
+    thread è fisso e non viene misurato nulla.
+    """
+
+    # Miglioramento minimo per considerare un passo utile
+    IMPROVEMENT = 1.05
+
+    def __init__(self, key=None, initial=None, min_workers=IMPORT_MIN_WORKERS,
+                 max_workers=IMPORT_MAX_WORKERS, window=IMPORT_TUNING_WINDOW,
+                 tuning_seconds=IMPORT_TUNING_SECONDS):
+        self.key = key
+        self.min_workers = min_workers
+        self.max_workers = max(min_workers, max_workers)
+        self.window = window
+        self.tuning_seconds = tuning_seconds
+
+        if initial is None:
+            saved = load_tuning().get(key) if key else None
+            initial = saved['workers'] if saved else IMPORT_DEFAULT_WORKERS
+        self.target = min(max(initial, self.min_workers), self.max_workers)
+
+        self.samples = {}          # {thread attivi: MB/s}
+        self.direction = 1
+        self.settled = self.min_workers == self.max_workers
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._window_bytes = 0
+        self._window_start = None
+        self._start = None
+        self._total_bytes = 0
+
+    @classmethod
+    def for_paths(cls, source_path, dest_path):
+        """Scheduler per la coppia di dispositivi, con l'ultima impostazione salvata"""
+        return cls(key=device_key(source_path, dest_path))
+
+    @classmethod
+    def fixed(cls, workers):
+        """Scheduler a numero di thread fisso"""
+        return cls(initial=workers, min_workers=workers, max_workers=workers)
+
+    @property
+    def best_workers(self):
+        if not self.samples:
+            return self.target
+        return max(self.samples, key=self.samples.get)
+
+    @property
+    def throughput(self):
+        """MB/s medi dall'inizio dell'esecuzione"""
+        if self._start is None:
+            return 0.0
+        elapsed = max(time.monotonic() - self._start, 1e-6)
+        return self._total_bytes / elapsed / (1024 * 1024)
+
+    def _acquire(self):
+        with self._cond:
+            while self._active >= self.target:
+                self._cond.wait()
+            self._active += 1
+
+    def _release(self, nbytes):
+        with self._cond:
+            self._active -= 1
+            self._total_bytes += nbytes
+            self._window_bytes += nbytes
+            now = time.monotonic()
+            if not self.settled and now - self._window_start >= self.window:
+                rate = self._window_bytes / (now - self._window_start) / (1024 * 1024)
+                self._adjust(rate, now)
+                self._window_bytes = 0
+                self._window_start = now
+            self._cond.notify_all()
+
+    def _adjust(self, rate, now):
+        """Un passo di hill climbing sul numero di thread (chiamato con il lock)"""
+        previous_best = max(self.samples.values()) if self.samples else None
+        self.samples[self.target] = rate
+
+        if now - self._start >= self.tuning_seconds:
+            self._settle()
+            return
+
+        improved = previous_best is None or rate >= previous_best * self.IMPROVEMENT
+        if not improved and self.target != self.best_workers:
+            # Passo peggiorativo: torna al migliore e prova la direzione opposta
+            if self.direction > 0:
+                self.direction = -1
+                candidate = self.best_workers - 1
+            else:
+                candidate = None
+        else:
+            candidate = self.target + self.direction
+            if self.direction > 0 and (candidate > self.max_workers or candidate in self.samples):
+                self.direction = -1
+                candidate = self.best_workers - 1
+
+        if (candidate is None or candidate < self.min_workers
+                or candidate > self.max_workers or candidate in self.samples):
+            self._settle()
+        else:
+            self.target = candidate
+
+    def _settle(self):
+        self.target = self.best_workers
+        self.settled = True
+
+    def imap_unordered(self, func, items, size_of):
+        """
+        Esegue func su ogni elemento e restituisce i risultati appena pronti
+
+        Args:
+            func: Funzione da eseguire per ogni elemento
+            items: Elementi da processare
+            size_of: Funzione elemento → byte (per la misura dei MB/s)
+
+        Yields:
+            Risultati di func nell'ordine di completamento
+        """
+        items = list(items)
+        if not items:
+            return
+
+        tasks = queue.Queue()
+        for item in items:
+            tasks.put(item)
+        results = queue.Queue()
+
+        self._start = self._window_start = time.monotonic()
+
+        def worker():
+            while True:
+                self._acquire()
+                try:
+                    item = tasks.get_nowait()
+                except queue.Empty:
+                    self._release(0)
+                    return
+                # Dimensione letta prima: in modalità taglia la sorgente sparisce
+                try:
+                    nbytes = size_of(item)
+                except OSError:
+                    nbytes = 0
+                try:
+                    result = func(item)
+                    results.put((True, result))
+                except BaseException as e:
+                    results.put((False, e))
+                finally:
+                    self._release(nbytes)
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(self.max_workers, len(items)))]
+        for t in threads:
+            t.start()
+
+        for _ in range(len(items)):
+            ok, value = results.get()
+            if not ok:
+                raise value
+            yield value
+
+        for t in threads:
+            t.join()
+
+        if self.key and self.samples:
+            self._settle()
+            try:
+                save_tuning(self.key, self.best_workers, self.samples[self.best_workers])
+            except OSError as e:
+                print(f"Errore salvataggio tuning import: {e}")
@@ -0,0 +1,178 @@
+"""
+SD Card Photo Importer - Import Verifier
+Verifica O(n) di un'importazione: manifest oppure una scansione per lato
+"""
+
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sd_scanner import sd_scanner, scan_tree
+from copy_engine import ImportManifest
+
+
+# Nome duplicato generato in importazione: "<nome>_<n><ext>"
+_DUPLICATE_RE = re.compile(r'^(?P<stem>.+)_(?P<num>\d+)(?P<ext>\.[^.]*)$')
+
+METHOD_MANIFEST = 'manifest'
+METHOD_SCAN = 'scan'
+
+
+@dataclass
+class VerificationReport:
+    """Esito dettagliato della verifica sorgente → destinazione"""
+    method: str
+    matched: list = field(default_factory=list)        # [(ScannedFile, dest_path)]
+    missing: list = field(default_factory=list)        # [ScannedFile]
+    size_mismatch: list = field(default_factory=list)  # [(ScannedFile, dest_path, dest_size)]
+
+    @property
+    def verified(self):
+        return not self.missing and not self.size_mismatch
+
+    @property
+    def message(self):
+        if self.missing:
+            return f"Mancano {len(self.missing)} file nella destinazione"
+        if self.size_mismatch:
+            return f"Dimensioni non corrispondenti per {len(self.size_mismatch)} file"
+        return "Tutti i file verificati correttamente"
+
+    def as_tuple(self):
+        """
+        Formato storico di verify_files_before_delete
+
+        Returns:
+            tuple: (verified: bool, missing_files: list, message: str)
+        """
+        if self.missing:
+            return False, [f.name for f in self.missing], self.message
+        if self.size_mismatch:
+            return False, [(f.name, f.size, size) for f, _, size in self.size_mismatch], self.message
+        return True, [], self.message
+
+
+def _duplicate_base(name):
+    """Nome originale di un duplicato "IMG_1_2.JPG" → "IMG_1.JPG" (None se non lo è)"""
+    match = _DUPLICATE_RE.match(name)
+    if not match:
+        return None
+    return match.group('stem') + match.group('ext')
+
+
+def verify_with_manifest(source_files, manifest):
+    """
+    Verifica tramite manifest: una consultazione per file, nessuna rilettura della SD
+
+    Args:
+        source_files: ScannedFile della sorgente
+        manifest: ImportManifest della cartella destinazione
+
+    Returns:
+        VerificationReport: Esito della verifica
+    """
+    report = VerificationReport(method=METHOD_MANIFEST)
+
+    dest_sizes = {}
+    with os.scandir(manifest.dest_folder) as it:
+        for entry in it:
+            if entry.is_file():
+                dest_sizes[entry.name] = entry.stat().st_size
+
+    for src in source_files:
+        entry = manifest.get_by_source(src.path)
+        if entry is None or entry['file'] not in dest_sizes:
+            report.missing.append(src)
+            continue
+
+        dest_path = os.path.join(manifest.dest_folder, entry['file'])
+        dest_size = dest_sizes[entry['file']]
+        if src.size == entry['size'] == dest_size:
+            report.matched.append((src, dest_path))
+        else:
+            report.size_mismatch.append((src, dest_path, dest_size))
+
+    return report
+
+
+def verify_with_scan(source_files, dest_folder):
+    """
+    Verifica senza manifest: dizionari costruiti da una scansione per lato.
+
+    Ogni nome sorgente viene confrontato solo con lo stesso nome e con i suoi
+    duplicati esatti ("IMG_1.JPG", "IMG_1_1.JPG", ...): "IMG_10.JPG" non
+    corrisponde a "IMG_1.JPG".
+
+    Args:
+        source_files: ScannedFile della sorgente
+        dest_folder: Cartella destinazione
+
+    Returns:
+        VerificationReport: Esito della verifica
+    """
+    report = VerificationReport(method=METHOD_SCAN)
+
+    # Destinazione: nomi esatti e duplicati, indicizzati per nome originale
+    exact = defaultdict(list)
+    duplicates = defaultdict(list)
+    for dest in scan_tree(dest_folder):
+        exact[os.path.normcase(dest.name)].append(dest)
+        base = _duplicate_base(dest.name)
+        if base is not None:
+            duplicates[os.path.normcase(base)].append(dest)
+
+    used = set()
+
+    def take(pool, src, same_size):
+        for dest in pool.get(os.path.normcase(src.name), ()):
+            if dest.path not in used and (dest.size == src.size) == same_size:
+                used.add(dest.path)
+                return dest
+        return None
+
+    # 1) stesso nome e stessa dimensione, 2) duplicato esatto con stessa dimensione
+    pending = list(source_files)
+    for pool in (exact, duplicates):
+        remaining = []
+        for src in pending:
+            dest = take(pool, src, same_size=True)
+            if dest is not None:
+                report.matched.append((src, dest.path))
+            else:
+                remaining.append(src)
+        pending = remaining
+
+    # 3) candidati rimasti con dimensione diversa → file troncati/corrotti
+    for src in pending:
+        dest = take(exact, src, same_size=False) or take(duplicates, src, same_size=False)
+        if dest is not None:
+            report.size_mismatch.append((src, dest.path, dest.size))
+        else:
+            report.missing.append(src)
+
+    return report
+
+
+def verify_import(source_folder, dest_folder, source_files=None):
+    """
+    Verifica che tutte le foto della sorgente siano presenti nella destinazione
+
+    Usa il manifest della destinazione se presente, altrimenti una scansione
+    per lato. In entrambi i casi la SD viene visitata al massimo una volta
+    (la scansione è condivisa con conteggio e importazione).
+
+    Args:
+        source_folder: Cartella sorgente (es. SD card)
+        dest_folder: Cartella destinazione
+        source_files: ScannedFile da verificare (default: tutte le foto della sorgente)
+
+    Returns:
+        VerificationReport: Esito della verifica
+    """
+    if source_files is None:
+        source_files = sd_scanner.scan(source_folder).photos()
+    manifest = ImportManifest.load(dest_folder)
+    if manifest is not None:
+        return verify_with_manifest(source_files, manifest)
+    return verify_with_scan(source_files, dest_folder)
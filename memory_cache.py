@@ -0,0 +1,151 @@
+"""
+SD Card Photo Importer - Memory Cache
+Cache LRU in memoria con budget in byte, condivisa tra thread
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+def available_memory():
+    """
+    RAM fisica disponibile in byte
+
+    Returns:
+        int or None: Byte disponibili (None se il sistema non lo indica)
+    """
+    if os.name == 'nt':
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong),
+                        ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong),
+                        ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return status.ullAvailPhys
+
+    # Linux: MemAvailable conta anche la cache del disco che il kernel può liberare
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class ByteLRUCache:
+    """
+    Cache LRU limitata dalla memoria occupata, non dal numero di elementi.
+
+    Ogni valore entra con la sua dimensione in byte: superato il budget
+    vengono eliminati gli elementi usati meno di recente. trim() serve alle
+    finestre per liberare memoria quando non sono visibili.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._items = OrderedDict()   # {chiave: (valore, byte)}, dal meno recente
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def get(self, key, default=None):
+        """Valore in cache (lo segna come usato di recente)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, size):
+        """
+        Inserisce un valore, eliminando i meno recenti oltre il budget
+
+        Args:
+            key: Chiave
+            value: Valore
+            size: Memoria occupata dal valore in byte
+        """
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            if size > self.budget:
+                return           # non entrerebbe comunque: non svuota la cache
+            self._items[key] = (value, size)
+            self._total += size
+            self._evict(self.budget)
+
+    def pop(self, key, default=None):
+        """Rimuove un valore"""
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return default
+            self._total -= item[1]
+            return item[0]
+
+    def _evict(self, target, predicate=None):
+        """Elimina i meno recenti fino a target byte (chiamato con il lock)"""
+        for key in list(self._items):
+            if self._total <= target:
+                break
+            if predicate is not None and not predicate(key):
+                continue
+            self._total -= self._items.pop(key)[1]
+            self.evictions += 1
+
+    def trim(self, target=0, predicate=None):
+        """
+        Libera memoria (finestra nascosta o ridotta a icona)
+
+        Args:
+            target: Byte da lasciare in cache
+            predicate: Se indicato, elimina solo le chiavi per cui è vero
+
+        Returns:
+            int: Byte liberati
+        """
+        with self._lock:
+            before = self._total
+            self._evict(target, predicate)
+            return before - self._total
+
+    def clear(self, predicate=None):
+        """Svuota la cache (o solo le chiavi per cui predicate è vero)"""
+        with self._lock:
+            for key in [k for k in self._items if predicate is None or predicate(k)]:
+                self._total -= self._items.pop(key)[1]
+
+    def stats(self):
+        """Statistiche della cache (per log/status bar)"""
+        with self._lock:
+            return {'bytes': self._total, 'budget': self.budget, 'items': len(self._items),
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
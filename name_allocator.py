@@ -0,0 +1,93 @@
+"""
+SD Card Photo Importer - Destination Name Allocator
+Nomi destinazione pianificati in memoria (un solo listing) e creati con O_EXCL
+"""
+
+import os
+import threading
+
+
+class DestinationNameAllocator:
+    """
+    Assegna i nomi dei file nella cartella destinazione.
+
+    La cartella viene letta una volta sola; i nomi duplicati ("IMG_0001.JPG"
+    da due corpi macchina) ricevono il suffisso "_1", "_2", ... calcolato in
+    memoria, senza stat. Ogni nome viene consegnato a un solo thread e il
+    file viene creato con O_EXCL, quindi due copie non possono mai finire
+    sullo stesso file.
+    """
+
+    def __init__(self, dest_folder):
+        self.dest_folder = dest_folder
+        self._lock = threading.Lock()
+        self._taken = set()        # nomi normalizzati già usati
+        self._next_suffix = {}     # {(stem, ext) normalizzati: prossimo suffisso}
+        self._planned = {}         # {sorgente: percorso destinazione}
+
+        try:
+            with os.scandir(dest_folder) as it:
+                for entry in it:
+                    self._taken.add(os.path.normcase(entry.name))
+        except FileNotFoundError:
+            pass
+
+    def _allocate_locked(self, filename):
+        if os.path.normcase(filename) not in self._taken:
+            self._taken.add(os.path.normcase(filename))
+            return os.path.join(self.dest_folder, filename)
+
+        name, ext = os.path.splitext(filename)
+        key = (os.path.normcase(name), os.path.normcase(ext))
+        num = self._next_suffix.get(key, 1)
+        while True:
+            candidate = f"{name}_{num}{ext}"
+            num += 1
+            if os.path.normcase(candidate) not in self._taken:
+                break
+        self._next_suffix[key] = num
+        self._taken.add(os.path.normcase(candidate))
+        return os.path.join(self.dest_folder, candidate)
+
+    def plan(self, source_paths):
+        """
+        Pianifica i nomi di un intero batch (ordine stabile per percorso sorgente)
+
+        Args:
+            source_paths: Percorsi sorgente
+
+        Returns:
+            dict: {sorgente: percorso destinazione}
+        """
+        with self._lock:
+            for source in sorted(source_paths):
+                if source not in self._planned:
+                    self._planned[source] = self._allocate_locked(os.path.basename(source))
+            return dict(self._planned)
+
+    def path_for(self, source_path):
+        """Percorso pianificato per una sorgente (assegnato ora se mancante)"""
+        with self._lock:
+            dest_path = self._planned.get(source_path)
+            if dest_path is None:
+                dest_path = self._allocate_locked(os.path.basename(source_path))
+                self._planned[source_path] = dest_path
+            return dest_path
+
+    def reallocate(self, source_path):
+        """Nuovo nome per una sorgente il cui nome è stato occupato da fuori"""
+        with self._lock:
+            dest_path = self._allocate_locked(os.path.basename(source_path))
+            self._planned[source_path] = dest_path
+            return dest_path
+
+    @staticmethod
+    def create_exclusive(dest_path):
+        """
+        Crea il file destinazione vuoto con O_EXCL
+
+        Raises:
+            FileExistsError: Se il file esiste già
+        """
+        fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0))
+        os.close(fd)
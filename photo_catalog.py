@@ -0,0 +1,127 @@
+"""
+SD Card Photo Importer - Photo Catalog
+Elenco ordinato delle foto della sessione con indice per percorso e vista delle selezionate
+"""
+
+from bisect import bisect_left, insort
+
+
+class _SelectedView:
+    """Foto selezionate nell'ordine del catalogo (sequenza in sola lettura)"""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return len(self._catalog._selected_idx)
+
+    def __getitem__(self, item):
+        photos = self._catalog._photos
+        if isinstance(item, slice):
+            return [photos[i] for i in self._catalog._selected_idx[item]]
+        return photos[self._catalog._selected_idx[item]]
+
+    def __iter__(self):
+        photos = self._catalog._photos
+        return (photos[i] for i in self._catalog._selected_idx)
+
+
+class PhotoCatalog:
+    """
+    Foto della cartella aperta, ordinate, con selezione.
+
+    Il percorso si traduce in posizione con un dizionario e le selezionate
+    sono tenute come elenco ordinato di posizioni aggiornato a ogni modifica:
+    numerazione, paginazione e filtro "solo selezionate" costano quanto la
+    pagina, non quanto la sessione.
+    """
+
+    def __init__(self, photos=()):
+        self.load(photos)
+
+    def load(self, photos):
+        """Sostituisce le foto (ordinate per percorso) e azzera la selezione"""
+        self._photos = sorted(photos)
+        self._index = {path: i for i, path in enumerate(self._photos)}
+        self._selected_idx = []    # posizioni selezionate, crescenti
+        self._selected = set()
+
+    def __len__(self):
+        return len(self._photos)
+
+    def __iter__(self):
+        return iter(self._photos)
+
+    def __contains__(self, photo_path):
+        return photo_path in self._index
+
+    @property
+    def photos(self):
+        """Tutte le foto, in ordine (non modificare)"""
+        return self._photos
+
+    @property
+    def selected(self):
+        """Percorsi selezionati (non modificare: usare select/deselect)"""
+        return self._selected
+
+    def number(self, photo_path):
+        """Numero della foto nella sessione (da 1), None se non presente"""
+        i = self._index.get(photo_path)
+        return None if i is None else i + 1
+
+    def is_selected(self, photo_path):
+        return photo_path in self._selected
+
+    def select(self, photo_path):
+        """
+        Seleziona una foto
+
+        Returns:
+            bool: True se la selezione è cambiata
+        """
+        i = self._index.get(photo_path)
+        if i is None or photo_path in self._selected:
+            return False
+        insort(self._selected_idx, i)
+        self._selected.add(photo_path)
+        return True
+
+    def deselect(self, photo_path):
+        """
+        Deseleziona una foto
+
+        Returns:
+            bool: True se la selezione è cambiata
+        """
+        if photo_path not in self._selected:
+            return False
+        i = self._index[photo_path]
+        del self._selected_idx[bisect_left(self._selected_idx, i)]
+        self._selected.discard(photo_path)
+        return True
+
+    def select_all(self):
+        self._selected_idx = list(range(len(self._photos)))
+        self._selected = set(self._photos)
+
+    def clear_selection(self):
+        self._selected_idx = []
+        self._selected = set()
+
+    def selected_photos(self):
+        """Foto selezionate nell'ordine del catalogo"""
+        return list(_SelectedView(self))
+
+    def view(self, selected_only=False):
+        """Foto visualizzate: tutte o solo le selezionate (sequenza con len e slice)"""
+        return _SelectedView(self) if selected_only else self._photos
+
+    def page_count(self, per_page, selected_only=False):
+        count = len(self._selected_idx) if selected_only else len(self._photos)
+        return (count + per_page - 1) // per_page
+
+    def page(self, page, per_page, selected_only=False):
+        """Foto di una pagina (da 0)"""
+        start = page * per_page
+        return self.view(selected_only)[start:start + per_page]
@@ -0,0 +1,128 @@
+"""
+SD Card Photo Importer - Photo Grid (PySide6)
+Celle delle griglie foto aggiornate per differenza: si toccano solo i widget che cambiano
+"""
+
+from config import C
+
+
+# Fogli di stile delle celle, applicati una sola volta alla creazione: la
+# selezione passa dalla proprietà dinamica "selected", non da nuovi CSS
+MAIN_CELL_STYLE = f"""
+    QFrame#photoCell {{
+        background-color: transparent;
+        border: none;
+    }}
+    QFrame#photoCell[selected="true"] {{
+        border: 2px solid {C['success']};
+        border-radius: 6px;
+    }}
+    QLabel#photoNumber {{
+        background-color: rgba(0, 0, 0, 180);
+        color: {C['text_disabled']};
+        padding: 2px 6px;
+        border-radius: 3px;
+    }}
+    QLabel#photoNumber[selected="true"] {{
+        color: {C['success']};
+        font-weight: bold;
+    }}
+"""
+
+SECONDARY_CELL_STYLE = f"""
+    QFrame#photoCell {{
+        background-color: {C['dark_bg']};
+        border: none;
+    }}
+    QFrame#photoCell[selected="true"] {{
+        border: 4px solid {C['success']};
+    }}
+"""
+
+
+def set_state(widget, name, value):
+    """
+    Imposta una proprietà dinamica usata dai fogli di stile
+
+    Returns:
+        bool: True se il valore è cambiato (stile ricalcolato)
+    """
+    if widget.property(name) == value:
+        return False
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    return True
+
+
+class GridCell:
+    """
+    Cella della griglia: widget e stato mostrato (foto, numero, selezione, copie).
+
+    show() confronta il nuovo stato con quello corrente e aggiorna solo ciò
+    che è cambiato; l'immagine la imposta il chiamante quando la foto cambia.
+    """
+
+    def __init__(self, frame, photo_label, num_label, copies_spin=None):
+        self.frame = frame
+        self.photo_label = photo_label
+        self.num_label = num_label
+        self.copies_spin = copies_spin
+        self.photo_path = None
+        self.number = None
+        self.selected = False
+        self.copies = None
+        frame.setObjectName("photoCell")
+        num_label.setObjectName("photoNumber")
+
+    def show(self, photo_path, number=None, selected=False, copies=1):
+        """
+        Porta la cella allo stato indicato
+
+        Args:
+            photo_path: Foto della cella (None = cella vuota)
+            number: Numero della foto nella sessione
+            selected: Foto selezionata
+            copies: Copie da stampare (celle con spinbox)
+
+        Returns:
+            bool: True se la foto è cambiata (va impostata l'immagine)
+        """
+        changed = photo_path != self.photo_path
+        self.photo_path = photo_path
+        if changed and photo_path is None:
+            self.photo_label.clear()
+        if number != self.number:
+            self.number = number
+            self.num_label.setText(f"#{number}" if number else "")
+        self.set_selected(selected, copies)
+        return changed
+
+    def set_selected(self, selected, copies=1):
+        """Aggiorna evidenziazione e spinbox copie"""
+        if selected != self.selected:
+            self.selected = selected
+            set_state(self.frame, "selected", selected)
+            set_state(self.num_label, "selected", selected)
+            if self.copies_spin is not None:
+                self.copies_spin.setVisible(selected)
+        if self.copies_spin is not None and selected and copies != self.copies:
+            self.copies = copies
+            self.copies_spin.blockSignals(True)
+            self.copies_spin.setValue(copies)
+            self.copies_spin.blockSignals(False)
+
+    def set_pixmap(self, pixmap, placeholder=""):
+        """Immagine della cella, o segnaposto finché non è pronta"""
+        if pixmap is not None:
+            self.photo_label.setPixmap(pixmap)
+        else:
+            self.photo_label.clear()
+            if placeholder:
+                self.photo_label.setText(placeholder)
+
+    def reset(self):
+        """Svuota la cella e dimentica lo stato (es. cambio cartella)"""
+        self.show(None)
+        self.photo_label.clear()
@@ -4,39 +4,65 @@ Gestione importazione e caricamento foto
 """
 
 import os
+import errno
 import shutil
-from pathlib import Path
+import sqlite3
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from config import SD_DRIVE_LETTER, DESTINATION_BASE, PHOTO_EXTENSIONS
+from config import (DESTINATION_BASE, BACKUP_DESTINATION_BASES, IMAGE_EXTENSIONS,
+                    RAW_EXTENSIONS, IMPORT_FREE_SPACE_MARGIN)
+from sd_scanner import sd_scanner, get_sd_root
+from import_ledger import file_identity
+from copy_engine import copy_with_hash, copy_with_hash_multi, ImportManifest
+from import_verifier import verify_import
+from import_scheduler import AdaptiveScheduler
+from import_journal import ImportJournal
+from name_allocator import DestinationNameAllocator
+from safe_delete import delete_verified
+
+
+class BackupTarget:
+    """Cartella di backup di un batch: nomi pianificati e manifest propri"""
+
+    def __init__(self, folder, source_paths):
+        self.folder = folder
+        self.allocator = DestinationNameAllocator(folder)
+        self.allocator.plan(source_paths)
+        self.manifest = ImportManifest.load_or_create(folder)
 
 
 class PhotoManager:
     """Gestisce operazioni su foto"""
 
     @staticmethod
-    def find_photos_on_sd():
+    def scan_sd_card(force=False):
         """
-        Trova tutte le foto sulla scheda SD
+        Scansiona la scheda SD (una sola visita, riusata finché la SD non cambia)
+
+        Args:
+            force: Se True ignora la cache dello scanner
 
         Returns:
-            list: Lista di percorsi completi delle foto trovate
+            ScanResult: Risultato della scansione
         """
-        if not SD_DRIVE_LETTER:
+        drive = get_sd_root()
+        if not drive:
             raise ValueError("Nessuna unità SD configurata")
 
-        drive = f"{SD_DRIVE_LETTER.upper()}:\\"
         if not os.path.exists(drive):
             raise FileNotFoundError("SD card non trovata")
 
-        photo_files = []
-        for root, dirs, files in os.walk(drive):
-            for file in files:
-                if Path(file).suffix.lower() in {'.jpg', '.jpeg', '.png', '.heic', '.raw', '.cr2', '.nef', '.arw'}:
-                    photo_files.append(os.path.join(root, file))
+        return sd_scanner.scan(drive, force=force)
+
+    @staticmethod
+    def find_photos_on_sd():
+        """
+        Trova tutte le foto sulla scheda SD
 
-        return photo_files
+        Returns:
+            list: Lista di percorsi completi delle foto trovate
+        """
+        return [f.path for f in PhotoManager.scan_sd_card().photos()]
 
     @staticmethod
     def create_destination_folder():
@@ -61,51 +87,200 @@ class PhotoManager:
         return dest_folder
 
     @staticmethod
-    def process_single_photo(source_path, dest_folder, cut_mode=False):
+    def create_backup_folders(dest_folder, backup_bases=None):
+        """
+        Crea le cartelle di backup speculari a una cartella di destinazione
+
+        Una destinazione fuori da DESTINATION_BASE (es. --dest della CLI) viene
+        rispecchiata con il solo nome della cartella: il backup resta sempre
+        dentro la sua radice.
+
+        Args:
+            dest_folder: Cartella creata da create_destination_folder
+            backup_bases: Radici di backup (default: BACKUP_DESTINATION_BASES)
+
+        Returns:
+            list: Percorsi delle cartelle di backup (es. BACKUP/<data>/<n>)
+        """
+        if backup_bases is None:
+            backup_bases = BACKUP_DESTINATION_BASES
+
+        try:
+            rel_path = os.path.relpath(os.path.abspath(dest_folder), os.path.abspath(DESTINATION_BASE))
+        except ValueError:
+            rel_path = os.pardir   # altra unità (Windows)
+        if rel_path == os.curdir or rel_path.split(os.sep)[0] == os.pardir:
+            rel_path = os.path.basename(os.path.normpath(os.path.abspath(dest_folder)))
+        folders = []
+        for base in backup_bases:
+            folder = os.path.join(base, rel_path)
+            os.makedirs(folder, exist_ok=True)
+            folders.append(folder)
+        return folders
+
+    @staticmethod
+    def check_free_space(photo_files, dest_folders):
+        """
+        Controlla lo spazio libero su tutte le destinazioni prima di copiare
+
+        Le destinazioni sullo stesso disco vengono sommate (primaria e backup
+        sullo stesso volume richiedono il doppio dello spazio). Vale anche in
+        modalità taglia: prima si copia tutto e solo dopo si cancella, anche
+        se sorgente e destinazione sono sullo stesso disco.
+
+        Args:
+            photo_files: File da importare (percorsi o ScannedFile)
+            dest_folders: Cartelle destinazione (primaria + backup)
+
+        Returns:
+            tuple: (ok: bool, message: str)
+        """
+        if not photo_files:
+            return True, "Nessun file da importare"
+
+        total = 0
+        for photo in photo_files:
+            size = getattr(photo, 'size', None)
+            try:
+                total += size if size is not None else os.path.getsize(photo)
+            except OSError:
+                continue
+
+        # {dispositivo: [cartella di riferimento, byte richiesti]}
+        required = {}
+        for folder in dest_folders:
+            existing = os.path.abspath(folder)
+            while not os.path.exists(existing) and os.path.dirname(existing) != existing:
+                existing = os.path.dirname(existing)
+            dev = os.stat(existing).st_dev
+            required.setdefault(dev, [existing, 0])[1] += total
+
+        gb = 1024 ** 3
+        for folder, needed in required.values():
+            free = shutil.disk_usage(folder).free
+            if needed + IMPORT_FREE_SPACE_MARGIN > free:
+                return False, (f"Spazio insufficiente su {folder}: servono "
+                               f"{(needed + IMPORT_FREE_SPACE_MARGIN) / gb:.2f} GB, "
+                               f"liberi {free / gb:.2f} GB")
+        return True, f"Spazio sufficiente ({total / gb:.2f} GB da copiare)"
+
+    @staticmethod
+    def process_single_photo(source_path, dest_folder, cut_mode=False, manifest=None, stats=None,
+                             journal=None, allocator=None, backups=None):
         """
         Copia o sposta una singola foto
 
+        La copia passa dal motore con hash: il file viene letto una sola volta
+        e l'hash calcolato durante la lettura finisce nel manifest.
+
         Args:
             source_path: Percorso file sorgente
             dest_folder: Cartella destinazione
-            cut_mode: Se True sposta, altrimenti copia
+            cut_mode: Se True cancella la sorgente dopo la copia (hash verificato)
+            manifest: ImportManifest opzionale in cui registrare la copia
+            stats: ImportStats opzionale (percorso di copia scelto per il file)
+            journal: ImportJournal opzionale (inizio/fine copia per la ripresa)
+            allocator: DestinationNameAllocator condiviso dal batch (nomi duplicati
+                       pianificati in memoria); se None ne crea uno per la cartella
+            backups: BackupTarget opzionali: la sorgente viene letta una volta e
+                     scritta in parallelo su primaria e backup
 
         Returns:
             tuple: (success: bool, filename: str, error: str or None)
         """
         filename = os.path.basename(source_path)
-        dest_path = os.path.join(dest_folder, filename)
-
-        # Gestisci duplicati
-        if os.path.exists(dest_path):
-            name, ext = os.path.splitext(filename)
-            num = 1
-            while os.path.exists(dest_path):
-                dest_path = os.path.join(dest_folder, f"{name}_{num}{ext}")
-                num += 1
+        dest_path = None
+        backup_paths = []
+        reserved = []   # file creati da questa copia (da rimuovere se fallisce)
 
         try:
-            if cut_mode:
-                shutil.move(source_path, dest_path)
+            # Gestisci duplicati: nome pianificato, file creato con O_EXCL.
+            # Il journal riceve i nomi prima che i file esistano
+            if allocator is None:
+                allocator = DestinationNameAllocator(dest_folder)
+            dest_path = allocator.path_for(source_path)
+            backup_paths = [target.allocator.path_for(source_path) for target in backups or ()]
+            while True:
+                if journal is not None:
+                    journal.mark_started(source_path, dest_path, backup_paths)
+                try:
+                    allocator.create_exclusive(dest_path)
+                    break
+                except FileExistsError:
+                    # Nome occupato da fuori dopo il listing: prossimo suffisso
+                    dest_path = allocator.reallocate(source_path)
+            reserved.append(dest_path)
+
+            for i, target in enumerate(backups or ()):
+                while True:
+                    try:
+                        target.allocator.create_exclusive(backup_paths[i])
+                        break
+                    except FileExistsError:
+                        backup_paths[i] = target.allocator.reallocate(source_path)
+                        if journal is not None:
+                            journal.mark_started(source_path, dest_path, backup_paths)
+                reserved.append(backup_paths[i])
+
+            if backup_paths:
+                size, digest = copy_with_hash_multi(source_path, [dest_path] + backup_paths,
+                                                    stats=stats)
+                if manifest is not None:
+                    manifest.add(source_path, dest_path, size, digest)
+                for target, backup_path in zip(backups, backup_paths):
+                    target.manifest.add(source_path, backup_path, size, digest)
             else:
-                shutil.copy2(source_path, dest_path)
+                size, digest = copy_with_hash(source_path, dest_path, stats=stats)
+                if manifest is not None:
+                    manifest.add(source_path, dest_path, size, digest)
+            if journal is not None:
+                journal.mark_done(source_path, dest_path, size, digest, backup_paths)
+
+            if cut_mode:
+                # Sorgente cancellata solo dopo confronto hash e fsync della destinazione
+                deletion = delete_verified([(source_path, dest_path)])
+                if not deletion.success:
+                    return False, filename, deletion.message
             return True, filename, None
         except Exception as e:
+            # Copia parziale (o preallocata a dimensione piena): non deve restare
+            # nella cartella, dove comparirebbe in griglia e in stampa
+            for path in reserved:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            if journal is not None:
+                journal.mark_failed(source_path, str(e), dest_path, backup_paths)
             return False, filename, str(e)
 
     @staticmethod
     def import_photos_batch(photo_files, dest_folder, cut_mode=False,
-                           progress_callback=None, max_workers=4):
+                           progress_callback=None, max_workers=None, ledger=None, stats=None,
+                           journal=None, skip_imported=True, backup_folders=None,
+                           progress=None):
         """
         Importa un batch di foto con multi-threading
 
         Args:
-            photo_files: Lista di file sorgente
+            photo_files: Lista di file sorgente (percorsi o ScannedFile dello scanner)
             dest_folder: Cartella destinazione
-            cut_mode: Se True sposta, altrimenti copia
+            cut_mode: Se True, a fine copia cancella dalla SD (per cartella) i file
+                      la cui destinazione ha lo stesso hash
             progress_callback: Funzione chiamata per ogni foto processata
                               (completed: int, errors: int, filename: str, total: int)
-            max_workers: Numero massimo di thread paralleli
+            max_workers: Numero di thread paralleli; se None viene regolato
+                         automaticamente e ricordato per il dispositivo
+            ledger: ImportLedger opzionale; se presente vengono copiati solo i file
+                    mai importati e quelli importati vengono registrati
+            skip_imported: Se False il ledger registra ma non filtra (ripresa)
+            stats: ImportStats opzionale: percorso di copia per file (kernel,
+                   fallback o buffer), thread scelti e MB/s
+            journal: ImportJournal opzionale della sessione (vedi resume_import)
+            backup_folders: Cartelle di backup: ogni file viene letto una volta sola
+                            e scritto in parallelo su tutte le destinazioni
+            progress: ProgressAggregator opzionale: i thread vi registrano ogni
+                      esito, l'interfaccia lo legge a frequenza fissa
 
         Returns:
             tuple: (completed: int, errors: int, error_list: list)
@@ -114,17 +289,78 @@ class PhotoManager:
         errors = 0
         error_list = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Invia tutti i task
-            future_to_photo = {
-                executor.submit(PhotoManager.process_single_photo, photo, dest_folder, cut_mode): photo
-                for photo in photo_files
-            }
+        if ledger is not None and skip_imported:
+            photo_files = ledger.filter_new(photo_files)
+
+        # Preflight: con spazio insufficiente nessun byte viene copiato
+        ok, message = PhotoManager.check_free_space(
+            photo_files, [dest_folder] + list(backup_folders or ()))
+        if not ok:
+            raise OSError(errno.ENOSPC, message)
+
+        if journal is not None:
+            journal.plan(photo_files)
+
+        def size_of(photo):
+            size = getattr(photo, 'size', None)
+            return size if size is not None else os.path.getsize(photo)
+
+        if progress is not None:
+            total_bytes = 0
+            for photo in photo_files:
+                try:
+                    total_bytes += size_of(photo)
+                except OSError:
+                    pass
+            progress.start(len(photo_files), total_bytes)
+
+        # Nomi destinazione di tutto il batch pianificati con un solo listing
+        source_paths = [getattr(photo, 'path', photo) for photo in photo_files]
+        allocator = DestinationNameAllocator(dest_folder)
+        allocator.plan(source_paths)
+        backups = [BackupTarget(folder, source_paths) for folder in backup_folders or ()]
+
+        # Manifest della cartella (aggiornato se la cartella ne ha già uno)
+        manifest = ImportManifest.load_or_create(dest_folder)
+
+        # Modalità taglia: prima tutte le copie, poi la cancellazione verificata
+        copied = []   # [(sorgente, destinazione)]
+
+        def process(photo):
+            source_path = getattr(photo, 'path', photo)
+            # Identità e dimensione lette prima della copia (in modalità taglia la sorgente sparisce)
+            try:
+                identity = file_identity(photo) if ledger is not None else None
+                size = size_of(photo) if progress is not None else 0
+            except OSError as e:
+                success, filename, error = False, os.path.basename(source_path), str(e)
+                size = 0
+            else:
+                success, filename, error = PhotoManager.process_single_photo(
+                    source_path, dest_folder, False, manifest, stats, journal, allocator, backups)
+                entry = manifest.get_by_source(source_path) if success else None
+                if success and ledger is not None:
+                    try:
+                        ledger.record(identity, dest_folder, entry['hash'] if entry else None)
+                    except sqlite3.Error as e:
+                        # La copia è valida: il file risulterà solo ancora "nuovo"
+                        # (es. database bloccato dalla CLI)
+                        print(f"Errore registro importazioni ({filename}): {e}")
+                if entry is not None and cut_mode:
+                    copied.append((source_path, os.path.join(dest_folder, entry['file'])))
+            if progress is not None:
+                progress.record(source_path, filename, success, error, size)
+            return success, filename, error
+
+        if max_workers is None:
+            first_source = getattr(photo_files[0], 'path', photo_files[0]) if photo_files else dest_folder
+            scheduler = AdaptiveScheduler.for_paths(first_source, dest_folder)
+        else:
+            scheduler = AdaptiveScheduler.fixed(max_workers)
 
+        try:
             # Processa i risultati man mano che completano
-            for future in as_completed(future_to_photo):
-                success, filename, error = future.result()
-
+            for success, filename, error in scheduler.imap_unordered(process, photo_files, size_of):
                 if success:
                     completed += 1
                 else:
@@ -134,14 +370,89 @@ class PhotoManager:
                 # Callback progresso
                 if progress_callback:
                     progress_callback(completed, errors, filename, len(photo_files))
+        finally:
+            for target_manifest in [manifest] + [target.manifest for target in backups]:
+                if len(target_manifest):
+                    target_manifest.save()
+            if stats is not None:
+                stats.workers = scheduler.best_workers
+                stats.mb_s = scheduler.throughput
+            if journal is not None:
+                if journal.is_finished():
+                    journal.mark_complete()
+                journal.close()
+
+        if copied:
+            deletion = delete_verified(copied)
+            sd_scanner.invalidate()
+            for source, error in deletion.errors:
+                error_list.append((os.path.basename(source), error))
+            for source, _ in deletion.hash_mismatch:
+                error_list.append((os.path.basename(source), "Hash diverso: file non cancellato dalla SD"))
+            errors += len(deletion.errors) + len(deletion.hash_mismatch)
 
         return completed, errors, error_list
 
+    @staticmethod
+    def resume_import(dest_folder, progress_callback=None, max_workers=None, ledger=None,
+                      stats=None, progress=None):
+        """
+        Riprende un'importazione interrotta nella stessa cartella destinazione
+
+        Le copie parziali vengono cancellate e rifatte; i file già completati
+        (presenti con la dimensione giusta) non vengono ricopiati. I file
+        rimasti vengono scritti anche nelle cartelle di backup registrate
+        nel journal. La SD deve essere quella della sessione (vedi
+        ImportJournal.check_source).
+
+        Args:
+            dest_folder: Cartella della sessione interrotta
+            progress_callback, max_workers, ledger, stats, progress: Come import_photos_batch
+
+        Returns:
+            tuple: (completed: int, errors: int, error_list: list)
+
+        Raises:
+            FileNotFoundError: Se la cartella non ha un journal
+            ValueError: Se la SD inserita non è quella della sessione
+        """
+        journal = ImportJournal.load(dest_folder)
+        if journal is None:
+            raise FileNotFoundError(f"Nessun journal di importazione in: {dest_folder}")
+        ok, message = journal.check_source()
+        if not ok:
+            raise ValueError(message)
+
+        pending = journal.prepare_resume()
+        for folder in journal.backup_folders:
+            os.makedirs(folder, exist_ok=True)
+
+        # I manifest potrebbero non essere stati salvati: li ricostruisce dal journal
+        folders = [dest_folder] + journal.backup_folders
+        for i, folder in enumerate(folders):
+            manifest = ImportManifest.load_or_create(folder)
+            for source, entry in journal.done.items():
+                names = [entry['file']] + entry['backups']
+                if i >= len(names) or not entry['hash'] or manifest.get(names[i]) is not None:
+                    continue
+                manifest.add(source, os.path.join(folder, names[i]), entry['size'], entry['hash'])
+            if len(manifest):
+                manifest.save()
+
+        return PhotoManager.import_photos_batch(
+            pending, dest_folder, progress_callback=progress_callback,
+            max_workers=max_workers, ledger=ledger, stats=stats,
+            journal=journal, skip_imported=False, backup_folders=journal.backup_folders,
+            progress=progress)
+
     @staticmethod
     def load_photos_from_folder(folder_path):
         """
         Carica lista di foto da una cartella
 
+        I RAW sono inclusi solo se non c'è un'immagine con lo stesso nome
+        (scatti RAW+JPEG compaiono una volta sola, tramite il JPEG).
+
         Args:
             folder_path: Percorso cartella
 
@@ -152,14 +463,24 @@ class PhotoManager:
             raise FileNotFoundError(f"Cartella non trovata: {folder_path}")
 
         photos = []
+        raws = []
+        image_stems = set()
         try:
-            for file in os.listdir(folder_path):
-                filepath = os.path.join(folder_path, file)
-                if os.path.isfile(filepath) and Path(file).suffix.lower() in {'.jpg', '.jpeg', '.png', '.heic'}:
-                    photos.append(filepath)
+            with os.scandir(folder_path) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    stem, ext = os.path.splitext(entry.name)
+                    ext = ext.lower()
+                    if ext in IMAGE_EXTENSIONS:
+                        photos.append(entry.path)
+                        image_stems.add(os.path.normcase(stem))
+                    elif ext in RAW_EXTENSIONS:
+                        raws.append((os.path.normcase(stem), entry.path))
         except Exception as e:
             raise RuntimeError(f"Errore lettura cartella: {e}")
 
+        photos.extend(path for stem, path in raws if stem not in image_stems)
         return sorted(photos)
 
     @staticmethod
@@ -174,84 +495,53 @@ class PhotoManager:
         Returns:
             tuple: (verified: bool, missing_files: list, message: str)
         """
-        source_files = []
-        dest_files = []
-
-        # Raccogli tutti i file dalla sorgente
-        for root, dirs, files in os.walk(source_folder):
-            for file in files:
-                if Path(file).suffix.lower() in {'.jpg', '.jpeg', '.png', '.heic', '.raw', '.cr2', '.nef', '.arw'}:
-                    source_files.append(file)
-
-        # Raccogli tutti i file dalla destinazione
-        for root, dirs, files in os.walk(dest_folder):
-            for file in files:
-                dest_files.append(file)
-
-        # Verifica che tutti i file sorgente siano presenti
-        missing_files = []
-        for src_file in source_files:
-            # Verifica anche con suffisso _1, _2, ecc. per i duplicati
-            base_name = Path(src_file).stem
-            found = False
-            for dest_file in dest_files:
-                if dest_file.startswith(base_name):
-                    found = True
-                    break
-            if not found:
-                missing_files.append(src_file)
-
-        if missing_files:
-            return False, missing_files, f"Mancano {len(missing_files)} file nella destinazione"
-
-        # Verifica anche le dimensioni
-        size_mismatch = []
-        for src_file in source_files:
-            src_path = None
-            for root, dirs, files in os.walk(source_folder):
-                if src_file in files:
-                    src_path = os.path.join(root, src_file)
-                    break
-
-            if src_path:
-                src_size = os.path.getsize(src_path)
-                # Trova il file corrispondente nella destinazione
-                dest_path = None
-                base_name = Path(src_file).stem
-                for root, dirs, files in os.walk(dest_folder):
-                    for file in files:
-                        if file.startswith(base_name):
-                            dest_path = os.path.join(root, file)
-                            break
-                    if dest_path:
-                        break
+        return PhotoManager.verify_import(source_folder, dest_folder).as_tuple()
 
-                if dest_path:
-                    dest_size = os.path.getsize(dest_path)
-                    if src_size != dest_size:
-                        size_mismatch.append((src_file, src_size, dest_size))
+    @staticmethod
+    def verify_import(source_folder, dest_folder, source_files=None):
+        """
+        Verifica dettagliata di un'importazione (manifest o una scansione per lato)
 
-        if size_mismatch:
-            return False, size_mismatch, f"Dimensioni non corrispondenti per {len(size_mismatch)} file"
+        Args:
+            source_folder: Cartella sorgente (es. SD card)
+            dest_folder: Cartella destinazione
+            source_files: ScannedFile da verificare (default: tutte le foto della sorgente)
 
-        return True, [], "Tutti i file verificati correttamente"
+        Returns:
+            VerificationReport: File verificati, mancanti e con dimensione diversa
+        """
+        return verify_import(source_folder, dest_folder, source_files)
 
     @staticmethod
-    def safe_delete_from_sd(verification_result):
+    def safe_delete_from_sd(report, progress_callback=None):
         """
-        Cancella i file dalla SD solo dopo verifica
+        Cancella dalla SD i file verificati in una destinazione
+
+        Vengono cancellati solo i file trovati nella destinazione (report.matched):
+        ogni coppia sorgente/destinazione viene confrontata per hash e le
+        sorgenti vengono cancellate per cartella, dopo l'fsync delle
+        destinazioni corrispondenti. I file mancanti o con dimensione diversa
+        restano sulla SD: una SD reinserita più volte è divisa fra più
+        cartelle di sessione (il ledger salta i file già importati) e ogni
+        cartella libera la sua parte.
 
         Args:
-            verification_result: Risultato di verify_files_before_delete
+            report: VerificationReport di verify_import
+            progress_callback: Funzione chiamata con (processati, totale)
 
         Returns:
             tuple: (success: bool, message: str)
         """
-        verified, missing, message = verification_result
-
-        if not verified:
-            return False, f"Impossibile cancellare: {message}"
-
-        # TODO: Implementare cancellazione sicura
-        # Per ora restituisce solo il messaggio
-        return True, "File verificati, cancellazione sicura abilitata"
+        if not report.matched:
+            return False, f"Impossibile cancellare: {report.message}"
+
+        deletion = delete_verified(((f.path, dest_path) for f, dest_path in report.matched),
+                                   progress_callback)
+        sd_scanner.invalidate()
+
+        message = deletion.message
+        if report.missing:
+            message += f", {len(report.missing)} lasciati sulla SD (non in questa destinazione)"
+        if report.size_mismatch:
+            message += f", {len(report.size_mismatch)} lasciati sulla SD (dimensione diversa)"
+        return deletion.success, message
@@ -4,6 +4,7 @@ Gestione stampa con spooler interno
 """
 
 import os
+import io
 import time
 import json
 import threading
@@ -16,6 +17,7 @@ from win32.lib import win32con as pywintypes_con
 from plyer import notification
 
 from config import PRINT_LOG_FILE
+from embedded_preview import is_raw_file, raw_preview
 
 
 class PrintManager:
@@ -120,7 +122,7 @@ class PrintManager:
                             hDC.StartDoc(f"Foto {print_count}")
                             hDC.StartPage()
 
-                            img = Image.open(photo_path)
+                            img = self.open_print_image(photo_path)
                             if img.mode != 'RGB':
                                 img = img.convert('RGB')
 
@@ -198,6 +200,16 @@ class PrintManager:
 
         threading.Thread(target=print_thread, daemon=True).start()
 
+    @staticmethod
+    def open_print_image(photo_path):
+        """Apre la foto da stampare (per i RAW l'anteprima JPEG incorporata)"""
+        if is_raw_file(photo_path):
+            data = raw_preview(photo_path)
+            if data is None:
+                raise ValueError(f"Nessuna anteprima nel file RAW: {photo_path}")
+            return Image.open(io.BytesIO(data))
+        return Image.open(photo_path)
+
     def log_print_job(self, num_photos, layout):
         """Registra stampa nel log"""
         now = datetime.now()
@@ -0,0 +1,121 @@
+"""
+SD Card Photo Importer - Safe Delete
+Cancellazione dalla SD solo dopo confronto hash sorgente/destinazione e fsync
+"""
+
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from copy_engine import hash_file
+
+
+@dataclass
+class DeletionReport:
+    """Esito della cancellazione sicura"""
+    deleted: list = field(default_factory=list)        # [sorgente]
+    hash_mismatch: list = field(default_factory=list)  # [(sorgente, destinazione)]
+    errors: list = field(default_factory=list)         # [(sorgente, errore)]
+
+    @property
+    def success(self):
+        return not self.hash_mismatch and not self.errors
+
+    @property
+    def message(self):
+        text = f"Cancellati {len(self.deleted)} file dalla SD"
+        if self.hash_mismatch:
+            text += f", {len(self.hash_mismatch)} non cancellati (hash diverso)"
+        if self.errors:
+            text += f", {len(self.errors)} errori"
+        return text
+
+
+def _fsync_file(path):
+    """Forza su disco una destinazione (su Windows serve un handle in scrittura)"""
+    fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path):
+    """Forza su disco la voce di directory (solo POSIX)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def delete_verified(pairs, progress_callback=None):
+    """
+    Cancella le sorgenti la cui destinazione ha lo stesso hash
+
+    Le coppie vengono raggruppate per cartella sorgente: per ogni cartella
+    si calcolano gli hash (sorgente e destinazione in parallelo), si fa
+    fsync delle destinazioni verificate e solo allora si cancellano le
+    sorgenti del gruppo.
+
+    Args:
+        pairs: Coppie (sorgente, destinazione)
+        progress_callback: Funzione chiamata con (processati, totale)
+
+    Returns:
+        DeletionReport: Esito della cancellazione
+    """
+    report = DeletionReport()
+    by_dir = defaultdict(list)
+    for source, dest in pairs:
+        by_dir[os.path.dirname(source)].append((source, dest))
+
+    total = sum(len(group) for group in by_dir.values())
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=1) as dest_hasher:
+        for source_dir in sorted(by_dir):
+            verified = []
+            for source, dest in by_dir[source_dir]:
+                # Hash della destinazione in parallelo alla lettura della SD
+                dest_future = dest_hasher.submit(hash_file, dest)
+                try:
+                    source_digest = hash_file(source)
+                    dest_digest = dest_future.result()
+                except OSError as e:
+                    report.errors.append((source, str(e)))
+                    continue
+                if source_digest == dest_digest:
+                    verified.append((source, dest))
+                else:
+                    report.hash_mismatch.append((source, dest))
+
+            # Destinazioni su disco prima di toccare la SD
+            synced = []
+            for source, dest in verified:
+                try:
+                    _fsync_file(dest)
+                    synced.append((source, dest))
+                except OSError as e:
+                    report.errors.append((source, str(e)))
+            for dest_dir in {os.path.dirname(dest) for _, dest in synced}:
+                try:
+                    _fsync_dir(dest_dir)
+                except OSError:
+                    pass
+
+            for source, _ in synced:
+                try:
+                    os.remove(source)
+                    report.deleted.append(source)
+                except OSError as e:
+                    report.errors.append((source, str(e)))
+
+            processed += len(by_dir[source_dir])
+            if progress_callback:
+                progress_callback(processed, total)
+
+    return report
@@ -5,18 +5,15 @@ Interfaccia ultra professionale con doppio monitor
 
 import os
 import sys
-import shutil
-from datetime import datetime
-from pathlib import Path
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
 
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                 QLabel, QPushButton, QProgressBar, QGridLayout, QFrame,
                                 QFileDialog, QMessageBox, QCheckBox, QRadioButton, QComboBox,
                                 QButtonGroup, QScrollArea, QTabWidget, QTreeWidget, QTreeWidgetItem,
                                 QDialog, QLineEdit, QGroupBox)
-from PySide6.QtCore import Qt, QTimer, Signal, QObject, QThread
+from PySide6.QtCore import Qt, QTimer, Signal, QObject, QThread, QEvent
 from PySide6.QtGui import QPixmap, QFont, QIcon, QShortcut, QKeySequence
 from PIL import Image
 try:
@@ -26,65 +23,81 @@ except:
     HAS_NOTIFICATION = False
 
 # Importa moduli
-from config import (DESTINATION_BASE, SD_DRIVE_LETTER, PHOTO_EXTENSIONS, PRINT_LOG_FILE,
-                    THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, GRID_ROWS, GRID_COLUMNS, PHOTOS_PER_PAGE,
-                    C, F, S, B)
+from config import (DESTINATION_BASE, PHOTO_EXTENSIONS, PRINT_LOG_FILE,
+                    BACKUP_DESTINATION_BASES, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, GRID_ROWS,
+                    GRID_COLUMNS, PHOTOS_PER_PAGE, IMPORT_PROGRESS_HZ, AUTO_IMPORT_ON_INSERT,
+                    THUMBNAIL_PREFETCH_PAGES, PIXMAP_CACHE_TRIM_FRACTION, C, F, S, B)
 from secondary_window_qt import SecondaryDisplayWindow
 from print_manager_qt import PrintManager
 from photo_manager import PhotoManager
+from photo_catalog import PhotoCatalog
+from photo_grid_qt import GridCell, MAIN_CELL_STYLE
+from sd_scanner import sd_scanner, get_sd_root
+from import_ledger import ImportLedger
+from copy_engine import ImportStats
+from import_progress import ProgressAggregator
+from sd_monitor_qt import SDMonitor
+from thumbnail_cache import thumbnail_cache
+from thumbnails_qt import ThumbnailLoader, shutdown_decoders, pixmap_cache
+from import_journal import ImportJournal
 from professional_features_qt import (ModernButton, StatusBar, Toolbar,
                                       SplashScreen, AboutDialog, ToastNotification)
 
 
 class ImportWorker(QObject):
-    """Worker per importazione foto in background"""
-    progress = Signal(int, int, str)  # completed, total, filename
+    """Worker per importazione foto in background (avanzamento letto dalla UI via polling)"""
     finished = Signal(int, int)  # completed, errors
 
-    def __init__(self, photo_files, dest_folder, cut_mode):
+    def __init__(self, photo_files, dest_folder, cut_mode, ledger=None, resume=False):
         super().__init__()
         self.photo_files = photo_files
         self.dest_folder = dest_folder
         self.cut_mode = cut_mode
+        self.ledger = ledger
+        self.resume = resume
+        self.report = None
+        self.backup_reports = {}  # {cartella backup: VerificationReport}
+        self.stats = ImportStats()
+        self.progress = ProgressAggregator()
 
     def run(self):
-        completed = 0
-        errors = 0
-
-        def process_photo(source_path):
-            filename = os.path.basename(source_path)
-            dest_path = os.path.join(self.dest_folder, filename)
+        try:
+            if self.resume:
+                completed, errors, error_list = PhotoManager.resume_import(
+                    self.dest_folder, ledger=self.ledger, stats=self.stats,
+                    progress=self.progress)
+            else:
+                backup_folders = PhotoManager.create_backup_folders(self.dest_folder)
+                journal = ImportJournal.create(self.dest_folder, get_sd_root(), backup_folders)
+                completed, errors, error_list = PhotoManager.import_photos_batch(
+                    self.photo_files, self.dest_folder, self.cut_mode,
+                    ledger=self.ledger, stats=self.stats, journal=journal,
+                    backup_folders=backup_folders, progress=self.progress)
+        except Exception as e:
+            # finished va sempre emesso: riabilita l'interfaccia e ferma il timer
+            print(f"Errore importazione: {e}")
+            self.finished.emit(0, 1)
+            return
 
-            if os.path.exists(dest_path):
-                name, ext = os.path.splitext(filename)
-                num = 1
-                while os.path.exists(dest_path):
-                    dest_path = os.path.join(self.dest_folder, f"{name}_{num}{ext}")
-                    num += 1
+        for filename, error in error_list:
+            print(f"Errore: {filename}: {error}")
 
+        # Verifica del batch appena copiato (manifest: nessuna rilettura della SD)
+        if not self.cut_mode:
             try:
-                if self.cut_mode:
-                    shutil.move(source_path, dest_path)
-                else:
-                    shutil.copy2(source_path, dest_path)
-                return True, filename
+                verify_files = self.photo_files
+                if self.resume:
+                    journal = ImportJournal.load(self.dest_folder)
+                    backup_folders = journal.backup_folders
+                    verify_files = [f for f in PhotoManager.scan_sd_card().photos()
+                                    if f.path in journal.planned]
+                self.report = PhotoManager.verify_import(get_sd_root(), self.dest_folder,
+                                                         verify_files)
+                for folder in backup_folders:
+                    self.backup_reports[folder] = PhotoManager.verify_import(
+                        get_sd_root(), folder, verify_files)
             except Exception as e:
-                print(f"Errore: {e}")
-                return False, filename
-
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            future_to_photo = {executor.submit(process_photo, photo): photo
-                              for photo in self.photo_files}
-
-            for future in as_completed(future_to_photo):
-                success, filename = future.result()
-
-                if success:
-                    completed += 1
-                else:
-                    errors += 1
-
-                self.progress.emit(completed, len(self.photo_files), filename)
+                print(f"Errore verifica: {e}")
 
         self.finished.emit(completed, errors)
 
@@ -99,12 +112,17 @@ class MainWindow(QMainWindow):
 
         # Variabili
         self.current_folder = None
-        self.all_photos = []
-        self.selected_photos = set()
+        self.catalog = PhotoCatalog()   # foto della cartella e selezione
         self.photo_copies = {}  # {photo_path: num_copies}
         self.current_page = 0
+        self.last_page = 0
+        self.page_direction = 1  # direzione di scorrimento per il prefetch
         self.show_only_selected = False
-        self.thumbnail_cache = {}
+        self.thumbnail_loader = ThumbnailLoader(225, 150, self, previews=True)
+        self.thumbnail_cache = self.thumbnail_loader.pixmaps   # vista su pixmap_cache (LRU in byte)
+        self.thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.thumbnail_loader.preview_ready.connect(self.on_thumbnail_preview)
+        self.thumbnail_loader.thumbnail_failed.connect(self.on_thumbnail_failed)
 
         # Print Manager
         self.print_manager = PrintManager(self)
@@ -115,14 +133,34 @@ class MainWindow(QMainWindow):
         # Import thread
         self.import_thread = None
         self.import_worker = None
+        self.auto_import_queue = deque()  # radici SD in attesa di importazione automatica
+        # SD già importate automaticamente dall'ultimo inserimento: un file che
+        # fallisce sempre resta "nuovo" e non deve far ripartire l'importazione
+        self.auto_imported = set()
+        self.incomplete_sessions = []   # ImportJournal interrotti (da SDMonitor)
+        self.import_progress_timer = QTimer(self)
+        self.import_progress_timer.setInterval(int(1000 / IMPORT_PROGRESS_HZ))
+        self.import_progress_timer.timeout.connect(self.on_import_progress)
+
+        # Registro file già importati (persistente tra sessioni)
+        self.import_ledger = ImportLedger()
 
         # Setup UI
         self.create_ui()
         self.setup_shortcuts()
 
-        # Carica stampanti e controlla SD
+        # Rilevamento SD in background (nessuna visita della scheda nel thread GUI)
+        self.sd_monitor = SDMonitor(self.import_ledger, self)
+        self.sd_monitor.card_inserted.connect(self.on_sd_inserted)
+        self.sd_monitor.card_removed.connect(self.on_sd_removed)
+        self.sd_monitor.scan_progress.connect(self.on_sd_scan_progress)
+        self.sd_monitor.scan_finished.connect(self.on_sd_scan_finished)
+        self.sd_monitor.scan_failed.connect(self.on_sd_scan_failed)
+        self.sd_monitor.sessions_found.connect(self.on_sessions_found)
+
+        # Carica stampanti e controlla SD (e importazioni interrotte)
         self.load_printers()
-        self.check_sd_card()
+        self.sd_monitor.start()
 
     def create_ui(self):
         """Crea interfaccia"""
@@ -234,6 +272,32 @@ class MainWindow(QMainWindow):
         self.import_btn.clicked.connect(self.import_photos)
         import_layout.addWidget(self.import_btn)
 
+        # Importazione automatica all'inserimento (senza conferma, SD in coda)
+        self.auto_import_check = QCheckBox("⚡ Importa automaticamente all'inserimento")
+        self.auto_import_check.setStyleSheet(f"color: {C['text_primary']};")
+        self.auto_import_check.setChecked(AUTO_IMPORT_ON_INSERT)
+        self.auto_import_check.toggled.connect(self.on_auto_import_toggled)
+        import_layout.addWidget(self.auto_import_check)
+
+        # Pulsante riprendi (visibile solo se c'è una sessione interrotta)
+        self.resume_btn = QPushButton("⏯️ Riprendi importazione interrotta")
+        self.resume_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {C['dark_panel']};
+                color: {C['text_primary']};
+                border: 1px solid {C['warning']};
+                border-radius: {B['radius_sm']}px;
+                padding: 8px 12px;
+                font-weight: 600;
+            }}
+            QPushButton:hover {{
+                background-color: {C['warning']};
+            }}
+        """)
+        self.resume_btn.setVisible(False)
+        self.resume_btn.clicked.connect(self.resume_import)
+        import_layout.addWidget(self.resume_btn)
+
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setFixedHeight(24)
@@ -550,14 +614,9 @@ class MainWindow(QMainWindow):
         self.thumbnail_widgets = []
         for row in range(GRID_ROWS):
             for col in range(GRID_COLUMNS):
-                # Frame cella con stile migliorato
+                # Frame cella: stile unico, la selezione cambia solo una proprietà dinamica
                 cell_frame = QFrame()
-                cell_frame.setStyleSheet(f"""
-                    QFrame {{
-                        background-color: transparent;
-                        border: none;
-                    }}
-                """)
+                cell_frame.setStyleSheet(MAIN_CELL_STYLE)
                 cell_frame.setCursor(Qt.PointingHandCursor)
 
                 cell_layout = QVBoxLayout(cell_frame)
@@ -609,30 +668,19 @@ class MainWindow(QMainWindow):
                 # Numero overlay (top-left)
                 num_label = QLabel("", photo_label)
                 num_label.setFont(QFont(F['family_primary'], 8, F['weight_bold']))
-                num_label.setStyleSheet(f"""
-                    background-color: rgba(0, 0, 0, 180);
-                    color: {C['text_primary']};
-                    padding: 2px 6px;
-                    border-radius: 3px;
-                """)
                 num_label.setFixedHeight(16)
                 num_label.move(4, 4)
 
                 cell_layout.addWidget(photo_container)
 
-                # Click handler
+                # Click handler e copie (collegati una volta: la foto si legge dalla cella)
                 idx = row * GRID_COLUMNS + col
                 cell_frame.mousePressEvent = lambda e, i=idx: self.toggle_photo_selection(i)
+                copies_spin.valueChanged.connect(lambda v, i=idx: self.on_copies_changed(i, v))
 
                 self.grid_layout.addWidget(cell_frame, row, col)
 
-                self.thumbnail_widgets.append({
-                    'frame': cell_frame,
-                    'num_label': num_label,
-                    'copies_spin': copies_spin,
-                    'photo_label': photo_label,
-                    'photo_path': None
-                })
+                self.thumbnail_widgets.append(GridCell(cell_frame, photo_label, num_label, copies_spin))
 
         grid_scroll.setWidget(grid_widget)
         right_layout.addWidget(grid_scroll, 1)
@@ -668,9 +716,16 @@ class MainWindow(QMainWindow):
         """Aggiorna numero copie per una foto"""
         self.photo_copies[photo_path] = copies
 
+    def on_copies_changed(self, idx, copies):
+        """Spinbox copie modificata dall'operatore"""
+        cell = self.thumbnail_widgets[idx]
+        if cell.photo_path is not None:
+            cell.copies = copies
+            self.update_copies(cell.photo_path, copies)
+
     def select_photo_by_number(self, number):
         """Seleziona foto tramite tastiera numerica (1-9)"""
-        if not self.all_photos:
+        if not self.catalog:
             return
 
         # Converti numero (1-9) in indice griglia (0-8)
@@ -681,67 +736,123 @@ class MainWindow(QMainWindow):
             self.toggle_photo_selection(idx)
 
     def check_sd_card(self):
-        """Controlla presenza SD"""
-        if SD_DRIVE_LETTER:
-            drive = f"{SD_DRIVE_LETTER.upper()}:\\"
-            if os.path.exists(drive):
-                photo_count = 0
-                try:
-                    for root, dirs, files in os.walk(drive):
-                        for file in files:
-                            if Path(file).suffix.lower() in {'.jpg', '.jpeg', '.png', '.heic'}:
-                                photo_count += 1
-                except:
-                    pass
-
-                self.sd_label.setText(f"{drive} ({photo_count} foto)")
-                self.sd_label.setStyleSheet(f"color: {C['success']}; font-weight: bold;")
-                self.import_btn.setEnabled(True)
-            else:
-                self.sd_label.setText("Non rilevata")
-                self.sd_label.setStyleSheet(f"color: {C['danger']}; font-weight: bold;")
-                self.import_btn.setEnabled(False)
+        """Controlla presenza SD e sessioni interrotte (nel thread di SDMonitor)"""
+        self.sd_monitor.refresh()
+
+    def on_sd_inserted(self, drive):
+        """SD inserita: scansione in corso"""
+        self.auto_imported.discard(drive)
+        self.sd_label.setText(f"{drive} (scansione...)")
+        self.sd_label.setStyleSheet(f"color: {C['warning']}; font-weight: bold;")
+
+    def on_sd_scan_progress(self, drive, found):
+        """Conteggio parziale durante la scansione"""
+        self.sd_label.setText(f"{drive} (scansione... {found} file)")
+
+    def on_sd_scan_finished(self, drive, photo_count, new_count):
+        """Scansione completata"""
+        self.sd_label.setText(f"{drive} ({photo_count} foto, {new_count} nuove)")
+        self.sd_label.setStyleSheet(f"color: {C['success']}; font-weight: bold;")
+        importing = self.import_thread is not None and self.import_thread.isRunning()
+        self.import_btn.setEnabled(not importing)
+        if new_count and self.auto_import_check.isChecked():
+            self.queue_auto_import(drive)
+
+    def on_auto_import_toggled(self, checked):
+        """Attivando la modalità automatica importa subito la SD già inserita"""
+        if checked:
+            self.check_sd_card()
+        else:
+            self.auto_import_queue.clear()
+
+    def queue_auto_import(self, drive):
+        """Accoda l'importazione automatica di una SD appena scansionata (una volta per inserimento)"""
+        if drive not in self.auto_import_queue and drive not in self.auto_imported:
+            self.auto_import_queue.append(drive)
+        self.start_next_auto_import()
+
+    def start_next_auto_import(self):
+        """Avvia la prossima importazione in coda (se nessuna è in corso), senza conferma"""
+        if self.import_thread is not None and self.import_thread.isRunning():
+            return
+
+        while self.auto_import_queue:
+            drive = self.auto_import_queue.popleft()
+            # Ricontrolla il registro: la SD può essere stata importata nel frattempo
+            try:
+                photo_files = self.import_ledger.filter_new(sd_scanner.scan(drive).photos())
+            except OSError:
+                continue  # SD rimossa prima del suo turno
+            if not photo_files:
+                continue
+
+            ok, message = PhotoManager.check_free_space(
+                photo_files, [DESTINATION_BASE] + BACKUP_DESTINATION_BASES)
+            if not ok:
+                self.status_bar.set_status(message, C['danger'])
+                self.auto_import_queue.clear()
+                return
+
+            self.auto_imported.add(drive)
+            dest_folder = PhotoManager.create_destination_folder()
+            self.status_bar.set_status(f"Importazione automatica: {len(photo_files)} foto",
+                                       C['primary'])
+            self.start_import_worker(ImportWorker(photo_files, dest_folder, False,
+                                                  self.import_ledger))
+            return
+
+    def on_sd_scan_failed(self, drive, error):
+        """Scansione fallita (es. SD rimossa durante la visita)"""
+        print(f"Errore scansione SD: {error}")
+        self.sd_label.setText(f"{drive} (errore lettura)")
+        self.sd_label.setStyleSheet(f"color: {C['danger']}; font-weight: bold;")
+        self.import_btn.setEnabled(False)
+
+    def on_sd_removed(self):
+        """SD non presente"""
+        self.auto_imported.clear()
+        self.auto_import_queue.clear()
+        self.sd_label.setText("Non rilevata")
+        self.sd_label.setStyleSheet(f"color: {C['danger']}; font-weight: bold;")
+        self.import_btn.setEnabled(False)
 
     def import_photos(self):
         """Importa foto da SD"""
-        if not SD_DRIVE_LETTER:
-            QMessageBox.warning(self, "Errore", "Nessuna unità SD configurata")
+        # Trova foto (riusa la scansione fatta da check_sd_card se la SD non è cambiata)
+        try:
+            all_files = PhotoManager.scan_sd_card().photos()
+        except (ValueError, FileNotFoundError) as e:
+            QMessageBox.warning(self, "Errore", str(e))
             return
 
-        drive = f"{SD_DRIVE_LETTER.upper()}:\\"
-        if not os.path.exists(drive):
-            QMessageBox.warning(self, "Errore", "SD card non trovata")
+        if not all_files:
+            QMessageBox.information(self, "Info", "Nessuna foto trovata sulla SD card")
             return
 
-        # Crea cartella destinazione
-        date_str = datetime.now().strftime("%Y-%m-%d")
-        date_folder = os.path.join(DESTINATION_BASE, date_str)
-        os.makedirs(date_folder, exist_ok=True)
-
-        counter = 1
-        while True:
-            dest_folder = os.path.join(date_folder, str(counter))
-            if not os.path.exists(dest_folder):
-                break
-            counter += 1
-
-        os.makedirs(dest_folder, exist_ok=True)
-
-        # Trova foto
-        photo_files = []
-        for root, dirs, files in os.walk(drive):
-            for file in files:
-                if Path(file).suffix.lower() in {'.jpg', '.jpeg', '.png', '.heic', '.raw', '.cr2', '.nef', '.arw'}:
-                    photo_files.append(os.path.join(root, file))
-
+        # Solo file mai importati prima
+        photo_files = self.import_ledger.filter_new(all_files)
+        already_imported = len(all_files) - len(photo_files)
         if not photo_files:
-            QMessageBox.information(self, "Info", "Nessuna foto trovata sulla SD card")
+            QMessageBox.information(self, "Info",
+                                    f"Nessuna foto nuova sulla SD card\n"
+                                    f"({already_imported} già importate)")
             return
 
+        # Spazio libero su tutte le destinazioni, prima di creare qualsiasi cartella
+        ok, message = PhotoManager.check_free_space(photo_files,
+                                                    [DESTINATION_BASE] + BACKUP_DESTINATION_BASES)
+        if not ok:
+            QMessageBox.warning(self, "Spazio insufficiente", message)
+            return
+
+        # Crea cartella destinazione
+        dest_folder = PhotoManager.create_destination_folder()
+
         # Conferma
         action = "copiare"
         reply = QMessageBox.question(self, "Conferma",
-                                    f"Trovate {len(photo_files)} foto.\n"
+                                    f"Trovate {len(photo_files)} foto nuove"
+                                    f" ({already_imported} già importate).\n"
                                     f"Verranno {action} in:\n{dest_folder}\n\n"
                                     f"Continuare?",
                                     QMessageBox.Yes | QMessageBox.No)
@@ -749,35 +860,103 @@ class MainWindow(QMainWindow):
             return
 
         # Importa in thread
+        self.start_import_worker(ImportWorker(photo_files, dest_folder, False, self.import_ledger))
+
+    def start_import_worker(self, worker):
+        """Avvia un ImportWorker in un QThread"""
+        dest_folder = worker.dest_folder
         self.import_btn.setEnabled(False)
+        self.resume_btn.setVisible(False)
+        self.progress_bar.setMaximum(1000)
         self.progress_bar.setValue(0)
-        self.progress_bar.setMaximum(len(photo_files))
 
         self.import_thread = QThread()
-        self.import_worker = ImportWorker(photo_files, dest_folder, False)
+        self.import_worker = worker
         self.import_worker.moveToThread(self.import_thread)
 
-        self.import_worker.progress.connect(self.on_import_progress)
         self.import_worker.finished.connect(lambda c, e: self.on_import_finished(c, e, dest_folder))
         self.import_thread.started.connect(self.import_worker.run)
 
         self.import_thread.start()
+        self.import_progress_timer.start()
+
+    def on_sessions_found(self, sessions):
+        """Sessioni interrotte trovate da SDMonitor"""
+        self.incomplete_sessions = sessions
+        self.update_resume_button()
+
+    def update_resume_button(self):
+        """Mostra il pulsante di ripresa se esiste una sessione interrotta"""
+        if self.import_thread is not None and self.import_thread.isRunning():
+            return
+        sessions = self.incomplete_sessions
+        self.resume_btn.setVisible(bool(sessions))
+        if sessions:
+            self.resume_btn.setToolTip(sessions[0].dest_folder)
+
+    def resume_import(self):
+        """Riprende l'ultima importazione interrotta nella stessa cartella"""
+        # Riletto ora: l'elenco di SDMonitor può essere di qualche secondo fa
+        journal = None
+        if self.incomplete_sessions:
+            journal = ImportJournal.load(self.incomplete_sessions[0].dest_folder)
+        if journal is None or journal.complete:
+            self.incomplete_sessions = []
+            self.resume_btn.setVisible(False)
+            return
 
-    def on_import_progress(self, completed, total, filename):
-        """Aggiorna progress"""
-        self.progress_bar.setValue(completed)
-        progress = (completed / total) * 100
-        self.progress_label.setText(f"{progress:.0f}% - {filename}")
+        drive = get_sd_root()
+        ok, message = journal.check_source()
+        if not drive or journal.source_root != drive or not ok:
+            QMessageBox.warning(self, "Errore",
+                                f"Inserire la SD card dell'importazione interrotta\n"
+                                f"({journal.source_root})\n\n{message}")
+            return
+
+        remaining = len(journal.planned) - len(journal.done)
+        reply = QMessageBox.question(self, "Riprendi importazione",
+                                    f"Importazione interrotta in:\n{journal.dest_folder}\n\n"
+                                    f"{len(journal.done)} file già copiati, {remaining} da copiare.\n"
+                                    f"Continuare?",
+                                    QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+
+        self.start_import_worker(ImportWorker([], journal.dest_folder, False, self.import_ledger,
+                                              resume=True))
+
+    def on_import_progress(self):
+        """Aggiorna progress (timer a IMPORT_PROGRESS_HZ, solo se ci sono novità)"""
+        snapshot = self.import_worker.progress.poll()
+        if snapshot is None:
+            return
+        self.progress_bar.setValue(int(snapshot.percent * 10))
+        self.progress_label.setText(
+            f"{snapshot.percent:.0f}% - {snapshot.processed}/{snapshot.total} - "
+            f"{snapshot.mb_s:.1f} MB/s, {snapshot.files_s:.1f} file/s - "
+            f"ETA {snapshot.format_eta()} - {snapshot.current_file}")
 
     def on_import_finished(self, completed, errors, dest_folder):
         """Import completato"""
+        self.import_progress_timer.stop()
+        self.on_import_progress()
         self.import_thread.quit()
         self.import_thread.wait()
 
         result_text = f"Importate {completed} foto!" + (f" ({errors} errori)" if errors else "")
+        report = self.import_worker.report
+        if report is not None:
+            result_text += " ✓ Verificate" if report.verified else f" ⚠ {report.message}"
+        for folder, backup_report in self.import_worker.backup_reports.items():
+            if not backup_report.verified:
+                result_text += f" ⚠ Backup {folder}: {backup_report.message}"
         self.progress_label.setText(result_text)
+        self.status_bar.set_info(self.import_worker.stats.summary())
         self.import_btn.setEnabled(True)
 
+        # Prossima SD in coda: parte subito, mentre questa cartella carica le miniature
+        self.start_next_auto_import()
+
         # Differire caricamento per evitare timeout
         QTimer.singleShot(100, lambda: self.load_folder(dest_folder))
         QTimer.singleShot(200, self.check_sd_card)
@@ -814,33 +993,73 @@ class MainWindow(QMainWindow):
         folder_display = folder_path if len(folder_path) <= 50 else "..." + folder_path[-47:]
         self.folder_label.setText(folder_display)
 
-        # Trova foto
-        self.all_photos = []
+        # Trova foto (immagini + RAW senza JPEG gemello)
         try:
-            for file in os.listdir(folder_path):
-                filepath = os.path.join(folder_path, file)
-                if os.path.isfile(filepath) and Path(file).suffix.lower() in {'.jpg', '.jpeg', '.png', '.heic'}:
-                    self.all_photos.append(filepath)
+            photos = PhotoManager.load_photos_from_folder(folder_path)
         except Exception as e:
+            self.catalog.load([])
             self.status_bar.set_status("Errore caricamento", C['danger'])
             QMessageBox.critical(self, "Errore", f"Impossibile leggere la cartella:\n{e}")
             return
 
-        self.all_photos.sort()
+        self.catalog.load(photos)
         self.current_page = 0
-        self.selected_photos.clear()
         self.thumbnail_cache.clear()
+        self.thumbnail_loader.cancel()
+        for cell in self.thumbnail_widgets:
+            cell.reset()
         self.secondary_window.clear_cache()
 
         QApplication.processEvents()
-        self.folder_info_label.setText(f"📷 {len(self.all_photos)} foto")
+        self.folder_info_label.setText(f"📷 {len(self.catalog)} foto")
         self.update_displays()
 
-        self.status_bar.set_status(f"Caricate {len(self.all_photos)} foto", C['success'])
+        self.status_bar.set_status(f"Caricate {len(self.catalog)} foto", C['success'])
+
+    def prefetch_adjacent_pages(self, display_photos, total_pages):
+        """Prefetch delle pagine vicine (N±1, N±2, ...), prima nella direzione di scorrimento"""
+        if self.current_page != self.last_page:
+            self.page_direction = 1 if self.current_page > self.last_page else -1
+            self.last_page = self.current_page
+
+        d = self.page_direction
+        ahead = [d * n for n in range(1, THUMBNAIL_PREFETCH_PAGES + 1)]
+        paths = []
+        for offset in ahead + [-o for o in ahead]:
+            page = self.current_page + offset
+            if 0 <= page < total_pages:
+                paths.extend(display_photos[page * PHOTOS_PER_PAGE:(page + 1) * PHOTOS_PER_PAGE])
+
+        self.thumbnail_loader.prefetch([p for p in paths if p not in self.thumbnail_cache])
+        if self.secondary_window.isVisible():
+            self.secondary_window.thumbnail_loader.prefetch(
+                [p for p in paths if p not in self.secondary_window.photo_cache])
+
+    def on_thumbnail_ready(self, photo_path, image):
+        """Miniatura decodificata: riempie la cella se la foto è ancora visibile"""
+        pixmap = QPixmap.fromImage(image)
+        self.thumbnail_cache[photo_path] = pixmap
+        for cell in self.thumbnail_widgets:
+            if cell.photo_path == photo_path:
+                cell.set_pixmap(pixmap)
+
+    def on_thumbnail_preview(self, photo_path, image):
+        """Anteprima EXIF provvisoria (non salvata: arriva poi la miniatura vera)"""
+        pixmap = QPixmap.fromImage(image).scaled(225, 150, Qt.KeepAspectRatio, Qt.FastTransformation)
+        for cell in self.thumbnail_widgets:
+            if cell.photo_path == photo_path and photo_path not in self.thumbnail_cache:
+                cell.set_pixmap(pixmap)
+
+    def on_thumbnail_failed(self, photo_path, error):
+        """Miniatura non decodificabile"""
+        print(f"Errore caricamento: {error}")
+        for cell in self.thumbnail_widgets:
+            if cell.photo_path == photo_path:
+                cell.set_pixmap(None)
 
     def toggle_filter(self):
         """Toggle filtro selezionate"""
-        if not self.selected_photos:
+        if not self.catalog.selected:
             return
 
         self.show_only_selected = not self.show_only_selected
@@ -856,11 +1075,8 @@ class MainWindow(QMainWindow):
         self.update_displays()
 
     def get_display_photos(self):
-        """Ritorna foto da visualizzare"""
-        if self.show_only_selected:
-            return [p for p in self.all_photos if p in self.selected_photos]
-        else:
-            return self.all_photos
+        """Ritorna foto da visualizzare (vista sul catalogo, senza copie)"""
+        return self.catalog.view(self.show_only_selected)
 
     def prev_page(self):
         """Pagina precedente"""
@@ -870,80 +1086,43 @@ class MainWindow(QMainWindow):
 
     def next_page(self):
         """Pagina successiva"""
-        display_photos = self.get_display_photos()
-        total_pages = (len(display_photos) + PHOTOS_PER_PAGE - 1) // PHOTOS_PER_PAGE
+        total_pages = self.catalog.page_count(PHOTOS_PER_PAGE, self.show_only_selected)
         if self.current_page < total_pages - 1:
             self.current_page += 1
             self.update_displays()
 
     def toggle_photo_selection(self, idx):
         """Toggle selezione foto"""
-        widget = self.thumbnail_widgets[idx]
+        cell = self.thumbnail_widgets[idx]
 
-        if widget['photo_path'] is None:
+        if cell.photo_path is None:
             return
 
-        photo_path = widget['photo_path']
-
-        if photo_path in self.selected_photos:
-            self.selected_photos.remove(photo_path)
-            if photo_path in self.photo_copies:
-                del self.photo_copies[photo_path]
-            widget['frame'].setStyleSheet(f"""
-                QFrame {{
-                    background-color: transparent;
-                    border: none;
-                }}
-            """)
-            widget['num_label'].setStyleSheet(f"background-color: rgba(0,0,0,180); color: {C['text_disabled']}; padding: 2px 6px; border-radius: 3px;")
-            widget['copies_spin'].setVisible(False)
+        photo_path = cell.photo_path
+
+        if self.catalog.is_selected(photo_path):
+            self.catalog.deselect(photo_path)
+            self.photo_copies.pop(photo_path, None)
+            cell.set_selected(False)
         else:
-            self.selected_photos.add(photo_path)
+            self.catalog.select(photo_path)
             self.photo_copies[photo_path] = 1
-            widget['frame'].setStyleSheet(f"""
-                QFrame {{
-                    background-color: transparent;
-                    border: 2px solid {C['success']};
-                    border-radius: 6px;
-                }}
-            """)
-            widget['num_label'].setStyleSheet(f"background-color: rgba(0,0,0,180); color: {C['success']}; padding: 2px 6px; border-radius: 3px; font-weight: bold;")
-            widget['copies_spin'].setVisible(True)
-            widget['copies_spin'].blockSignals(True)
-            widget['copies_spin'].setValue(1)
-            widget['copies_spin'].blockSignals(False)
-
-            # Disconnect previous connection if exists
-            if hasattr(widget, 'copies_signal_connection'):
-                try:
-                    widget['copies_spin'].valueChanged.disconnect(widget['copies_signal_connection'])
-                except (TypeError, RuntimeError):
-                    pass
-
-            # Create and connect new handler
-            widget['copies_signal_connection'] = lambda v, p=photo_path: self.update_copies(p, v)
-            widget['copies_spin'].valueChanged.connect(widget['copies_signal_connection'])
+            cell.set_selected(True, 1)
 
         # Aggiorna labels
-        self.selection_label.setText(f"{len(self.selected_photos)} foto selezionate")
-        self.print_btn.setEnabled(len(self.selected_photos) > 0)
-        self.filter_btn.setEnabled(len(self.selected_photos) > 0)
+        self.selection_label.setText(f"{len(self.catalog.selected)} foto selezionate")
+        self.print_btn.setEnabled(len(self.catalog.selected) > 0)
+        self.filter_btn.setEnabled(len(self.catalog.selected) > 0)
 
         if self.show_only_selected:
             self.update_displays()
         else:
-            self.secondary_window.update_display(self.all_photos, self.current_page,
-                                                self.selected_photos, self.show_only_selected)
+            self.secondary_window.update_selection(photo_path, self.catalog.is_selected(photo_path))
 
     def select_current_page(self):
         """Seleziona pagina corrente"""
-        display_photos = self.get_display_photos()
-        start_idx = self.current_page * PHOTOS_PER_PAGE
-        end_idx = min(start_idx + PHOTOS_PER_PAGE, len(display_photos))
-
-        for i in range(start_idx, end_idx):
-            photo = display_photos[i]
-            self.selected_photos.add(photo)
+        for photo in self.catalog.page(self.current_page, PHOTOS_PER_PAGE, self.show_only_selected):
+            self.catalog.select(photo)
             if photo not in self.photo_copies:
                 self.photo_copies[photo] = 1
 
@@ -951,15 +1130,15 @@ class MainWindow(QMainWindow):
 
     def select_all(self):
         """Seleziona tutte"""
-        self.selected_photos = set(self.all_photos)
-        for photo in self.all_photos:
+        self.catalog.select_all()
+        for photo in self.catalog:
             if photo not in self.photo_copies:
                 self.photo_copies[photo] = 1
         self.update_displays()
 
     def deselect_all(self):
         """Deseleziona tutte"""
-        self.selected_photos.clear()
+        self.catalog.clear_selection()
         self.photo_copies.clear()
 
         if self.show_only_selected:
@@ -972,7 +1151,7 @@ class MainWindow(QMainWindow):
     def update_displays(self):
         """Aggiorna display"""
         display_photos = self.get_display_photos()
-        total_pages = (len(display_photos) + PHOTOS_PER_PAGE - 1) // PHOTOS_PER_PAGE if display_photos else 0
+        total_pages = self.catalog.page_count(PHOTOS_PER_PAGE, self.show_only_selected)
 
         if self.current_page >= total_pages and total_pages > 0:
             self.current_page = total_pages - 1
@@ -982,97 +1161,33 @@ class MainWindow(QMainWindow):
         self.prev_btn.setEnabled(self.current_page > 0)
         self.next_btn.setEnabled(self.current_page < total_pages - 1)
 
-        self.selection_label.setText(f"{len(self.selected_photos)} foto selezionate")
-        self.print_btn.setEnabled(len(self.selected_photos) > 0)
-        self.filter_btn.setEnabled(len(self.selected_photos) > 0)
+        self.selection_label.setText(f"{len(self.catalog.selected)} foto selezionate")
+        self.print_btn.setEnabled(len(self.catalog.selected) > 0)
+        self.filter_btn.setEnabled(len(self.catalog.selected) > 0)
 
         # Aggiorna griglia
         start_idx = self.current_page * PHOTOS_PER_PAGE
-        end_idx = min(start_idx + PHOTOS_PER_PAGE, len(display_photos))
-        page_photos = display_photos[start_idx:end_idx] if display_photos else []
+        page_photos = self.catalog.page(self.current_page, PHOTOS_PER_PAGE, self.show_only_selected)
 
-        for i, widget in enumerate(self.thumbnail_widgets):
+        # Miniature mancanti decodificate in background (le richieste vecchie vengono annullate)
+        self.thumbnail_loader.request_page([p for p in page_photos if p not in self.thumbnail_cache])
+        self.prefetch_adjacent_pages(display_photos, total_pages)
+
+        # Solo le celle cambiate vengono toccate
+        for i, cell in enumerate(self.thumbnail_widgets):
             if i < len(page_photos):
                 photo_path = page_photos[i]
-                widget['photo_path'] = photo_path
-
-                try:
-                    global_num = self.all_photos.index(photo_path) + 1
-                except ValueError:
-                    global_num = start_idx + i + 1
-
-                widget['num_label'].setText(f"#{global_num}")
-
-                # Carica thumbnail
-                if photo_path in self.thumbnail_cache:
-                    pixmap = self.thumbnail_cache[photo_path]
-                else:
-                    try:
-                        # Carica direttamente da file
-                        pixmap = QPixmap(photo_path)
-                        if pixmap.isNull():
-                            raise Exception("Impossibile caricare immagine")
-
-                        # Scala mantenendo proporzioni
-                        pixmap = pixmap.scaled(225, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        self.thumbnail_cache[photo_path] = pixmap
-                    except Exception as e:
-                        print(f"Errore caricamento: {e}")
-                        pixmap = QPixmap()
-
-                widget['photo_label'].setPixmap(pixmap)
-
-                # Evidenzia se selezionata
-                if photo_path in self.selected_photos:
-                    widget['frame'].setStyleSheet(f"""
-                        QFrame {{
-                            background-color: transparent;
-                            border: 2px solid {C['success']};
-                            border-radius: 6px;
-                        }}
-                    """)
-                    widget['num_label'].setStyleSheet(f"background-color: rgba(0,0,0,180); color: {C['success']}; padding: 2px 6px; border-radius: 3px; font-weight: bold;")
-                    widget['copies_spin'].setVisible(True)
-                    widget['copies_spin'].blockSignals(True)
-                    widget['copies_spin'].setValue(self.photo_copies.get(photo_path, 1))
-                    widget['copies_spin'].blockSignals(False)
-
-                    # Disconnect previous connection if exists
-                    if hasattr(widget, 'copies_signal_connection'):
-                        try:
-                            widget['copies_spin'].valueChanged.disconnect(widget['copies_signal_connection'])
-                        except (TypeError, RuntimeError):
-                            pass
-
-                    # Create and connect new handler
-                    widget['copies_signal_connection'] = lambda v, p=photo_path: self.update_copies(p, v)
-                    widget['copies_spin'].valueChanged.connect(widget['copies_signal_connection'])
-                else:
-                    widget['frame'].setStyleSheet(f"""
-                        QFrame {{
-                            background-color: transparent;
-                            border: none;
-                        }}
-                    """)
-                    widget['num_label'].setStyleSheet(f"background-color: rgba(0,0,0,180); color: {C['text_disabled']}; padding: 2px 6px; border-radius: 3px;")
-                    widget['copies_spin'].setVisible(False)
-
+                selected = self.catalog.is_selected(photo_path)
+                global_num = self.catalog.number(photo_path) or start_idx + i + 1
+                if cell.show(photo_path, global_num, selected, self.photo_copies.get(photo_path, 1)):
+                    # Thumbnail: subito se in memoria, altrimenti segnaposto fino a on_thumbnail_ready
+                    cell.set_pixmap(self.thumbnail_cache.get(photo_path), "⏳")
             else:
                 # Cella vuota
-                widget['photo_path'] = None
-                widget['num_label'].setText("")
-                widget['copies_spin'].setVisible(False)
-                widget['photo_label'].clear()
-                widget['frame'].setStyleSheet(f"""
-                    QFrame {{
-                        background-color: transparent;
-                        border: none;
-                    }}
-                """)
+                cell.show(None)
 
         # Aggiorna finestra secondaria
-        self.secondary_window.update_display(self.all_photos, self.current_page,
-                                           self.selected_photos, self.show_only_selected)
+        self.secondary_window.update_display(self.catalog, self.current_page, self.show_only_selected)
 
     def load_printers(self):
         """Carica stampanti"""
@@ -1087,7 +1202,7 @@ class MainWindow(QMainWindow):
 
     def print_photos(self):
         """Stampa foto"""
-        if not self.selected_photos:
+        if not self.catalog.selected:
             return
 
         printer_name = self.printer_combo.currentText()
@@ -1095,8 +1210,8 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Errore", "Seleziona una stampante")
             return
 
-        num_photos = len(self.selected_photos)
-        total_prints = sum(self.photo_copies.get(p, 1) for p in self.selected_photos)
+        num_photos = len(self.catalog.selected)
+        total_prints = sum(self.photo_copies.get(p, 1) for p in self.catalog.selected)
 
         reply = QMessageBox.question(self, "Conferma Stampa",
                                     f"Stampare {num_photos} foto = {total_prints} fogli totali\n"
@@ -1151,7 +1266,8 @@ class MainWindow(QMainWindow):
         self.print_manager.printer_var = PrinterVar(printer_name)
 
         # Stampa
-        photos_with_copies = [(p, self.photo_copies.get(p, 1)) for p in sorted(self.selected_photos)]
+        photos_with_copies = [(p, self.photo_copies.get(p, 1))
+                              for p in self.catalog.selected_photos()]
         self.print_manager.print_photos_with_spooler(
             photos=photos_with_copies,
             printer_name=printer_name,
@@ -1163,6 +1279,19 @@ class MainWindow(QMainWindow):
 
         progress_dialog.exec()
 
+    def changeEvent(self, event):
+        """Ridotta a icona: libera gran parte delle miniature in memoria"""
+        if event.type() == QEvent.WindowStateChange and self.isMinimized():
+            pixmap_cache.trim(int(pixmap_cache.budget * PIXMAP_CACHE_TRIM_FRACTION))
+        super().changeEvent(event)
+
+    def closeEvent(self, event):
+        """Chiusura: ferma il monitor SD e salva gli accessi alla cache miniature"""
+        self.sd_monitor.stop()
+        shutdown_decoders()
+        thumbnail_cache.close()
+        super().closeEvent(event)
+
 
 def main():
     """Avvia applicazione"""
@@ -0,0 +1,247 @@
+"""
+SD Card Photo Importer - Command Line
+Importazione, verifica e cancellazione senza interfaccia grafica (nessun import Qt)
+
+Uso:
+    python -m sd_cli scan [--source I:\\] [--force]
+    python -m sd_cli import [--source I:\\] [--dest CARTELLA] [--cut] [--workers N]
+    python -m sd_cli import --resume CARTELLA
+    python -m sd_cli verify --dest CARTELLA [--source I:\\]
+    python -m sd_cli delete --dest CARTELLA [--source I:\\] --yes
+    python -m sd_cli sessions
+    python -m sd_cli prints [--date AAAA-MM-GG]
+
+Ogni evento viene scritto su stdout come una riga JSON ({"event": ...}).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+from config import PRINT_LOG_FILE
+from sd_scanner import sd_scanner, get_sd_root
+from photo_manager import PhotoManager
+from import_ledger import ImportLedger
+from import_journal import ImportJournal, find_incomplete_sessions
+from copy_engine import ImportStats
+
+
+def emit(event, **data):
+    """Scrive un evento JSON su stdout (una riga, flush immediato)"""
+    data = {'event': event, **data}
+    sys.stdout.write(json.dumps(data, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def _scan_source(source, force=False):
+    """Scansione della sorgente indicata (default: unità SD configurata)"""
+    source = source or get_sd_root()
+    if not source:
+        raise ValueError("Nessuna unità SD configurata")
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Sorgente non trovata: {source}")
+    return source, sd_scanner.scan(source, force=force)
+
+
+def _report_data(report):
+    return {
+        'method': report.method,
+        'verified': report.verified,
+        'message': report.message,
+        'matched': len(report.matched),
+        'missing': [f.path for f in report.missing],
+        'size_mismatch': [{'source': f.path, 'dest': dest_path, 'size': f.size, 'dest_size': size}
+                          for f, dest_path, size in report.size_mismatch],
+    }
+
+
+def _stats_data(stats):
+    return {
+        'workers': stats.workers,
+        'mb_s': round(stats.mb_s, 2),
+        'files_by_method': dict(stats.files_by_method),
+        'bytes_by_method': dict(stats.bytes_by_method),
+        'fallbacks': stats.fallbacks,
+    }
+
+
+# ===== Comandi =====
+
+def cmd_scan(args):
+    source, result = _scan_source(args.source, args.force)
+    photos = result.photos()
+    ledger = ImportLedger()
+    try:
+        new_count = ledger.count_new(photos)
+    finally:
+        ledger.close()
+    by_kind = Counter(f.kind for f in result.files)
+    emit('scan', source=source, files=result.count(), photos=len(photos), new=new_count,
+         total_size=result.total_size(), by_kind=dict(by_kind))
+    return 0
+
+
+def cmd_import(args):
+    stats = ImportStats()
+    started = time.monotonic()
+
+    def on_progress(completed, errors, filename, total):
+        emit('progress', completed=completed, errors=errors, total=total, file=filename,
+             elapsed=round(time.monotonic() - started, 3))
+
+    ledger = ImportLedger()
+    try:
+        if args.resume:
+            dest_folder = args.resume
+            emit('start', dest=dest_folder, resume=True)
+            completed, errors, error_list = PhotoManager.resume_import(
+                dest_folder, progress_callback=on_progress, max_workers=args.workers,
+                ledger=ledger, stats=stats)
+            verify_files = None
+        else:
+            source, result = _scan_source(args.source, args.force)
+            photos = result.photos()
+            if not args.all:
+                photos = ledger.filter_new(photos)
+            if not photos:
+                emit('done', completed=0, errors=0, message="Nessuna foto nuova da importare")
+                return 0
+
+            dest_folder = args.dest or PhotoManager.create_destination_folder()
+            os.makedirs(dest_folder, exist_ok=True)
+            backup_folders = [] if args.no_backup else PhotoManager.create_backup_folders(dest_folder)
+            emit('start', source=source, dest=dest_folder, backups=backup_folders,
+                 total=len(photos), total_size=sum(f.size for f in photos), cut=args.cut)
+
+            journal = ImportJournal.create(dest_folder, source, backup_folders)
+            completed, errors, error_list = PhotoManager.import_photos_batch(
+                photos, dest_folder, args.cut, progress_callback=on_progress,
+                max_workers=args.workers, ledger=ledger, stats=stats, journal=journal,
+                skip_imported=False, backup_folders=backup_folders)
+            verify_files = photos
+    finally:
+        ledger.close()
+
+    for filename, error in error_list:
+        emit('error', file=filename, error=error)
+
+    emit('done', dest=dest_folder, completed=completed, errors=errors,
+         seconds=round(time.monotonic() - started, 3), stats=_stats_data(stats))
+
+    # Verifica del batch (in modalità taglia le sorgenti non esistono più)
+    verified = True
+    if verify_files is not None and not args.cut and not args.no_verify:
+        report = PhotoManager.verify_import(source, dest_folder, verify_files)
+        emit('verify', dest=dest_folder, **_report_data(report))
+        verified = report.verified
+
+    return 0 if errors == 0 and verified else 1
+
+
+def cmd_verify(args):
+    source, result = _scan_source(args.source, args.force)
+    report = PhotoManager.verify_import(source, args.dest, result.photos())
+    emit('verify', source=source, dest=args.dest, **_report_data(report))
+    return 0 if report.verified else 1
+
+
+def cmd_delete(args):
+    source, result = _scan_source(args.source, args.force)
+    report = PhotoManager.verify_import(source, args.dest, result.photos())
+    emit('verify', source=source, dest=args.dest, **_report_data(report))
+    if not args.yes:
+        emit('delete', success=False, message="Cancellazione non confermata (usa --yes)")
+        return 1
+
+    success, message = PhotoManager.safe_delete_from_sd(report)
+    emit('delete', success=success, message=message)
+    return 0 if success else 1
+
+
+def cmd_sessions(args):
+    for journal in find_incomplete_sessions():
+        emit('session', dest=journal.dest_folder, source=journal.source_root,
+             created=journal.created, planned=len(journal.planned), done=len(journal.done))
+    return 0
+
+
+def cmd_prints(args):
+    try:
+        with open(PRINT_LOG_FILE, 'r', encoding='utf-8') as f:
+            prints = json.load(f).get('prints', [])
+    except FileNotFoundError:
+        prints = []
+
+    if args.date:
+        prints = [p for p in prints if p.get('date') == args.date]
+
+    photos_by_layout = Counter()
+    photos_by_printer = Counter()
+    for job in prints:
+        photos_by_layout[job.get('layout')] += job.get('num_photos', 0)
+        photos_by_printer[job.get('printer')] += job.get('num_photos', 0)
+
+    emit('prints', jobs=len(prints), photos=sum(photos_by_layout.values()),
+         by_layout=dict(photos_by_layout), by_printer=dict(photos_by_printer))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m sd_cli",
+                                     description="SD Card Photo Importer da riga di comando")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_source(p):
+        p.add_argument('--source', help="Radice sorgente (default: unità SD configurata)")
+        p.add_argument('--force', action='store_true', help="Ignora la cache dello scanner")
+
+    p = commands.add_parser('scan', help="Conta foto e foto nuove sulla SD")
+    add_source(p)
+    p.set_defaults(func=cmd_scan)
+
+    p = commands.add_parser('import', help="Importa le foto nuove")
+    add_source(p)
+    p.add_argument('--dest', help="Cartella destinazione (default: <base>/<data>/<n>)")
+    p.add_argument('--cut', action='store_true', help="Sposta invece di copiare")
+    p.add_argument('--workers', type=int, help="Thread fissi (default: auto-regolati)")
+    p.add_argument('--all', action='store_true', help="Reimporta anche le foto già importate")
+    p.add_argument('--no-backup', action='store_true', help="Ignora BACKUP_DESTINATION_BASES")
+    p.add_argument('--no-verify', action='store_true', help="Salta la verifica finale")
+    p.add_argument('--resume', metavar='CARTELLA', help="Riprende una sessione interrotta")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser('verify', help="Verifica una cartella importata")
+    add_source(p)
+    p.add_argument('--dest', required=True, help="Cartella destinazione")
+    p.set_defaults(func=cmd_verify)
+
+    p = commands.add_parser('delete', help="Cancella dalla SD dopo la verifica")
+    add_source(p)
+    p.add_argument('--dest', required=True, help="Cartella destinazione")
+    p.add_argument('--yes', action='store_true', help="Conferma la cancellazione")
+    p.set_defaults(func=cmd_delete)
+
+    p = commands.add_parser('sessions', help="Elenca le importazioni interrotte")
+    p.set_defaults(func=cmd_sessions)
+
+    p = commands.add_parser('prints', help="Riepilogo dello storico stampe")
+    p.add_argument('--date', help="Solo le stampe di un giorno (AAAA-MM-GG)")
+    p.set_defaults(func=cmd_prints)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        emit('failed', command=args.command, error=str(e))
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+SD Card Photo Importer - SD Monitor (PySide6)
+Rilevamento SD e conteggio foto in background (polling del punto di mount)
+"""
+
+import os
+import time
+import threading
+
+from PySide6.QtCore import QThread, Signal
+
+from config import SD_POLL_INTERVAL
+from sd_scanner import sd_scanner, get_sd_root
+from import_journal import find_incomplete_sessions
+
+
+class SDMonitor(QThread):
+    """
+    Controlla inserimento/rimozione della SD e la scansiona fuori dal thread GUI.
+
+    Ogni SD_POLL_INTERVAL secondi verifica la presenza della radice (una stat,
+    nessuna visita); all'inserimento o su richiesta (refresh) scansiona la
+    scheda inviando conteggi parziali. refresh() ignora la cache dello
+    scanner (su FAT le cartelle non cambiano mtime quando arriva una foto).
+    All'avvio e a ogni refresh cerca anche le importazioni interrotte (una
+    visita di DESTINATION_BASE, che cresce nel tempo o può essere in rete).
+    Alla GUI arrivano solo segnali di stato.
+    """
+
+    card_inserted = Signal(str)          # radice
+    card_removed = Signal()
+    scan_progress = Signal(str, int)     # radice, file trovati finora
+    scan_finished = Signal(str, int, int)  # radice, foto, foto nuove
+    scan_failed = Signal(str, str)       # radice, errore
+    sessions_found = Signal(list)        # ImportJournal interrotti, dal più recente
+
+    # Intervallo minimo tra due conteggi parziali (secondi)
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, ledger=None, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        self._wake = threading.Event()
+        self._stop = False
+        self._refresh = True
+        self._force = False
+        self._find_sessions = True
+        self._present_root = None
+
+    def refresh(self):
+        """Richiede una nuova scansione completa (es. F5 o fine importazione)"""
+        self._force = True
+        self._find_sessions = True
+        self._refresh = True
+        self._wake.set()
+
+    def stop(self):
+        """Ferma il monitor e attende la fine del thread"""
+        self._stop = True
+        self._wake.set()
+        self.wait()
+
+    def run(self):
+        while not self._stop:
+            refresh, self._refresh = self._refresh, False
+            force, self._force = self._force, False
+            find_sessions, self._find_sessions = self._find_sessions, False
+            if find_sessions:
+                self.sessions_found.emit(find_incomplete_sessions())
+
+            root = get_sd_root()
+            present = bool(root) and os.path.exists(root)
+
+            if present and root != self._present_root:
+                self._present_root = root
+                refresh = True
+                self.card_inserted.emit(root)
+            elif not present and (self._present_root is not None or refresh):
+                if self._present_root is not None:
+                    sd_scanner.invalidate(self._present_root)
+                self._present_root = None
+                self.card_removed.emit()
+
+            if present and refresh:
+                self._scan(root, force)
+
+            self._wake.wait(SD_POLL_INTERVAL)
+            self._wake.clear()
+
+    def _scan(self, root, force=False):
+        last_emit = [0.0]
+
+        def on_progress(found):
+            now = time.monotonic()
+            if now - last_emit[0] >= self.PROGRESS_INTERVAL:
+                last_emit[0] = now
+                self.scan_progress.emit(root, found)
+
+        try:
+            photos = sd_scanner.scan(root, force=force, progress_callback=on_progress).photos()
+            new_count = self.ledger.count_new(photos) if self.ledger is not None else len(photos)
+        except OSError as e:
+            self.scan_failed.emit(root, str(e))
+            return
+        self.scan_finished.emit(root, len(photos), new_count)
@@ -0,0 +1,211 @@
+"""
+SD Card Photo Importer - SD Scanner
+Scansione unica della scheda SD (os.scandir) con risultato riutilizzabile
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+
+from config import SD_DRIVE_LETTER, SD_MOUNT_PATH, IMAGE_EXTENSIONS, RAW_EXTENSIONS, VIDEO_EXTENSIONS
+
+
+# Classi di estensione
+KIND_IMAGE = 'image'
+KIND_RAW = 'raw'
+KIND_VIDEO = 'video'
+PHOTO_KINDS = (KIND_IMAGE, KIND_RAW)
+
+_EXTENSION_KINDS = {}
+_EXTENSION_KINDS.update({ext: KIND_IMAGE for ext in IMAGE_EXTENSIONS})
+_EXTENSION_KINDS.update({ext: KIND_RAW for ext in RAW_EXTENSIONS})
+_EXTENSION_KINDS.update({ext: KIND_VIDEO for ext in VIDEO_EXTENSIONS})
+
+
+def get_sd_root():
+    """
+    Restituisce la radice della scheda SD configurata
+
+    Returns:
+        str or None: Percorso radice (es. "I:\\") o None se non configurata
+    """
+    if SD_MOUNT_PATH:
+        return SD_MOUNT_PATH
+    if not SD_DRIVE_LETTER:
+        return None
+    return f"{SD_DRIVE_LETTER.upper()}:\\"
+
+
+def classify_extension(filename):
+    """
+    Classe di estensione di un file
+
+    Returns:
+        str or None: KIND_IMAGE, KIND_RAW, KIND_VIDEO o None se non gestito
+    """
+    return _EXTENSION_KINDS.get(os.path.splitext(filename)[1].lower())
+
+
+@dataclass(frozen=True)
+class ScannedFile:
+    """File trovato sulla scheda SD"""
+    path: str
+    rel_path: str
+    size: int
+    mtime: float
+    kind: str
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+@dataclass
+class ScanResult:
+    """Risultato di una scansione completa della scheda"""
+    root: str
+    signature: tuple
+    files: list = field(default_factory=list)
+
+    def select(self, *kinds):
+        """Lista dei file delle classi richieste (tutte se nessuna indicata)"""
+        if not kinds:
+            return list(self.files)
+        return [f for f in self.files if f.kind in kinds]
+
+    def photos(self):
+        """File foto (immagini + RAW), esclusi i video"""
+        return self.select(*PHOTO_KINDS)
+
+    def count(self, *kinds):
+        """Numero di file delle classi richieste"""
+        return len(self.select(*kinds))
+
+    def total_size(self, *kinds):
+        """Dimensione totale in byte dei file delle classi richieste"""
+        return sum(f.size for f in self.select(*kinds))
+
+
+def scan_tree(root, progress_callback=None):
+    """
+    Visita iterativa con os.scandir (stat solo sui file gestiti), senza cache
+
+    Args:
+        root: Cartella da visitare
+        progress_callback: Funzione chiamata dopo ogni cartella con il numero
+                           di file trovati fino a quel momento
+
+    Returns:
+        list: ScannedFile ordinati per percorso relativo
+    """
+    files = []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            it = os.scandir(current)
+        except OSError:
+            # Es. "System Volume Information" non accessibile
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    kind = classify_extension(entry.name)
+                    if kind is None:
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                files.append(ScannedFile(
+                    path=entry.path,
+                    rel_path=os.path.relpath(entry.path, root),
+                    size=st.st_size,
+                    mtime=st.st_mtime,
+                    kind=kind,
+                ))
+        if progress_callback:
+            progress_callback(len(files))
+    files.sort(key=lambda f: f.rel_path)
+    return files
+
+
+class SDScanner:
+    """
+    Scansiona la scheda SD una sola volta e riusa il risultato.
+
+    La cache è per radice/dispositivo e viene invalidata quando cambia la
+    firma della radice (dispositivo, mtime della radice e delle cartelle
+    di primo e secondo livello, es. DCIM/100CANON dove arrivano le foto).
+    Su FAT l'mtime delle cartelle non è sempre aggiornato: un aggiornamento
+    esplicito (F5) deve usare force=True.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _subdirs(path):
+        """Sottocartelle di una cartella con il loro mtime"""
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.name, entry.stat(follow_symlinks=False).st_mtime_ns))
+                except OSError:
+                    continue
+        return sorted(subdirs)
+
+    @staticmethod
+    def _root_signature(root):
+        """Firma economica della radice: una stat + un listing per cartella di primo livello"""
+        st = os.stat(root)
+        signature = []
+        for name, mtime in SDScanner._subdirs(root):
+            try:
+                children = tuple(SDScanner._subdirs(os.path.join(root, name)))
+            except OSError:
+                children = ()
+            signature.append((name, mtime, children))
+        return (st.st_dev, st.st_mtime_ns, tuple(signature))
+
+    def scan(self, root, force=False, progress_callback=None):
+        """
+        Scansiona una radice (usando la cache se ancora valida)
+
+        Args:
+            root: Radice da scansionare (es. scheda SD)
+            force: Se True ignora la cache
+            progress_callback: Conteggi parziali durante la visita (vedi scan_tree)
+
+        Returns:
+            ScanResult: Risultato della scansione
+        """
+        key = os.path.normcase(os.path.abspath(root))
+        signature = self._root_signature(root)
+
+        with self._lock:
+            cached = self._cache.get(key)
+        if not force and cached is not None and cached.signature == signature:
+            return cached
+
+        result = ScanResult(root=root, signature=signature, files=scan_tree(root, progress_callback))
+        with self._lock:
+            self._cache[key] = result
+        return result
+
+    def invalidate(self, root=None):
+        """Invalida la cache di una radice (o di tutte)"""
+        with self._lock:
+            if root is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(os.path.normcase(os.path.abspath(root)), None)
+
+
+# Scanner condiviso da interfaccia e PhotoManager
+sd_scanner = SDScanner()
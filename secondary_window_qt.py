@@ -8,6 +8,8 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap, QFont, QCursor
 
 from config import GRID_ROWS, GRID_COLUMNS, PHOTOS_PER_PAGE, C
+from thumbnails_qt import ThumbnailLoader
+from photo_grid_qt import GridCell, SECONDARY_CELL_STYLE
 
 
 class SecondaryDisplayWindow(QWidget):
@@ -17,7 +19,10 @@ class SecondaryDisplayWindow(QWidget):
         super().__init__()
         self.main_window = main_window
         self.is_fullscreen = False
-        self.photo_cache = {}
+        self.thumbnail_loader = ThumbnailLoader(600, 800, self)
+        self.photo_cache = self.thumbnail_loader.pixmaps
+        self.thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.thumbnail_loader.thumbnail_failed.connect(self.on_thumbnail_failed)
 
         self.setWindowTitle("Visualizzatore Foto")
         self.setGeometry(100, 100, 1600, 900)
@@ -35,14 +40,9 @@ class SecondaryDisplayWindow(QWidget):
         self.photo_widgets = []
         for row in range(GRID_ROWS):
             for col in range(GRID_COLUMNS):
-                # Frame foto (minimal)
+                # Frame foto (minimal): la selezione cambia solo una proprietà dinamica
                 photo_frame = QFrame()
-                photo_frame.setStyleSheet(f"""
-                    QFrame {{
-                        background-color: {C['dark_bg']};
-                        border: none;
-                    }}
-                """)
+                photo_frame.setStyleSheet(SECONDARY_CELL_STYLE)
 
                 # Layout frame
                 frame_layout = QVBoxLayout(photo_frame)
@@ -68,12 +68,7 @@ class SecondaryDisplayWindow(QWidget):
                 photo_frame.mousePressEvent = lambda e, i=idx: self.on_photo_click(i)
 
                 self.grid_layout.addWidget(photo_frame, row, col)
-                self.photo_widgets.append({
-                    'frame': photo_frame,
-                    'num_label': num_label,
-                    'label': photo_label,
-                    'photo_path': None
-                })
+                self.photo_widgets.append(GridCell(photo_frame, photo_label, num_label))
 
         main_layout.addLayout(self.grid_layout, 1)
         self.setLayout(main_layout)
@@ -116,21 +111,18 @@ class SecondaryDisplayWindow(QWidget):
 
     def on_photo_click(self, idx):
         """Gestisce click su foto per selezione"""
-        widget = self.photo_widgets[idx]
+        photo_path = self.photo_widgets[idx].photo_path
 
-        if widget['photo_path'] is None:
+        if photo_path is None:
             return
 
-        photo_path = widget['photo_path']
-
         # Notifica la finestra principale per aggiornare selezione
         if self.main_window:
             # Trova l'indice nella griglia principale
             try:
                 # Calcola l'indice nella pagina corrente della main window
-                display_photos = self.main_window.get_display_photos()
-                start_idx = self.main_window.current_page * PHOTOS_PER_PAGE
-                page_photos = display_photos[start_idx:start_idx + PHOTOS_PER_PAGE]
+                page_photos = self.main_window.catalog.page(self.main_window.current_page, PHOTOS_PER_PAGE,
+                                                            self.main_window.show_only_selected)
 
                 if idx < len(page_photos) and page_photos[idx] == photo_path:
                     # Chiama il toggle sulla main window
@@ -141,81 +133,60 @@ class SecondaryDisplayWindow(QWidget):
     def clear_cache(self):
         """Pulisce cache immagini"""
         self.photo_cache.clear()
-
-    def update_display(self, all_photos, current_page, selected_photos, show_only_selected):
-        """Aggiorna visualizzazione foto"""
-        # Determina foto da visualizzare
-        if show_only_selected:
-            display_photos = [p for p in all_photos if p in selected_photos]
-        else:
-            display_photos = all_photos
-
-        # Calcola pagina
-        total_pages = (len(display_photos) + PHOTOS_PER_PAGE - 1) // PHOTOS_PER_PAGE if display_photos else 0
-
+        self.thumbnail_loader.cancel()
+        for cell in self.photo_widgets:
+            cell.reset()
+
+    def update_display(self, catalog, current_page, show_only_selected):
+        """
+        Aggiorna visualizzazione foto
+
+        Args:
+            catalog: PhotoCatalog della finestra principale (foto e selezione)
+            current_page: Pagina corrente (da 0)
+            show_only_selected: Mostra solo le foto selezionate
+        """
         # Foto della pagina corrente
         start_idx = current_page * PHOTOS_PER_PAGE
-        end_idx = min(start_idx + PHOTOS_PER_PAGE, len(display_photos))
-        page_photos = display_photos[start_idx:end_idx] if display_photos else []
+        page_photos = catalog.page(current_page, PHOTOS_PER_PAGE, show_only_selected)
+
+        # Immagini mancanti decodificate in background (le richieste vecchie vengono annullate)
+        self.thumbnail_loader.request_page([p for p in page_photos if p not in self.photo_cache])
 
-        # Aggiorna griglia
-        for i, widget in enumerate(self.photo_widgets):
+        # Aggiorna griglia (solo le celle cambiate)
+        for i, cell in enumerate(self.photo_widgets):
             if i < len(page_photos):
                 photo_path = page_photos[i]
-                widget['photo_path'] = photo_path
-
-                # Numero foto
-                try:
-                    global_num = all_photos.index(photo_path) + 1
-                except ValueError:
-                    global_num = start_idx + i + 1
-                widget['num_label'].setText(f"#{global_num}")
-
-                # Carica immagine
-                if photo_path in self.photo_cache:
-                    pixmap = self.photo_cache[photo_path]
-                else:
-                    try:
-                        # Carica direttamente da file con Qt
-                        pixmap = QPixmap(photo_path)
-                        if pixmap.isNull():
-                            raise Exception("Impossibile caricare immagine")
-
-                        # Scala a dimensione grande per riempire
-                        pixmap = pixmap.scaled(600, 800, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        self.photo_cache[photo_path] = pixmap
-                    except Exception as e:
-                        print(f"Errore caricamento: {e}")
-                        pixmap = QPixmap()
-
-                widget['label'].setPixmap(pixmap)
-
-                # Evidenzia SOLO se selezionata (minimal)
-                if photo_path in selected_photos:
-                    widget['frame'].setStyleSheet(f"""
-                        QFrame {{
-                            background-color: {C['dark_bg']};
-                            border: 4px solid {C['success']};
-                        }}
-                    """)
-                else:
-                    widget['frame'].setStyleSheet(f"""
-                        QFrame {{
-                            background-color: {C['dark_bg']};
-                            border: none;
-                        }}
-                    """)
+                global_num = catalog.number(photo_path) or start_idx + i + 1
+                if cell.show(photo_path, global_num, catalog.is_selected(photo_path)):
+                    # Immagine: subito se in memoria, altrimenti vuota fino a on_thumbnail_ready
+                    cell.set_pixmap(self.photo_cache.get(photo_path))
             else:
                 # Cella vuota
-                widget['photo_path'] = None
-                widget['num_label'].setText("")
-                widget['label'].clear()
-                widget['frame'].setStyleSheet(f"""
-                    QFrame {{
-                        background-color: {C['dark_bg']};
-                        border: none;
-                    }}
-                """)
+                cell.show(None)
+
+    def update_selection(self, photo_path, selected):
+        """Evidenzia o meno una sola foto (nessun ridisegno della griglia)"""
+        for cell in self.photo_widgets:
+            if cell.photo_path == photo_path:
+                cell.set_selected(selected)
+
+    def on_thumbnail_ready(self, photo_path, image):
+        """Immagine decodificata: riempie la cella se la foto è ancora visibile"""
+        pixmap = QPixmap.fromImage(image)
+        self.photo_cache[photo_path] = pixmap
+        for cell in self.photo_widgets:
+            if cell.photo_path == photo_path:
+                cell.set_pixmap(pixmap)
+
+    def on_thumbnail_failed(self, photo_path, error):
+        """Immagine non decodificabile"""
+        print(f"Errore caricamento: {error}")
+
+    def hideEvent(self, event):
+        """Finestra nascosta: le immagini grandi non servono più in memoria"""
+        self.photo_cache.trim()
+        super().hideEvent(event)
 
     def toggle_fullscreen(self):
         """Toggle fullscreen"""
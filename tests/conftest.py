@@ -0,0 +1,8 @@
+"""
+Configurazione pytest: i moduli dell'applicazione sono nella radice del repository
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,162 @@
+"""
+Test della copia lato kernel e dei suoi fallback (copy_file_range/sendfile simulati)
+"""
+
+import os
+import errno
+
+import pytest
+
+import copy_engine
+from copy_engine import (copy_with_hash, hash_file, ImportStats, METHOD_COPY_FILE_RANGE,
+                         METHOD_SENDFILE, METHOD_BUFFERED)
+
+# Le chiamate simulate usano pread/pwrite (copia lato kernel: solo Linux)
+pytestmark = pytest.mark.skipif(not hasattr(os, 'pread'), reason="pread/pwrite non disponibili")
+
+
+def _pread_copy(src_fd, dst_fd, count, offset):
+    data = os.pread(src_fd, count, offset)
+    os.pwrite(dst_fd, data, offset)
+    return len(data)
+
+
+def fake_copy_file_range(src_fd, dst_fd, count, offset_src, offset_dst):
+    return _pread_copy(src_fd, dst_fd, count, offset_src)
+
+
+def fake_sendfile(out_fd, in_fd, offset, count):
+    return _pread_copy(in_fd, out_fd, count, offset)
+
+
+@pytest.fixture
+def kernel(monkeypatch):
+    """Chiamate kernel simulate (stesse firme di os) e memoria dei fallback vuota"""
+    calls = []
+
+    def install(copy_file_range=fake_copy_file_range, sendfile=fake_sendfile):
+        def traced(name, fn):
+            def wrapper(*args):
+                calls.append(name)
+                return fn(*args)
+            return wrapper
+        monkeypatch.setattr(os, 'copy_file_range',
+                            traced(METHOD_COPY_FILE_RANGE, copy_file_range), raising=False)
+        monkeypatch.setattr(os, 'sendfile', traced(METHOD_SENDFILE, sendfile), raising=False)
+        return calls
+
+    monkeypatch.setattr(copy_engine.sys, 'platform', 'linux')
+    monkeypatch.setattr(copy_engine, '_unsupported', set())
+    return install
+
+
+@pytest.fixture
+def photo(tmp_path):
+    source = tmp_path / "IMG_0001.JPG"
+    source.write_bytes(os.urandom(300_000))
+    return str(source), str(tmp_path / "copy.JPG")
+
+
+def _same(source, dest):
+    with open(source, 'rb') as a, open(dest, 'rb') as b:
+        return a.read() == b.read()
+
+
+def test_copy_file_range_is_used_when_supported(kernel, photo):
+    calls = kernel()
+    source, dest = photo
+    stats = ImportStats()
+
+    size, digest = copy_with_hash(source, dest, stats=stats)
+
+    assert calls and set(calls) == {METHOD_COPY_FILE_RANGE}
+    assert _same(source, dest) and digest == hash_file(source)
+    assert stats.files_by_method == {METHOD_COPY_FILE_RANGE: 1}
+    assert stats.bytes_by_method[METHOD_COPY_FILE_RANGE] == size
+    assert stats.fallbacks == 0
+
+
+def test_zero_bytes_at_offset_zero_falls_back_to_buffered_copy(kernel, photo):
+    kernel(copy_file_range=lambda *args: 0, sendfile=lambda *args: 0)
+    source, dest = photo
+    stats = ImportStats()
+
+    copy_with_hash(source, dest, stats=stats)
+
+    assert _same(source, dest)
+    assert stats.files_by_method == {METHOD_BUFFERED: 1}
+    assert stats.fallbacks == 1
+    assert {method for method, _ in copy_engine._unsupported} == {METHOD_COPY_FILE_RANGE,
+                                                                  METHOD_SENDFILE}
+
+
+def test_exdev_falls_back_to_sendfile_and_is_remembered(kernel, photo, tmp_path):
+    def cross_device(*args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    calls = kernel(copy_file_range=cross_device)
+    source, dest = photo
+    stats = ImportStats()
+
+    copy_with_hash(source, dest, stats=stats)
+    calls.clear()
+    copy_with_hash(source, str(tmp_path / "copy2.JPG"), stats=stats)
+
+    # Seconda copia: copy_file_range non viene ritentato per la stessa coppia di dispositivi
+    assert calls and set(calls) == {METHOD_SENDFILE}
+    assert stats.files_by_method == {METHOD_SENDFILE: 2}
+    assert stats.fallbacks == 2
+
+
+def test_enosys_falls_back_to_buffered_copy(kernel, photo):
+    def missing(*args):
+        raise OSError(errno.ENOSYS, "Function not implemented")
+
+    kernel(copy_file_range=missing, sendfile=missing)
+    source, dest = photo
+    stats = ImportStats()
+
+    copy_with_hash(source, dest, stats=stats)
+
+    assert _same(source, dest)
+    assert stats.files_by_method == {METHOD_BUFFERED: 1}
+    assert stats.fallbacks == 1
+
+
+def test_zero_bytes_mid_file_raises_eio(kernel, photo):
+    state = {'calls': 0}
+
+    def stalls(src_fd, dst_fd, count, offset_src, offset_dst):
+        state['calls'] += 1
+        if state['calls'] > 1:
+            return 0
+        return _pread_copy(src_fd, dst_fd, min(count, 1000), offset_src)
+
+    kernel(copy_file_range=stalls)
+    source, dest = photo
+    stats = ImportStats()
+
+    with pytest.raises(OSError) as info:
+        copy_with_hash(source, dest, stats=stats)
+
+    assert info.value.errno == errno.EIO
+    assert not stats.files_by_method
+    # Non è "non supportato": il file successivo riprova copy_file_range
+    assert not copy_engine._unsupported
+
+
+def test_error_after_partial_copy_is_not_a_fallback(kernel, photo):
+    state = {'calls': 0}
+
+    def fails_mid_file(src_fd, dst_fd, count, offset_src, offset_dst):
+        state['calls'] += 1
+        if state['calls'] > 1:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return _pread_copy(src_fd, dst_fd, min(count, 1000), offset_src)
+
+    kernel(copy_file_range=fails_mid_file)
+    source, dest = photo
+
+    with pytest.raises(OSError):
+        copy_with_hash(source, dest, stats=ImportStats())
+    assert not copy_engine._unsupported
@@ -0,0 +1,136 @@
+"""
+Test delle anteprime incorporate (TIFF/EXIF costruiti in memoria)
+"""
+
+import struct
+
+from embedded_preview import (raw_preview, exif_thumbnail, TiffReader, TAG_COMPRESSION,
+                              TAG_STRIP_OFFSETS, TAG_STRIP_BYTE_COUNTS, TAG_SUB_IFDS,
+                              TAG_JPEG_OFFSET, TAG_JPEG_LENGTH)
+
+
+def _jpeg(sof, size):
+    """JPEG finto: SOI + marker SOF, riempito fino a size byte"""
+    data = b'\xff\xd8\xff' + bytes([sof]) + b'\x00\x11'
+    return data + bytes(size - len(data))
+
+
+def _tiff(ifds, blobs, chain=None):
+    """
+    TIFF little endian con una catena di IFD seguita dai dati
+
+    Args:
+        ifds: [{tag: valore}] (('blob', i) = offset del blob i, ('ifd', i) = offset dell'IFD i)
+        blobs: Dati referenziati dagli IFD
+        chain: IFD collegati nella catena principale (default: tutti); gli
+               altri sono raggiungibili solo tramite SubIFD
+    """
+    chain = len(ifds) if chain is None else chain
+    ifd_offsets = []
+    pos = 8
+    for tags in ifds:
+        ifd_offsets.append(pos)
+        pos += 2 + 12 * len(tags) + 4
+    blob_offsets = []
+    for blob in blobs:
+        blob_offsets.append(pos)
+        pos += len(blob)
+
+    def resolve(value):
+        if isinstance(value, tuple):
+            kind, i = value
+            return blob_offsets[i] if kind == 'blob' else ifd_offsets[i]
+        return value
+
+    out = bytearray(b'II' + struct.pack('<HI', 42, 8))
+    for n, tags in enumerate(ifds):
+        out += struct.pack('<H', len(tags))
+        for tag, value in sorted(tags.items()):
+            out += struct.pack('<HHII', tag, 4, 1, resolve(value))
+        next_ifd = ifd_offsets[n + 1] if n + 1 < chain else 0
+        out += struct.pack('<I', next_ifd)
+    for blob in blobs:
+        out += blob
+    return bytes(out)
+
+
+def _preview_tags(i, length):
+    return {TAG_JPEG_OFFSET: ('blob', i), TAG_JPEG_LENGTH: length}
+
+
+def _raw_tags(i, length):
+    return {TAG_COMPRESSION: 6, TAG_STRIP_OFFSETS: ('blob', i), TAG_STRIP_BYTE_COUNTS: length}
+
+
+def _write(tmp_path, data, name="IMG_0001.CR2"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_largest_viewable_preview_wins(tmp_path):
+    small, large = _jpeg(0xC0, 300), _jpeg(0xC2, 5000)
+    raw = _jpeg(0xC3, 20000)    # dati RAW lossless: il blocco più grande, da scartare
+    data = _tiff([_preview_tags(0, len(small)), _preview_tags(1, len(large)),
+                  _raw_tags(2, len(raw))], [small, large, raw])
+
+    assert raw_preview(_write(tmp_path, data)) == large
+
+
+def test_lossless_raw_data_alone_is_not_a_preview(tmp_path):
+    raw = _jpeg(0xC3, 20000)
+    data = _tiff([_raw_tags(0, len(raw))], [raw])
+
+    assert raw_preview(_write(tmp_path, data)) is None
+
+
+def test_preview_in_a_sub_ifd_is_found(tmp_path):
+    small, large = _jpeg(0xC0, 300), _jpeg(0xC0, 4000)
+    # IFD0 → SubIFD con l'anteprima grande (come nei NEF)
+    ifd0 = _preview_tags(0, len(small))
+    ifd0[TAG_SUB_IFDS] = ('ifd', 1)
+    data = _tiff([ifd0, _preview_tags(1, len(large))], [small, large], chain=1)
+
+    assert raw_preview(_write(tmp_path, data)) == large
+
+
+def test_truncated_ifd_returns_none(tmp_path):
+    large = _jpeg(0xC0, 5000)
+    data = _tiff([_preview_tags(0, len(large))], [large])
+
+    assert raw_preview(_write(tmp_path, data[:8 + 2 + 6])) is None
+
+
+def test_truncated_preview_data_returns_none(tmp_path):
+    large = _jpeg(0xC0, 5000)
+    data = _tiff([_preview_tags(0, len(large))], [large])
+
+    assert raw_preview(_write(tmp_path, data[:-100])) is None
+
+
+def test_ifd_loop_terminates():
+    data = bytearray(_tiff([{TAG_COMPRESSION: 1}], []))
+    struct.pack_into('<I', data, 8 + 2 + 12, 8)   # IFD0 → IFD0
+
+    assert len(list(TiffReader(bytes(data)).ifd_chain())) == 1
+
+
+def _exif_jpeg(tiff):
+    app1 = b'Exif\x00\x00' + tiff
+    return b'\xff\xd8\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1 + b'\xff\xda'
+
+
+def test_exif_thumbnail_from_ifd1(tmp_path):
+    thumb = _jpeg(0xC0, 800)
+    ifd1 = _preview_tags(0, len(thumb))
+    ifd1[TAG_COMPRESSION] = 6
+    tiff = _tiff([{TAG_COMPRESSION: 1}, ifd1], [thumb])
+
+    assert exif_thumbnail(_write(tmp_path, _exif_jpeg(tiff), "IMG_0001.JPG")) == thumb
+
+
+def test_exif_thumbnail_with_truncated_ifd_returns_none(tmp_path):
+    thumb = _jpeg(0xC0, 800)
+    tiff = _tiff([_preview_tags(0, len(thumb))], [thumb])
+
+    assert exif_thumbnail(_write(tmp_path, _exif_jpeg(tiff[:8 + 2 + 6]), "IMG_0001.JPG")) is None
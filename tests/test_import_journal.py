@@ -0,0 +1,180 @@
+"""
+Test del journal di importazione e della ripresa (nessuna dipendenza Qt)
+"""
+
+import os
+import errno
+
+import pytest
+
+import photo_manager
+from photo_manager import PhotoManager
+from import_journal import ImportJournal
+
+
+@pytest.fixture
+def card(tmp_path):
+    """SD finta con tre foto e una cartella destinazione vuota"""
+    source = tmp_path / "DCIM" / "100CANON"
+    source.mkdir(parents=True)
+    for i in range(1, 4):
+        (source / f"IMG_000{i}.JPG").write_bytes(os.urandom(1000 + i))
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    files = sorted(str(p) for p in source.iterdir())
+    return str(tmp_path / "DCIM"), files, str(dest)
+
+
+def _fail_on(name, monkeypatch):
+    """Copia che si interrompe a metà (SD estratta) per un file"""
+    real_copy = photo_manager.copy_with_hash
+
+    def flaky_copy(source_path, dest_path, **kwargs):
+        if os.path.basename(source_path) == name:
+            with open(dest_path, 'wb') as f:
+                f.write(b"\0" * os.path.getsize(source_path))   # coda preallocata a zero
+            raise OSError(errno.EIO, "SD estratta")
+        return real_copy(source_path, dest_path, **kwargs)
+
+    real_multi = photo_manager.copy_with_hash_multi
+
+    def flaky_multi(source_path, dest_paths, **kwargs):
+        if os.path.basename(source_path) == name:
+            for dest_path in dest_paths:
+                with open(dest_path, 'wb') as f:
+                    f.write(b"\0" * os.path.getsize(source_path))
+            raise OSError(errno.EIO, "SD estratta")
+        return real_multi(source_path, dest_paths, **kwargs)
+
+    monkeypatch.setattr(photo_manager, 'copy_with_hash', flaky_copy)
+    monkeypatch.setattr(photo_manager, 'copy_with_hash_multi', flaky_multi)
+
+
+def _photos(dest):
+    return sorted(os.path.basename(p) for p in PhotoManager.load_photos_from_folder(dest))
+
+
+def test_failed_copy_leaves_no_partial_file(card, monkeypatch):
+    root, files, dest = card
+    _fail_on("IMG_0002.JPG", monkeypatch)
+
+    completed, errors, _ = PhotoManager.import_photos_batch(
+        files, dest, max_workers=1, journal=ImportJournal.create(dest, root))
+
+    assert (completed, errors) == (2, 1)
+    assert _photos(dest) == ["IMG_0001.JPG", "IMG_0003.JPG"]
+
+
+def test_resume_copies_failed_file_under_its_own_name(card, monkeypatch):
+    root, files, dest = card
+    _fail_on("IMG_0002.JPG", monkeypatch)
+    PhotoManager.import_photos_batch(files, dest, max_workers=1,
+                                     journal=ImportJournal.create(dest, root))
+    monkeypatch.undo()
+
+    completed, errors, _ = PhotoManager.resume_import(dest, max_workers=1)
+
+    assert (completed, errors) == (1, 0)
+    assert _photos(dest) == ["IMG_0001.JPG", "IMG_0002.JPG", "IMG_0003.JPG"]
+    with open(os.path.join(dest, "IMG_0002.JPG"), 'rb') as f:
+        assert f.read() == open(files[1], 'rb').read()
+    assert ImportJournal.load(dest).complete
+
+
+def test_prepare_resume_removes_leftover_of_failed_copy(card):
+    root, files, dest = card
+    journal = ImportJournal.create(dest, root)
+    journal.plan(files)
+    leftover = os.path.join(dest, "IMG_0001.JPG")
+    journal.mark_started(files[0], leftover)
+    journal.mark_failed(files[0], "SD estratta", leftover)
+    journal.close()
+    # Residuo rimasto su disco (es. chiusura prima della pulizia)
+    with open(leftover, 'wb') as f:
+        f.write(b"\0" * 10)
+
+    pending = ImportJournal.load(dest).prepare_resume()
+
+    assert not os.path.exists(leftover)
+    assert pending == files
+
+
+def test_prepare_resume_keeps_completed_copies(card):
+    root, files, dest = card
+    PhotoManager.import_photos_batch(files[:2], dest, max_workers=1,
+                                     journal=ImportJournal.create(dest, root))
+
+    journal = ImportJournal.load(dest)
+    journal.plan(files)
+    pending = journal.prepare_resume()
+
+    assert pending == files[2:]
+    assert _photos(dest) == ["IMG_0001.JPG", "IMG_0002.JPG"]
+
+
+def test_resume_completes_the_backup_folders(card, tmp_path, monkeypatch):
+    root, files, dest = card
+    backup = str(tmp_path / "backup")
+    os.makedirs(backup)
+    _fail_on("IMG_0002.JPG", monkeypatch)
+    PhotoManager.import_photos_batch(files, dest, max_workers=1, backup_folders=[backup],
+                                     journal=ImportJournal.create(dest, root, [backup]))
+    monkeypatch.undo()
+    assert _photos(backup) == ["IMG_0001.JPG", "IMG_0003.JPG"]
+
+    completed, errors, _ = PhotoManager.resume_import(dest, max_workers=1)
+
+    assert (completed, errors) == (1, 0)
+    assert _photos(dest) == _photos(backup) == ["IMG_0001.JPG", "IMG_0002.JPG", "IMG_0003.JPG"]
+    with open(os.path.join(backup, "IMG_0002.JPG"), 'rb') as f:
+        assert f.read() == open(files[1], 'rb').read()
+    assert PhotoManager.verify_import(root, backup).verified
+
+
+def test_prepare_resume_removes_leftover_in_backup(card, tmp_path):
+    root, files, dest = card
+    backup = str(tmp_path / "backup")
+    os.makedirs(backup)
+    journal = ImportJournal.create(dest, root, [backup])
+    journal.plan(files)
+    journal.mark_started(files[0], os.path.join(dest, "IMG_0001.JPG"),
+                         [os.path.join(backup, "IMG_0001.JPG")])
+    journal.close()
+    # Interruzione a metà copia: residui in entrambe le cartelle
+    for folder in (dest, backup):
+        with open(os.path.join(folder, "IMG_0001.JPG"), 'wb') as f:
+            f.write(b"\0" * 10)
+
+    pending = ImportJournal.load(dest).prepare_resume()
+
+    assert pending == files
+    assert os.listdir(backup) == []
+
+
+def test_resume_refuses_a_different_card(card):
+    root, files, dest = card
+    journal = ImportJournal.create(dest, root)
+    journal.plan(files)
+    journal.close()
+    # Altra SD con gli stessi nomi (DCIM/100CANON/IMG_000n.JPG)
+    for path in files:
+        with open(path, 'wb') as f:
+            f.write(os.urandom(500))
+
+    ok, _ = ImportJournal.load(dest).check_source()
+    assert not ok
+    with pytest.raises(ValueError):
+        PhotoManager.resume_import(dest, max_workers=1)
+
+
+def test_truncated_last_line_is_ignored(card):
+    root, files, dest = card
+    journal = ImportJournal.create(dest, root)
+    journal.plan(files)
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "done", "sour')
+
+    reloaded = ImportJournal.load(dest)
+    assert list(reloaded.planned) == files
+    assert not reloaded.done
@@ -0,0 +1,36 @@
+"""
+Test del registro delle importazioni durante un batch
+"""
+
+import os
+import sqlite3
+
+from photo_manager import PhotoManager
+from import_ledger import ImportLedger
+
+
+class LockedLedger(ImportLedger):
+    """Registro con il database bloccato da un altro processo (es. la CLI)"""
+
+    def record(self, identity, dest_folder, content_hash=None):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_ledger_errors_do_not_stop_the_batch(tmp_path):
+    source = tmp_path / "sd"
+    source.mkdir()
+    for i in range(3):
+        (source / f"IMG_{i}.JPG").write_bytes(os.urandom(100))
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    files = sorted(str(p) for p in source.iterdir())
+
+    ledger = LockedLedger(str(tmp_path / "ledger.db"))
+    try:
+        completed, errors, _ = PhotoManager.import_photos_batch(
+            files, str(dest), max_workers=2, ledger=ledger)
+    finally:
+        ledger.close()
+
+    assert (completed, errors) == (3, 0)
+    assert len(PhotoManager.load_photos_from_folder(str(dest))) == 3
@@ -0,0 +1,68 @@
+"""
+Test della verifica O(n) di un'importazione
+"""
+
+import os
+
+from sd_scanner import scan_tree
+from copy_engine import ImportManifest, copy_with_hash
+from import_verifier import verify_with_scan, verify_with_manifest, verify_import
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b"x" * size)
+
+
+def test_similar_names_do_not_match(tmp_path):
+    # IMG_10.JPG nella destinazione non deve "coprire" IMG_1.JPG mancante
+    _write(str(tmp_path / "sd" / "IMG_1.JPG"), 100)
+    _write(str(tmp_path / "sd" / "IMG_10.JPG"), 100)
+    _write(str(tmp_path / "dest" / "IMG_10.JPG"), 100)
+
+    report = verify_with_scan(scan_tree(str(tmp_path / "sd")), str(tmp_path / "dest"))
+
+    assert [f.name for f in report.missing] == ["IMG_1.JPG"]
+    assert [f.name for f, _ in report.matched] == ["IMG_10.JPG"]
+    assert not report.verified
+
+
+def test_duplicates_from_two_cameras_match_their_suffixed_copies(tmp_path):
+    _write(str(tmp_path / "sd" / "100CANON" / "IMG_0001.JPG"), 100)
+    _write(str(tmp_path / "sd" / "101CANON" / "IMG_0001.JPG"), 200)
+    _write(str(tmp_path / "dest" / "IMG_0001.JPG"), 100)
+    _write(str(tmp_path / "dest" / "IMG_0001_1.JPG"), 200)
+
+    report = verify_with_scan(scan_tree(str(tmp_path / "sd")), str(tmp_path / "dest"))
+
+    assert report.verified
+    assert len(report.matched) == 2
+
+
+def test_truncated_copy_is_a_size_mismatch(tmp_path):
+    _write(str(tmp_path / "sd" / "IMG_0001.JPG"), 100)
+    _write(str(tmp_path / "dest" / "IMG_0001.JPG"), 40)
+
+    report = verify_with_scan(scan_tree(str(tmp_path / "sd")), str(tmp_path / "dest"))
+
+    assert not report.missing
+    assert [(f.name, size) for f, _, size in report.size_mismatch] == [("IMG_0001.JPG", 40)]
+
+
+def test_manifest_verification(tmp_path):
+    sd, dest = str(tmp_path / "sd"), str(tmp_path / "dest")
+    _write(os.path.join(sd, "IMG_1.JPG"), 100)
+    _write(os.path.join(sd, "IMG_2.JPG"), 100)
+    os.makedirs(dest)
+    manifest = ImportManifest.load_or_create(dest)
+    source = os.path.join(sd, "IMG_1.JPG")
+    dest_path = os.path.join(dest, "IMG_1.JPG")
+    manifest.add(source, dest_path, *copy_with_hash(source, dest_path))
+    manifest.save()
+
+    report = verify_with_manifest(scan_tree(sd), ImportManifest.load(dest))
+    assert [f.name for f in report.missing] == ["IMG_2.JPG"]
+
+    # verify_import sceglie il manifest quando c'è
+    assert verify_import(sd, dest, scan_tree(sd)).method == report.method
@@ -0,0 +1,82 @@
+"""
+Test della cache LRU in memoria con budget in byte
+"""
+
+import threading
+
+from memory_cache import ByteLRUCache, available_memory
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = ByteLRUCache(100)
+    for key in "abcd":
+        cache.put(key, key.upper(), 30)
+
+    assert "a" not in cache
+    assert cache.stats()['bytes'] == 90
+    assert cache.stats()['evictions'] == 1
+
+    cache.get("b")                 # "b" ora è il più recente
+    cache.put("e", "E", 30)
+    assert "c" not in cache and "b" in cache
+
+
+def test_counters():
+    cache = ByteLRUCache(100)
+    cache.put("a", 1, 10)
+    assert cache.get("a") == 1
+    assert cache.get("z") is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['items']) == (1, 1, 1)
+
+
+def test_oversized_value_does_not_flush_cache():
+    cache = ByteLRUCache(100)
+    cache.put("a", 1, 50)
+    cache.put("big", 2, 1000)
+    assert "a" in cache and "big" not in cache
+
+
+def test_replacing_a_key_updates_the_total():
+    cache = ByteLRUCache(100)
+    cache.put("a", 1, 50)
+    cache.put("a", 2, 20)
+    assert cache.stats()['bytes'] == 20
+    assert cache.get("a") == 2
+
+
+def test_trim_with_predicate():
+    cache = ByteLRUCache(1000)
+    for i in range(4):
+        cache.put(("p", i, "small"), i, 10)
+        cache.put(("p", i, "large"), i, 100)
+
+    freed = cache.trim(0, lambda key: key[2] == "large")
+
+    assert freed == 400
+    assert cache.stats()['bytes'] == 40
+    assert all(("p", i, "small") in cache for i in range(4))
+
+
+def test_concurrent_puts_respect_budget():
+    cache = ByteLRUCache(1000)
+
+    def worker(n):
+        for i in range(500):
+            cache.put((n, i), i, 7)
+            cache.get((n, i - 1))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cache.stats()
+    assert stats['bytes'] <= 1000
+    assert stats['bytes'] == stats['items'] * 7
+
+
+def test_available_memory_is_positive_or_unknown():
+    free = available_memory()
+    assert free is None or free > 0
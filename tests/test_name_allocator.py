@@ -0,0 +1,66 @@
+"""
+Test dell'assegnazione dei nomi destinazione
+"""
+
+import os
+import threading
+
+import pytest
+
+from name_allocator import DestinationNameAllocator
+
+
+def test_duplicate_names_get_suffixes_in_source_order(tmp_path):
+    allocator = DestinationNameAllocator(str(tmp_path))
+    sources = ["/sd/101CANON/IMG_0001.JPG", "/sd/100CANON/IMG_0001.JPG", "/sd/100CANON/IMG_0002.JPG"]
+
+    planned = allocator.plan(sources)
+
+    assert os.path.basename(planned["/sd/100CANON/IMG_0001.JPG"]) == "IMG_0001.JPG"
+    assert os.path.basename(planned["/sd/101CANON/IMG_0001.JPG"]) == "IMG_0001_1.JPG"
+    assert os.path.basename(planned["/sd/100CANON/IMG_0002.JPG"]) == "IMG_0002.JPG"
+
+
+def test_existing_files_are_never_reused(tmp_path):
+    (tmp_path / "IMG_0001.JPG").write_bytes(b"old")
+    (tmp_path / "IMG_0001_1.JPG").write_bytes(b"old")
+
+    allocator = DestinationNameAllocator(str(tmp_path))
+
+    assert os.path.basename(allocator.path_for("/sd/IMG_0001.JPG")) == "IMG_0001_2.JPG"
+
+
+def test_concurrent_allocations_are_unique(tmp_path):
+    allocator = DestinationNameAllocator(str(tmp_path))
+    sources = [f"/sd/{n:03d}CANON/IMG_0001.JPG" for n in range(200)]
+    results = []
+
+    def worker(chunk):
+        for source in chunk:
+            path = allocator.path_for(source)
+            allocator.create_exclusive(path)
+            results.append(path)
+
+    threads = [threading.Thread(target=worker, args=(sources[i::8],)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(results)) == len(sources)
+    assert len(os.listdir(tmp_path)) == len(sources)
+
+
+def test_name_taken_after_listing_is_reallocated(tmp_path):
+    allocator = DestinationNameAllocator(str(tmp_path))
+    path = allocator.path_for("/sd/IMG_0001.JPG")
+    # Un altro processo crea lo stesso nome dopo il listing
+    (tmp_path / "IMG_0001.JPG").write_bytes(b"other")
+
+    with pytest.raises(FileExistsError):
+        allocator.create_exclusive(path)
+    new_path = allocator.reallocate("/sd/IMG_0001.JPG")
+    allocator.create_exclusive(new_path)
+
+    assert os.path.basename(new_path) == "IMG_0001_1.JPG"
+    assert (tmp_path / "IMG_0001.JPG").read_bytes() == b"other"
@@ -0,0 +1,57 @@
+"""
+Test del catalogo foto (numerazione, pagine, vista delle selezionate)
+"""
+
+from photo_catalog import PhotoCatalog
+
+
+def _catalog(n=20):
+    return PhotoCatalog([f"/f/IMG_{i:04d}.JPG" for i in reversed(range(n))])
+
+
+def test_photos_are_sorted_and_numbered():
+    catalog = _catalog()
+    assert catalog.photos[0] == "/f/IMG_0000.JPG"
+    assert catalog.number("/f/IMG_0010.JPG") == 11
+    assert catalog.number("/f/altro.JPG") is None
+
+
+def test_pages():
+    catalog = _catalog(20)
+    assert catalog.page_count(9) == 3
+    assert catalog.page(2, 9) == ["/f/IMG_0018.JPG", "/f/IMG_0019.JPG"]
+    assert catalog.page(5, 9) == []
+
+
+def test_selected_view_follows_catalog_order():
+    catalog = _catalog()
+    for i in (15, 3, 8):
+        assert catalog.select(f"/f/IMG_{i:04d}.JPG")
+    assert not catalog.select("/f/IMG_0003.JPG")     # già selezionata
+    assert not catalog.select("/f/altro.JPG")        # non nel catalogo
+
+    assert list(catalog.view(selected_only=True)) == [
+        "/f/IMG_0003.JPG", "/f/IMG_0008.JPG", "/f/IMG_0015.JPG"]
+    assert catalog.page(1, 2, selected_only=True) == ["/f/IMG_0015.JPG"]
+    assert catalog.page_count(2, selected_only=True) == 2
+
+    assert catalog.deselect("/f/IMG_0008.JPG")
+    assert not catalog.deselect("/f/IMG_0008.JPG")
+    assert catalog.selected_photos() == ["/f/IMG_0003.JPG", "/f/IMG_0015.JPG"]
+
+
+def test_select_all_and_clear():
+    catalog = _catalog(5)
+    catalog.select_all()
+    assert catalog.selected_photos() == catalog.photos
+    catalog.clear_selection()
+    assert len(catalog.view(selected_only=True)) == 0
+    assert not catalog.selected
+
+
+def test_load_resets_selection():
+    catalog = _catalog(5)
+    catalog.select("/f/IMG_0001.JPG")
+    catalog.load(["/g/b.JPG", "/g/a.JPG"])
+    assert catalog.photos == ["/g/a.JPG", "/g/b.JPG"]
+    assert not catalog.selected
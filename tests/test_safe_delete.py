@@ -0,0 +1,178 @@
+"""
+Test della cancellazione verificata dalla SD
+"""
+
+import os
+
+import photo_manager
+import safe_delete
+from sd_scanner import scan_tree
+from photo_manager import PhotoManager
+from import_ledger import ImportLedger
+from safe_delete import delete_verified
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_card_split_across_sessions_is_cleared_folder_by_folder(tmp_path):
+    # A importata in d1, B aggiunta dopo e importata (sola) in d2 grazie al ledger
+    sd = str(tmp_path / "sd")
+    d1, d2 = str(tmp_path / "d1"), str(tmp_path / "d2")
+    os.makedirs(d1)
+    os.makedirs(d2)
+    ledger = ImportLedger(str(tmp_path / "ledger.db"))
+    try:
+        _write(os.path.join(sd, "DCIM", "IMG_A.JPG"), os.urandom(500))
+        PhotoManager.import_photos_batch(scan_tree(sd), d1, max_workers=1, ledger=ledger)
+        _write(os.path.join(sd, "DCIM", "IMG_B.JPG"), os.urandom(700))
+        PhotoManager.import_photos_batch(scan_tree(sd), d2, max_workers=1, ledger=ledger)
+    finally:
+        ledger.close()
+    assert os.listdir(d2) != [] and "IMG_A.JPG" not in os.listdir(d2)
+
+    report = PhotoManager.verify_import(sd, d2, scan_tree(sd))
+    success, message = PhotoManager.safe_delete_from_sd(report)
+    assert success, message
+    assert sorted(os.listdir(os.path.join(sd, "DCIM"))) == ["IMG_A.JPG"]
+
+    report = PhotoManager.verify_import(sd, d1, scan_tree(sd))
+    success, message = PhotoManager.safe_delete_from_sd(report)
+    assert success, message
+    assert os.listdir(os.path.join(sd, "DCIM")) == []
+
+
+def test_files_missing_from_the_folder_stay_on_the_card(tmp_path):
+    sd = str(tmp_path / "sd")
+    dest = str(tmp_path / "dest")
+    _write(os.path.join(sd, "IMG_1.JPG"), b"a" * 100)
+    _write(os.path.join(sd, "IMG_2.JPG"), b"b" * 100)
+    _write(os.path.join(sd, "IMG_3.JPG"), b"c" * 100)
+    _write(os.path.join(dest, "IMG_1.JPG"), b"a" * 100)
+    _write(os.path.join(dest, "IMG_3.JPG"), b"c" * 50)     # troncato
+
+    report = PhotoManager.verify_import(sd, dest, scan_tree(sd))
+    success, message = PhotoManager.safe_delete_from_sd(report)
+
+    assert success
+    assert "1 lasciati sulla SD (non in questa destinazione)" in message
+    assert "1 lasciati sulla SD (dimensione diversa)" in message
+    assert sorted(os.listdir(sd)) == ["IMG_2.JPG", "IMG_3.JPG"]
+
+
+def test_nothing_verified_deletes_nothing(tmp_path):
+    sd = str(tmp_path / "sd")
+    dest = str(tmp_path / "dest")
+    _write(os.path.join(sd, "IMG_1.JPG"), b"a" * 100)
+    os.makedirs(dest)
+
+    report = PhotoManager.verify_import(sd, dest, scan_tree(sd))
+    success, message = PhotoManager.safe_delete_from_sd(report)
+
+    assert not success
+    assert message.startswith("Impossibile cancellare")
+    assert os.listdir(sd) == ["IMG_1.JPG"]
+
+
+# ===== delete_verified =====
+
+def test_hash_mismatch_is_kept(tmp_path):
+    source = str(tmp_path / "sd" / "IMG_1.JPG")
+    dest = str(tmp_path / "dest" / "IMG_1.JPG")
+    _write(source, b"a" * 100)
+    _write(dest, b"b" * 100)     # stessa dimensione, contenuto diverso
+
+    report = delete_verified([(source, dest)])
+
+    assert report.hash_mismatch == [(source, dest)]
+    assert not report.deleted and not report.success
+    assert os.path.exists(source)
+
+
+def test_missing_source_is_reported(tmp_path):
+    missing = str(tmp_path / "sd" / "IMG_1.JPG")
+    source = str(tmp_path / "sd" / "IMG_2.JPG")
+    dest = str(tmp_path / "dest" / "IMG_2.JPG")
+    _write(source, b"a" * 100)
+    _write(dest, b"a" * 100)
+
+    report = delete_verified([(missing, str(tmp_path / "dest" / "IMG_1.JPG")), (source, dest)])
+
+    assert [s for s, _ in report.errors] == [missing]
+    assert report.deleted == [source]
+    assert not report.success
+
+
+def test_sources_are_deleted_after_their_destinations_are_synced(tmp_path, monkeypatch):
+    pairs = []
+    for i in range(3):
+        source = str(tmp_path / "sd" / f"IMG_{i}.JPG")
+        dest = str(tmp_path / "dest" / f"IMG_{i}.JPG")
+        _write(source, bytes([i]) * 100)
+        _write(dest, bytes([i]) * 100)
+        pairs.append((source, dest))
+
+    events = []
+    real_fsync, real_remove = safe_delete._fsync_file, os.remove
+    monkeypatch.setattr(safe_delete, '_fsync_file',
+                        lambda path: (events.append(('fsync', path)), real_fsync(path)))
+    monkeypatch.setattr(safe_delete.os, 'remove',
+                        lambda path: (events.append(('remove', path)), real_remove(path)))
+
+    report = delete_verified(pairs)
+
+    assert report.success and sorted(report.deleted) == [s for s, _ in pairs]
+    kinds = [kind for kind, _ in events]
+    assert kinds == ['fsync'] * 3 + ['remove'] * 3
+    assert {path for kind, path in events if kind == 'fsync'} == {d for _, d in pairs}
+
+
+# ===== Modalità taglia =====
+
+def _card(tmp_path, count=3):
+    source = tmp_path / "sd" / "DCIM"
+    source.mkdir(parents=True)
+    for i in range(count):
+        (source / f"IMG_{i}.JPG").write_bytes(os.urandom(1000 + i))
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    return sorted(str(p) for p in source.iterdir()), str(dest)
+
+
+def test_cut_mode_moves_verified_files(tmp_path):
+    files, dest = _card(tmp_path)
+    contents = [open(path, 'rb').read() for path in files]
+
+    completed, errors, _ = PhotoManager.import_photos_batch(files, dest, cut_mode=True,
+                                                            max_workers=2)
+
+    assert (completed, errors) == (3, 0)
+    assert not any(os.path.exists(path) for path in files)
+    for path, data in zip(files, contents):
+        with open(os.path.join(dest, os.path.basename(path)), 'rb') as f:
+            assert f.read() == data
+
+
+def test_cut_mode_keeps_sources_whose_copy_differs(tmp_path, monkeypatch):
+    files, dest = _card(tmp_path)
+    real_copy = photo_manager.copy_with_hash
+
+    def corrupting_copy(source_path, dest_path, **kwargs):
+        # Corruzione silenziosa: l'hash della sorgente non corrisponde più alla copia
+        result = real_copy(source_path, dest_path, **kwargs)
+        if source_path == files[1]:
+            with open(dest_path, 'r+b') as f:
+                f.write(b"\xff")
+        return result
+
+    monkeypatch.setattr(photo_manager, 'copy_with_hash', corrupting_copy)
+
+    completed, errors, error_list = PhotoManager.import_photos_batch(
+        files, dest, cut_mode=True, max_workers=1)
+
+    assert errors == 1
+    assert [name for name, _ in error_list] == [os.path.basename(files[1])]
+    assert [os.path.exists(path) for path in files] == [False, True, False]
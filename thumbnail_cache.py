@@ -0,0 +1,184 @@
+"""
+SD Card Photo Importer - Thumbnail Cache
+Miniature su disco (indice SQLite + file JPEG) con budget in byte ed eliminazione LRU
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from config import THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_BYTES
+
+
+class ThumbnailCache:
+    """
+    Cache persistente delle miniature, condivisa da tutte le finestre.
+
+    La chiave è (percorso, dimensione, mtime, larghezza, altezza): se la foto
+    cambia la vecchia miniatura non viene più trovata e sparisce con l'LRU.
+    I file sono già codificati (JPEG): chi legge li decodifica a costo
+    trascurabile. Gli accessi vengono scritti sull'indice a blocchi.
+    """
+
+    # Accessi tenuti in memoria prima di aggiornare l'indice
+    _TOUCH_BATCH = 64
+    # Dopo un'eliminazione si scende a questa frazione del budget
+    _EVICT_TARGET = 0.9
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, budget=THUMBNAIL_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total = 0
+        self._touched = {}     # {chiave: ultimo accesso} non ancora scritti
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self):
+        """Apre l'indice al primo utilizzo (chiamato con il lock)"""
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, "index.db"),
+                                         timeout=10, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS thumbnails (
+                        key TEXT PRIMARY KEY,
+                        bytes INTEGER NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS thumbnails_lru ON thumbnails (last_access)")
+            self._total = self._conn.execute(
+                "SELECT COALESCE(SUM(bytes), 0) FROM thumbnails").fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def make_key(photo_path, width, height):
+        """
+        Chiave di una miniatura
+
+        Returns:
+            str or None: Chiave esadecimale (None se la foto non esiste)
+        """
+        try:
+            st = os.stat(photo_path)
+        except OSError:
+            return None
+        raw = f"{os.path.normcase(os.path.abspath(photo_path))}|{st.st_size}|{st.st_mtime_ns}|{width}x{height}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _file_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".jpg")
+
+    def lookup(self, photo_path, width, height):
+        """
+        Miniatura già presente
+
+        Returns:
+            str or None: Percorso del file miniatura
+        """
+        key = self.make_key(photo_path, width, height)
+        if key is None:
+            return None
+        thumb_path = self._file_for(key)
+
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT 1 FROM thumbnails WHERE key = ?", (key,)).fetchone()
+            if row is None or not os.path.exists(thumb_path):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self._TOUCH_BATCH:
+                self._flush_touches()
+        return thumb_path
+
+    def store(self, photo_path, width, height, data):
+        """
+        Salva una miniatura già codificata
+
+        Args:
+            photo_path: Foto originale
+            width, height: Dimensione richiesta della miniatura
+            data: Byte del file miniatura (JPEG)
+
+        Returns:
+            str or None: Percorso del file miniatura
+        """
+        key = self.make_key(photo_path, width, height)
+        if key is None:
+            return None
+        thumb_path = self._file_for(key)
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+
+        tmp_path = f"{thumb_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, thumb_path)
+
+        with self._lock:
+            db = self._db()
+            with db:
+                old = db.execute("SELECT bytes FROM thumbnails WHERE key = ?", (key,)).fetchone()
+                db.execute("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?)",
+                           (key, len(data), time.time()))
+            self._total += len(data) - (old[0] if old else 0)
+            if self._total > self.budget:
+                self._evict()
+        return thumb_path
+
+    def _flush_touches(self):
+        """Scrive gli accessi in sospeso (chiamato con il lock)"""
+        if not self._touched:
+            return
+        with self._conn:
+            self._conn.executemany("UPDATE thumbnails SET last_access = ? WHERE key = ?",
+                                   [(t, key) for key, t in self._touched.items()])
+        self._touched.clear()
+
+    def _evict(self):
+        """Elimina le miniature usate meno di recente (chiamato con il lock)"""
+        self._flush_touches()
+        target = self.budget * self._EVICT_TARGET
+        victims = []
+        for key, size in self._conn.execute(
+                "SELECT key, bytes FROM thumbnails ORDER BY last_access"):
+            if self._total <= target:
+                break
+            victims.append((key,))
+            self._total -= size
+
+        with self._conn:
+            self._conn.executemany("DELETE FROM thumbnails WHERE key = ?", victims)
+        for (key,) in victims:
+            try:
+                os.remove(self._file_for(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Statistiche della cache (per log/status bar)"""
+        with self._lock:
+            self._db()
+            return {'bytes': self._total, 'budget': self.budget,
+                    'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """Scrive gli accessi in sospeso e chiude l'indice"""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches()
+                self._conn.close()
+                self._conn = None
+
+
+# Cache condivisa da finestra principale e finestra secondaria
+thumbnail_cache = ThumbnailCache()
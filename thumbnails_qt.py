@@ -0,0 +1,464 @@
+"""
+SD Card Photo Importer - Thumbnails (PySide6)
+Miniature decodificate in un pool di thread tramite la cache su disco condivisa
+"""
+
+import threading
+
+from PySide6.QtCore import (Qt, QObject, QRunnable, QThreadPool, Signal, QBuffer, QByteArray,
+                            QIODevice, QSize)
+from PySide6.QtGui import QImage, QImageReader
+
+from config import (THUMBNAIL_CACHE_QUALITY, THUMBNAIL_DECODE_THREADS, PIXMAP_CACHE_BYTES,
+                    THUMBNAIL_PREFETCH_BYTES, THUMBNAIL_PREFETCH_MIN_FREE_MEMORY)
+from thumbnail_cache import thumbnail_cache
+from memory_cache import ByteLRUCache, available_memory
+from embedded_preview import exif_thumbnail, is_raw_file, raw_preview
+
+
+# Pool condiviso dalle finestre: i decoder non competono con il thread GUI
+_decode_pool = QThreadPool()
+_decode_pool.setMaxThreadCount(THUMBNAIL_DECODE_THREADS)
+
+# Riquadri richiesti dalle finestre: una decodifica li produce tutti
+_pyramid_sizes = set()
+# Decodifiche in corso: chi chiede la stessa foto attende invece di rileggerla
+_inflight = {}     # {percorso: _Decode}
+_inflight_lock = threading.Lock()
+
+# Pixmap in memoria delle due finestre, chiave (percorso, larghezza, altezza)
+pixmap_cache = ByteLRUCache(PIXMAP_CACHE_BYTES)
+
+
+class _Decode:
+    """Decodifica in corso di una foto (risultato condiviso tra i thread)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.images = {}   # {(larghezza, altezza): QImage}
+
+
+def register_size(width, height):
+    """Aggiunge un riquadro alla piramide prodotta da ogni decodifica"""
+    with _inflight_lock:
+        _pyramid_sizes.add((width, height))
+
+
+def _fit(size, width, height):
+    """Dimensione di size dentro il riquadro (mai ingrandita)"""
+    if size.width() <= width and size.height() <= height:
+        return size
+    return size.scaled(QSize(width, height), Qt.KeepAspectRatio)
+
+
+def decode_pyramid(photo_path, sizes):
+    """
+    Decodifica una foto una sola volta e ne ricava tutti i riquadri richiesti
+
+    Con setScaledSize il decoder JPEG lavora a 1/2, 1/4 o 1/8 della
+    risoluzione (la scala più piccola non inferiore al riquadro più grande)
+    e Qt rifinisce solo il resto; i riquadri più piccoli vengono ricavati
+    dall'immagine già ridotta, senza rileggere il file.
+
+    I RAW vengono letti dalla loro anteprima JPEG incorporata.
+
+    Args:
+        photo_path: Foto originale
+        sizes: Riquadri (larghezza, altezza)
+
+    Returns:
+        dict: {(larghezza, altezza): QImage} (vuoto se la foto non è leggibile)
+    """
+    if is_raw_file(photo_path):
+        data = raw_preview(photo_path)
+        if data is None:
+            return {}
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer, b"jpg")
+    else:
+        reader = QImageReader(photo_path)
+
+    original = reader.size()
+    if original.isValid():
+        fits = {size: _fit(original, *size) for size in sizes}
+        largest = max(fits.values(), key=lambda s: s.width() * s.height())
+        if largest != original:
+            reader.setScaledSize(largest)
+            reader.setQuality(100)   # rifinitura con filtro smooth
+    image = reader.read()
+    if image.isNull():
+        return {}
+
+    images = {}
+    for width, height in sizes:
+        fit = _fit(image.size(), width, height)
+        # Formati senza supporto alla riduzione in decodifica e riquadri minori
+        images[(width, height)] = image if fit == image.size() else \
+            image.scaled(fit, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return images
+
+
+def decode_scaled(photo_path, width, height):
+    """
+    Decodifica una foto già ridotta al riquadro width x height
+
+    Returns:
+        QImage: Immagine ridotta (nulla se la foto non è leggibile)
+    """
+    return decode_pyramid(photo_path, [(width, height)]).get((width, height), QImage())
+
+
+def _store(photo_path, images):
+    """
+    Salva in cache su disco tutti i livelli della piramide
+
+    Returns:
+        int: Byte scritti in cache
+    """
+    written = 0
+    for (width, height), image in images.items():
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "JPG", THUMBNAIL_CACHE_QUALITY)
+        buffer.close()
+        try:
+            thumbnail_cache.store(photo_path, width, height, bytes(data))
+            written += data.size()
+        except OSError as e:
+            print(f"Errore cache miniature: {e}")
+    return written
+
+
+def load_thumbnail_image(photo_path, width, height):
+    """
+    Miniatura come QImage (utilizzabile anche fuori dal thread GUI)
+
+    Se la miniatura è in cache legge il piccolo JPEG; altrimenti decodifica
+    la foto una volta sola per tutti i riquadri registrati (register_size)
+    e li salva per le volte successive. Se un altro thread sta già
+    decodificando la stessa foto ne attende il risultato.
+
+    Args:
+        photo_path: Foto originale
+        width, height: Riquadro massimo della miniatura
+
+    Returns:
+        QImage: Miniatura
+
+    Raises:
+        ValueError: Se la foto non può essere decodificata
+    """
+    return _load_image(photo_path, width, height)[0]
+
+
+def _load_image(photo_path, width, height):
+    """
+    Come load_thumbnail_image, indicando anche i byte scritti in cache
+
+    Returns:
+        tuple: (image: QImage, stored: int)
+    """
+    cached = thumbnail_cache.lookup(photo_path, width, height)
+    if cached:
+        image = QImage(cached)
+        if not image.isNull():
+            return image, 0
+
+    with _inflight_lock:
+        decode = _inflight.get(photo_path)
+        owner = decode is None
+        if owner:
+            decode = _inflight[photo_path] = _Decode()
+            sizes = _pyramid_sizes | {(width, height)}
+
+    stored = 0
+    if owner:
+        try:
+            decode.images = decode_pyramid(photo_path, sizes)
+            stored = _store(photo_path, decode.images)
+        finally:
+            with _inflight_lock:
+                del _inflight[photo_path]
+            decode.event.set()
+        image = decode.images.get((width, height))
+    else:
+        decode.event.wait()
+        image = decode.images.get((width, height))
+        if image is None:
+            # Riquadro non previsto dalla decodifica in corso
+            image = decode_scaled(photo_path, width, height)
+            if not image.isNull():
+                stored = _store(photo_path, {(width, height): image})
+
+    if image is None or image.isNull():
+        raise ValueError("Impossibile caricare immagine")
+    return image, stored
+
+
+def shutdown_decoders():
+    """Svuota la coda del pool e attende i task in corso (chiusura applicazione)"""
+    _decode_pool.clear()
+    _decode_pool.waitForDone()
+
+
+def pixmap_bytes(pixmap):
+    """Memoria occupata da una pixmap"""
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapView:
+    """
+    Pixmap di un solo riquadro dentro pixmap_cache, con l'interfaccia di un
+    dizionario {percorso: QPixmap} (solo thread GUI)
+    """
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+
+    def _mine(self, key):
+        return key[1:] == self.size
+
+    def __contains__(self, photo_path):
+        return (photo_path, *self.size) in pixmap_cache
+
+    def get(self, photo_path):
+        return pixmap_cache.get((photo_path, *self.size))
+
+    def __setitem__(self, photo_path, pixmap):
+        pixmap_cache.put((photo_path, *self.size), pixmap, pixmap_bytes(pixmap))
+
+    def clear(self):
+        pixmap_cache.clear(self._mine)
+
+    def trim(self, target=0):
+        """Libera le pixmap di questo riquadro (finestra nascosta)"""
+        return pixmap_cache.trim(target, self._mine)
+
+
+class _TaskSignals(QObject):
+    """Segnali dei task (QRunnable non è un QObject)"""
+    done = Signal(str, QImage)
+    preview = Signal(str, QImage)
+    failed = Signal(str, str)
+
+
+class _ThumbnailTask(QRunnable):
+    """Decodifica di una miniatura in un thread del pool"""
+
+    def __init__(self, photo_path, width, height, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.photo_path = photo_path
+        self.width = width
+        self.height = height
+        self.signals = signals
+        self.skip = False      # già servita dalla cache tramite il task di anteprima
+
+    def run(self):
+        if self.skip:
+            return
+        try:
+            image = load_thumbnail_image(self.photo_path, self.width, self.height)
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(self.photo_path, str(e))
+            return
+        self.signals.done.emit(self.photo_path, image)
+
+
+class _PreviewTask(QRunnable):
+    """
+    Anteprima immediata: miniatura dalla cache su disco se c'è, altrimenti
+    la miniatura EXIF incorporata (pochi KB letti dall'inizio del file)
+    """
+
+    def __init__(self, full_task):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.full_task = full_task
+
+    def run(self):
+        task = self.full_task
+        cached = thumbnail_cache.lookup(task.photo_path, task.width, task.height)
+        if cached:
+            image = QImage(cached)
+            if not image.isNull():
+                task.skip = True
+                task.signals.done.emit(task.photo_path, image)
+                return
+        try:
+            data = exif_thumbnail(task.photo_path)
+        except OSError:
+            return
+        if data:
+            image = QImage.fromData(data)
+            if not image.isNull():
+                task.signals.preview.emit(task.photo_path, image)
+
+
+class _PrefetchBudget:
+    """
+    Limiti del prefetch: byte scritti in cache in questa sessione e RAM libera.
+
+    La cache su disco, una volta piena, resta per sempre vicina al budget
+    (l'eliminazione scende solo al 90%): l'occupazione non dice se il
+    prefetch sta scacciando miniature pronte. Conta invece quanto il
+    prefetch ha scritto da solo, così può sostituire al massimo quella
+    quota della cache a ogni avvio.
+    """
+
+    def __init__(self, limit, min_free_memory):
+        self.limit = limit
+        self.min_free_memory = min_free_memory
+        self.written = 0
+        self._lock = threading.Lock()
+
+    def allows(self):
+        with self._lock:
+            if self.written >= self.limit:
+                return False
+        free = available_memory()
+        return free is None or free >= self.min_free_memory
+
+    def add(self, nbytes):
+        with self._lock:
+            self.written += nbytes
+
+
+prefetch_budget = _PrefetchBudget(THUMBNAIL_PREFETCH_BYTES, THUMBNAIL_PREFETCH_MIN_FREE_MEMORY)
+
+
+class _PrefetchTask(QRunnable):
+    """Prepara in cache su disco la miniatura di una pagina vicina (nessun segnale)"""
+
+    def __init__(self, photo_path, width, height):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.photo_path = photo_path
+        self.width = width
+        self.height = height
+        self.finished = False
+
+    def run(self):
+        try:
+            if thumbnail_cache.lookup(self.photo_path, self.width, self.height):
+                return
+            if not prefetch_budget.allows():
+                return
+            _, stored = _load_image(self.photo_path, self.width, self.height)
+            prefetch_budget.add(stored)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.finished = True
+
+
+class ThumbnailLoader(QObject):
+    """
+    Carica le miniature di una finestra senza bloccare il thread GUI.
+
+    request_page() indica le foto che servono ora: i task in coda per foto
+    non più visibili vengono tolti dal pool, i risultati di quelli già
+    partiti vengono scartati. I risultati arrivano nel thread GUI come QImage.
+
+    Le finestre condividono la decodifica: il riquadro del loader entra
+    nella piramide prodotta per ogni foto (vedi load_thumbnail_image).
+
+    Con previews=True ogni foto ha anche un task ad alta priorità che invia
+    subito la miniatura EXIF (preview_ready), sostituita poi da quella vera.
+    """
+
+    thumbnail_ready = Signal(str, QImage)   # percorso, miniatura
+    preview_ready = Signal(str, QImage)     # percorso, anteprima provvisoria
+    thumbnail_failed = Signal(str, str)     # percorso, errore
+
+    # Priorità nel pool: anteprime, poi pagina visibile, poi prefetch
+    PREVIEW_PRIORITY = 10
+    PREFETCH_PRIORITY = -10
+
+    def __init__(self, width, height, parent=None, previews=False):
+        super().__init__(parent)
+        self.width = width
+        self.height = height
+        self.previews = previews
+        register_size(width, height)
+        self.pixmaps = PixmapView(width, height)
+        self._pending = {}     # {percorso: (_ThumbnailTask, _PreviewTask o None)}
+        self._prefetching = {}  # {percorso: _PrefetchTask}
+        self._wanted = set()
+        self._signals = _TaskSignals()
+        self._signals.done.connect(self._on_done)
+        self._signals.preview.connect(self._on_preview)
+        self._signals.failed.connect(self._on_failed)
+
+    def request_page(self, photo_paths):
+        """
+        Richiede le miniature di una pagina, annullando le richieste non più utili
+
+        Args:
+            photo_paths: Foto da caricare (nell'ordine in cui servono)
+        """
+        wanted = set(photo_paths)
+        for path, (task, preview_task) in list(self._pending.items()):
+            if path in wanted:
+                continue
+            if preview_task is not None:
+                _decode_pool.tryTake(preview_task)
+            if _decode_pool.tryTake(task):
+                del self._pending[path]
+        self._wanted = wanted
+
+        for path in photo_paths:
+            if path not in self._pending:
+                task = _ThumbnailTask(path, self.width, self.height, self._signals)
+                preview_task = _PreviewTask(task) if self.previews else None
+                self._pending[path] = (task, preview_task)
+                if preview_task is not None:
+                    _decode_pool.start(preview_task, self.PREVIEW_PRIORITY)
+                _decode_pool.start(task)
+
+    def prefetch(self, photo_paths):
+        """
+        Prepara in background le miniature delle pagine vicine (priorità bassa)
+
+        Sostituisce il prefetch precedente: i task in coda per foto non più
+        vicine vengono tolti dal pool. Si ferma con poca RAM libera o dopo
+        THUMBNAIL_PREFETCH_BYTES scritti in cache (vedi _PrefetchBudget).
+
+        Args:
+            photo_paths: Foto da preparare, dalla più urgente
+        """
+        keep = set(photo_paths)
+        for path, task in list(self._prefetching.items()):
+            if task.finished or (path not in keep and _decode_pool.tryTake(task)):
+                del self._prefetching[path]
+
+        for path in photo_paths:
+            if path in self._prefetching or path in self._pending:
+                continue
+            task = _PrefetchTask(path, self.width, self.height)
+            self._prefetching[path] = task
+            _decode_pool.start(task, self.PREFETCH_PRIORITY)
+
+    def cancel(self):
+        """Annulla tutte le richieste (es. cambio cartella)"""
+        self.request_page([])
+        self.prefetch([])
+
+    def _on_done(self, photo_path, image):
+        self._pending.pop(photo_path, None)
+        if photo_path in self._wanted:
+            self._wanted.discard(photo_path)
+            self.thumbnail_ready.emit(photo_path, image)
+
+    def _on_preview(self, photo_path, image):
+        if photo_path in self._wanted:
+            self.preview_ready.emit(photo_path, image)
+
+    def _on_failed(self, photo_path, error):
+        self._pending.pop(photo_path, None)
+        if photo_path in self._wanted:
+            self._wanted.discard(photo_path)
+            self.thumbnail_failed.emit(photo_path, error)